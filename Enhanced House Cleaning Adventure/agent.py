@@ -2,14 +2,19 @@
 
 """
 Contains the Agent class, representing an AI agent (e.g., a child) that moves around the house
-and dirties rooms after a certain number of rooms have been cleaned by the player.
+and dirties rooms after a certain number of rooms have been cleaned by the player, and the
+AgentGroup that moves all of a session's agents, each towards its own target.
 """
 
-from typing import List, Optional, Dict
-from utils import astar
+from typing import Iterator, List, Optional, Dict, Set
+from compiled_graph import CompiledGraph
+from flow_field import FlowField
+from pathfinding import NextHopTable
 import random
 
-from room import Room
+from room import Room, RoomRegistry
+from journal import EVENT_AGENT_MOVE, EVENT_AGENT_DIRTY, EVENT_AGENT_WAIT
+from session import AGENT_ROSTER
 
 
 class Agent:
@@ -17,68 +22,116 @@ class Agent:
     Represents an AI agent that moves around the house and dirties rooms.
 
     Attributes:
+        agent_index (int): The agent's position in the session's roster.
+        name (str): What the agent is, e.g. 'child' or 'dog'.
         current_room (Room): The room where the agent is currently located.
-        path (List[str]): The current path the agent is following.
         target_room_name (Optional[str]): The name of the room the agent is targeting.
         wait_counter (int): Counts the number of rooms cleaned since the agent last acted.
         wait_threshold (int): Number of rooms to wait before the agent acts.
+        needs_save (bool): True if the agent's persisted state changed since the last save.
+        journal (Optional[GameJournal]): Journal that records the agent's actions, if any.
     """
 
-    def __init__(self, current_room: Room) -> None:
+    def __init__(self, current_room: Room, agent_index: int = 0, name: str = 'child') -> None:
         """
         Initializes the Agent with a starting room.
 
         Args:
             current_room (Room): The room where the agent starts.
+            agent_index (int): The agent's position in the session's roster.
+            name (str): What the agent is, e.g. 'child' or 'dog'.
         """
+        self.agent_index: int = agent_index
+        self.name: str = name
         self.current_room: Room = current_room
-        self.path: List[str] = []
         self.target_room_name: Optional[str] = None
         self.wait_counter: int = 0
         self.wait_threshold: int = 2
+        self.needs_save: bool = False
+        self.journal = None
 
     @classmethod
-    def load_from_db(cls, conn, rooms):
+    def load_all_from_db(cls, conn, rooms, session_id, roster: tuple = AGENT_ROSTER):
         """
-        Load agent data from the database.
+        Load the session's agents from the database, one row per agent.
+
+        Args:
+            conn (sqlite3.Connection): The database connection.
+            rooms (Dict[str, Room]): Dictionary of all room objects.
+            session_id (int): The game session id.
+            roster (tuple): (name, start room, wait threshold) of every agent, by agent_index.
+
+        Returns:
+            List[Agent]: The agents, in roster order.
         """
         cursor = conn.cursor()
-        cursor.execute('SELECT current_room, wait_counter, wait_threshold FROM Agent LIMIT 1')
-        row = cursor.fetchone()
-        if row:
-            current_room_name, wait_counter, wait_threshold = row
-            current_room = rooms[current_room_name]
-            agent = cls(current_room)
-            agent.wait_counter = wait_counter
-            agent.wait_threshold = wait_threshold
-            return agent
-        else:
-            # If agent data does not exist, create a new one
-            agent_start_room = random.choice(list(rooms.values()))
-            agent = cls(agent_start_room)
-            agent.save_to_db(conn)
-            return agent
-
-    def save_to_db(self, conn):
+        cursor.execute('''
+            SELECT a.agent_index, r.name, a.wait_counter, a.wait_threshold FROM Agent a
+            JOIN Rooms r ON r.room_id = a.current_room_id
+            WHERE a.session_id = ?
+        ''', (session_id,))
+        rows = {row[0]: row[1:] for row in cursor.fetchall()}
+
+        agents = []
+        for agent_index, (name, start_room, wait_threshold) in enumerate(roster):
+            if agent_index in rows:
+                current_room_name, wait_counter, wait_threshold = rows[agent_index]
+                agent = cls(rooms[current_room_name], agent_index, name)
+                agent.wait_counter = wait_counter
+                agent.wait_threshold = wait_threshold
+            else:
+                # If agent data does not exist, create a new one
+                agent_start_room = rooms.get(start_room) or random.choice(list(rooms.values()))
+                agent = cls(agent_start_room, agent_index, name)
+                agent.wait_threshold = wait_threshold
+                agent.save_to_db(conn, session_id, commit=False)
+            agents.append(agent)
+        conn.commit()
+        return agents
+
+    def db_record(self, session_id):
         """
-        Save the agent's current state to the database.
+        Build the statement that saves the agent's current state.
+
+        Args:
+            session_id (int): The game session id.
+
+        Returns:
+            tuple: The SQL statement and its parameters.
         """
-        cursor = conn.cursor()
-        cursor.execute('''
-                INSERT INTO Agent (agent_id, current_room, wait_counter, wait_threshold)
-                VALUES (1, ?, ?, ?)
-                ON CONFLICT(agent_id) DO UPDATE SET
-                current_room=excluded.current_room,
+        return '''
+                INSERT INTO Agent (session_id, agent_index, current_room_id, wait_counter, wait_threshold)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(session_id, agent_index) DO UPDATE SET
+                current_room_id=excluded.current_room_id,
                 wait_counter=excluded.wait_counter,
                 wait_threshold=excluded.wait_threshold
-            ''', (self.current_room.name, self.wait_counter, self.wait_threshold))
-        conn.commit()
+            ''', (session_id, self.agent_index, self.current_room.room_id, self.wait_counter, self.wait_threshold)
+
+    def save_to_db(self, conn, session_id, commit: bool = True):
+        """
+        Save the agent's current state to the database.
+
+        Args:
+            conn (sqlite3.Connection): The database connection.
+            session_id (int): The game session id.
+            commit (bool): Commit immediately. Pass False when the caller batches
+                several saves into one transaction.
+        """
+        cursor = conn.cursor()
+        cursor.execute(*self.db_record(session_id))
+        if commit:
+            conn.commit()
+        self.needs_save = False
 
     def increment_wait_counter(self) -> None:
         """
         Increments the agent's wait counter when the player cleans a room.
         """
         self.wait_counter += 1
+        self.needs_save = True
+        if self.journal:
+            self.journal.record(EVENT_AGENT_WAIT, value=self.wait_counter, agent_index=self.agent_index)
 
     def should_act(self) -> bool:
         """
@@ -94,57 +147,36 @@ class Agent:
         Resets the agent's wait counter after acting.
         """
         self.wait_counter = 0
+        self.needs_save = True
+        if self.journal:
+            self.journal.record(EVENT_AGENT_WAIT, value=self.wait_counter, agent_index=self.agent_index)
 
-    def set_target(self, rooms: Dict[str, Room]) -> None:
+    def set_target(self, rooms: RoomRegistry, exclude: Optional[Set[str]] = None) -> None:
         """
         Sets the agent's target room to a clean room to dirty.
 
         Args:
-            rooms (Dict[str, Room]): Dictionary of all room objects.
+            rooms (RoomRegistry): All room objects, with their cleanliness index.
+            exclude (Optional[Set[str]]): Names of rooms not to choose, e.g. other agents' targets.
         """
-        # Choose a clean room to dirty
-        clean_rooms = [
-            room for room in rooms.values()
-            if room.is_clean and room != self.current_room
-        ]
-        if clean_rooms:
-            target_room = random.choice(clean_rooms)
-            self.target_room_name = target_room.name
-        else:
-            self.target_room_name = None
+        # Choose a clean room to dirty, straight from the registry's clean index
+        excluded = {self.current_room.name}
+        if exclude:
+            excluded |= exclude
+        target_room = rooms.random_clean(exclude=excluded)
+        self.target_room_name = target_room.name if target_room else None
 
-    def move(self, rooms: Dict[str, Room], graph: Dict[str, List[str]]) -> None:
+    def _enter_room(self, room: Room) -> None:
         """
-        Moves the agent along the path towards the target room if it's time to act.
+        Moves the agent into a room and records the move.
 
         Args:
-            rooms (Dict[str, Room]): Dictionary of all rooms.
-            graph (Dict[str, List[str]]): Graph representation of the house.
+            room (Room): The room to move into.
         """
-        if not self.should_act():
-            return  # Agent waits until the threshold is reached
-
-        if not self.path or self.current_room.name == self.target_room_name:
-            # Recalculate path if we reached the target or there is no path
-            self.set_target(rooms)
-            if self.target_room_name:
-                self.path = astar(
-                    graph,
-                    self.current_room.name,
-                    self.target_room_name,
-                    rooms
-                )
-                if self.path and len(self.path) > 1:
-                    # Remove the current room from the path
-                    self.path.pop(0)
-                else:
-                    self.path = []
-            else:
-                self.path = []
-
-        if self.path:
-            next_room_name = self.path.pop(0)
-            self.current_room = rooms[next_room_name]
+        self.current_room = room
+        self.needs_save = True
+        if self.journal:
+            self.journal.record(EVENT_AGENT_MOVE, self.current_room, agent_index=self.agent_index)
 
     def dirty_room(self, messages: List[str]) -> None:
         """
@@ -158,10 +190,136 @@ class Agent:
 
         if self.current_room.is_clean:
             self.current_room.dirty()
+            if self.journal:
+                self.journal.record(EVENT_AGENT_DIRTY, self.current_room, agent_index=self.agent_index)
             # Add a message to inform the player
             messages.append(
-                f"Oh no! The child messed up the {self.current_room.name} again!"
+                f"Oh no! The {self.name} messed up the {self.current_room.name} again!"
             )
 
         # After acting, reset the wait counter
-        self.reset_wait_counter()
\ No newline at end of file
+        self.reset_wait_counter()
+
+
+class AgentGroup:
+    """
+    All of a session's agents, each walking towards its own target.
+
+    Every agent picks a different clean room as its target and keeps it until
+    it gets there or the room is dirtied. Steps are looked up, never searched:
+    in the layout's next-hop table when it has one, and otherwise in a flow
+    field per target, built with one backwards search when the target is picked
+    and shared by every lookup until the target changes. A multi-source field
+    over all targets would be cheaper still, but it sends each agent to the
+    nearest target rather than its own, so an agent standing on another
+    agent's target would stop there and dirty it without moving.
+
+    Attributes:
+        agents (List[Agent]): The agents, in roster order.
+        graph (CompiledGraph): The compiled house graph.
+        next_hops (Optional[NextHopTable]): The layout's next-hop table, if it has one.
+        flow_fields (Dict[str, FlowField]): Field leading to each current target, when there is no table.
+    """
+
+    def __init__(self, agents: List[Agent], graph: CompiledGraph, next_hops: Optional[NextHopTable] = None) -> None:
+        """
+        Initializes the group.
+
+        Args:
+            agents (List[Agent]): The session's agents.
+            graph (CompiledGraph): The compiled house graph.
+            next_hops (Optional[NextHopTable]): The layout's next-hop table; without it
+                the agents steer by flow fields.
+        """
+        self.agents: List[Agent] = agents
+        self.graph: CompiledGraph = graph
+        self.next_hops: Optional[NextHopTable] = next_hops
+        self.flow_fields: Dict[str, FlowField] = {}
+
+    def increment_wait_counters(self) -> None:
+        """
+        Increments every agent's wait counter when the player cleans a room.
+        """
+        for agent in self.agents:
+            agent.increment_wait_counter()
+
+    def move(self, rooms: RoomRegistry) -> None:
+        """
+        Moves every agent that is due to act one room towards its target.
+
+        Args:
+            rooms (RoomRegistry): All rooms, with their cleanliness index.
+        """
+        acting = [agent for agent in self.agents if agent.should_act()]
+        if not acting:
+            return  # Agents wait until their thresholds are reached
+
+        # Replace targets that were reached or dirtied, keeping every agent's target distinct
+        for agent in self.agents:
+            target = agent.target_room_name
+            if target is None or target == agent.current_room.name or not rooms[target].is_clean:
+                taken = {other.target_room_name for other in self.agents if other is not agent}
+                agent.set_target(rooms, exclude=taken)
+        if self.next_hops is None:
+            self._update_flow_fields()
+
+        for agent in acting:
+            next_room_name = self.next_hop(agent)
+            if next_room_name is not None:
+                agent._enter_room(rooms[next_room_name])
+            else:
+                agent.target_room_name = None  # Unreachable; pick another target next time
+
+    def next_hop(self, agent: Agent) -> Optional[str]:
+        """
+        Looks up the next room on a cheapest path from an agent to its target.
+
+        Args:
+            agent (Agent): The agent.
+
+        Returns:
+            Optional[str]: The neighbouring room to move to, or None if the agent has no
+                target, is on it, or cannot reach it.
+        """
+        target = agent.target_room_name
+        if target is None:
+            return None
+        if self.next_hops is not None:
+            return self.next_hops.next_hop(agent.current_room.name, target)
+        field = self.flow_fields.get(target)
+        return field.next_hop(agent.current_room.name) if field is not None else None
+
+    def _update_flow_fields(self) -> None:
+        """
+        Builds a field for every new target and drops the fields of targets no agent has any more.
+        """
+        fields = {}
+        for agent in self.agents:
+            target = agent.target_room_name
+            if target is None or target in fields:
+                continue
+            field = self.flow_fields.get(target)
+            if field is None:
+                field = FlowField(self.graph)
+                field.update((target,))
+            fields[target] = field
+        self.flow_fields = fields
+
+    def dirty_rooms(self, messages: List[str]) -> None:
+        """
+        Lets every agent that is due to act dirty its room.
+
+        Args:
+            messages (List[str]): List of messages to display to the player.
+        """
+        for agent in self.agents:
+            agent.dirty_room(messages)
+
+    def __iter__(self) -> Iterator[Agent]:
+        return iter(self.agents)
+
+    def __len__(self) -> int:
+        return len(self.agents)
+
+    def __getitem__(self, agent_index: int) -> Agent:
+        return self.agents[agent_index]
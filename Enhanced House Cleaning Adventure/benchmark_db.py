@@ -0,0 +1,99 @@
+# benchmark_db.py
+
+"""
+Compares SQLite commit throughput of a default connection against the tuned
+connections handed out by database.ConnectionManager.
+
+Each run commits one small room update per transaction, the same shape of write
+the game makes, against a scratch database in a temporary directory.
+
+Usage:
+    python benchmark_db.py [--commits N]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from database import ConnectionManager
+
+ROOM_NAMES = [
+    'The Foyer', 'Kitchen', 'Bedroom', 'Bathroom',
+    'Living Room', 'Master Bedroom', 'Backyard', 'Garage'
+]
+
+
+def create_rooms(conn: sqlite3.Connection) -> None:
+    """
+    Creates and fills a Rooms table shaped like the game's.
+
+    Args:
+        conn (sqlite3.Connection): The database connection.
+    """
+    conn.execute('''
+        CREATE TABLE Rooms (
+            room_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            x_coordinate INTEGER NOT NULL,
+            y_coordinate INTEGER NOT NULL,
+            is_clean INTEGER NOT NULL
+        )
+    ''')
+    conn.executemany(
+        'INSERT INTO Rooms (name, x_coordinate, y_coordinate, is_clean) VALUES (?, 0, 0, 0)',
+        [(name,) for name in ROOM_NAMES]
+    )
+    conn.commit()
+
+
+def commits_per_second(conn: sqlite3.Connection, commits: int) -> float:
+    """
+    Measures how many single-row update transactions the connection commits per second.
+
+    Args:
+        conn (sqlite3.Connection): The database connection.
+        commits (int): Number of transactions to commit.
+
+    Returns:
+        float: Commits per second.
+    """
+    start = time.perf_counter()
+    for i in range(commits):
+        conn.execute(
+            'UPDATE Rooms SET is_clean = ? WHERE name = ?',
+            (i % 2, ROOM_NAMES[i % len(ROOM_NAMES)])
+        )
+        conn.commit()
+    return commits / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """
+    Runs the benchmark and prints the results.
+    """
+    parser = argparse.ArgumentParser(description="Compare SQLite commit throughput.")
+    parser.add_argument('--commits', type=int, default=2000, help="Transactions per run.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Baseline: a bare connection in the default rollback-journal mode
+        default_conn = sqlite3.connect(os.path.join(tmp, 'default.db'))
+        create_rooms(default_conn)
+        before = commits_per_second(default_conn, args.commits)
+        default_conn.close()
+
+        # Tuned: WAL, synchronous=NORMAL, larger cache and mmap
+        manager = ConnectionManager(os.path.join(tmp, 'tuned.db'))
+        tuned_conn = manager.get_connection()
+        create_rooms(tuned_conn)
+        after = commits_per_second(tuned_conn, args.commits)
+        manager.close()
+
+    print(f"Default connection: {before:10.0f} commits/sec")
+    print(f"Tuned connection:   {after:10.0f} commits/sec")
+    print(f"Speedup:            {after / before:10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
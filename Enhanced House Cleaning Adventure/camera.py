@@ -0,0 +1,162 @@
+# camera.py
+
+"""
+Scrolling, zoomable view onto the house map. Pure Python; does not need pygame.
+
+The camera maps map coordinates (the room x/y from the layout) to pixels in the
+map viewport, the part of the screen above the text box. Every change bumps a
+version counter so the renderer knows when to rebuild its view of the map.
+"""
+
+from typing import Tuple
+from constants import CAMERA_MIN_ZOOM, CAMERA_MAX_ZOOM
+
+Bounds = Tuple[float, float, float, float]  # (x, y, width, height)
+
+
+class Camera:
+    """
+    The visible part of the map.
+
+    Attributes:
+        x (float): Map x-coordinate at the viewport's left edge.
+        y (float): Map y-coordinate at the viewport's top edge.
+        zoom (float): Pixels per map unit.
+        width (int): Viewport width in pixels.
+        height (int): Viewport height in pixels.
+        version (int): Incremented every time the view changes.
+    """
+
+    def __init__(self, width: int, height: int, x: float = 0.0, y: float = 0.0, zoom: float = 1.0) -> None:
+        """
+        Initializes the camera.
+
+        Args:
+            width (int): Viewport width in pixels.
+            height (int): Viewport height in pixels.
+            x (float): Map x-coordinate at the viewport's left edge.
+            y (float): Map y-coordinate at the viewport's top edge.
+            zoom (float): Pixels per map unit.
+        """
+        self.width: int = width
+        self.height: int = height
+        self.x: float = x
+        self.y: float = y
+        self.zoom: float = zoom
+        self.version: int = 0
+
+    def _changed(self) -> None:
+        self.version += 1
+
+    def visible_bounds(self) -> Bounds:
+        """
+        Returns the region of the map inside the viewport.
+
+        Returns:
+            Bounds: The visible map region as (x, y, width, height).
+        """
+        return self.x, self.y, self.width / self.zoom, self.height / self.zoom
+
+    def world_to_screen(self, wx: float, wy: float) -> Tuple[int, int]:
+        """
+        Converts a map point to viewport pixels.
+
+        Args:
+            wx (float): Map x-coordinate.
+            wy (float): Map y-coordinate.
+
+        Returns:
+            Tuple[int, int]: The pixel position.
+        """
+        return round((wx - self.x) * self.zoom), round((wy - self.y) * self.zoom)
+
+    def screen_to_world(self, sx: float, sy: float) -> Tuple[float, float]:
+        """
+        Converts viewport pixels to a map point.
+
+        Args:
+            sx (float): Pixel x-coordinate.
+            sy (float): Pixel y-coordinate.
+
+        Returns:
+            Tuple[float, float]: The map point.
+        """
+        return sx / self.zoom + self.x, sy / self.zoom + self.y
+
+    def bounds_to_screen(self, bounds: Bounds) -> Tuple[int, int, int, int]:
+        """
+        Converts a map rectangle to a pixel rectangle.
+
+        Both edges are rounded, so rooms that touch on the map still touch on screen.
+
+        Args:
+            bounds (Bounds): The map rectangle as (x, y, width, height).
+
+        Returns:
+            Tuple[int, int, int, int]: The pixel rectangle as (x, y, width, height).
+        """
+        x, y, w, h = bounds
+        left, top = self.world_to_screen(x, y)
+        right, bottom = self.world_to_screen(x + w, y + h)
+        return left, top, right - left, bottom - top
+
+    def pan(self, dx: float, dy: float) -> None:
+        """
+        Scrolls the view by a number of pixels, e.g. a mouse drag.
+
+        Args:
+            dx (float): Pixels to move the map right.
+            dy (float): Pixels to move the map down.
+        """
+        if dx or dy:
+            self.x -= dx / self.zoom
+            self.y -= dy / self.zoom
+            self._changed()
+
+    def zoom_at(self, factor: float, sx: float, sy: float) -> None:
+        """
+        Zooms by a factor, keeping the map point under a pixel in place.
+
+        Args:
+            factor (float): Zoom multiplier; above 1 zooms in.
+            sx (float): Pixel x-coordinate to zoom around, e.g. the mouse.
+            sy (float): Pixel y-coordinate to zoom around.
+        """
+        zoom = min(max(self.zoom * factor, CAMERA_MIN_ZOOM), CAMERA_MAX_ZOOM)
+        if zoom == self.zoom:
+            return
+        wx, wy = self.screen_to_world(sx, sy)
+        self.zoom = zoom
+        self.x = wx - sx / zoom
+        self.y = wy - sy / zoom
+        self._changed()
+
+    def center_on(self, wx: float, wy: float) -> None:
+        """
+        Scrolls so a map point is in the middle of the viewport.
+
+        Args:
+            wx (float): Map x-coordinate.
+            wy (float): Map y-coordinate.
+        """
+        self.x = wx - self.width / (2 * self.zoom)
+        self.y = wy - self.height / (2 * self.zoom)
+        self._changed()
+
+    def ensure_visible(self, bounds: Bounds) -> bool:
+        """
+        Centres the view on a rectangle if its centre is out of view.
+
+        Args:
+            bounds (Bounds): The map rectangle, e.g. the player's room.
+
+        Returns:
+            bool: True if the view moved.
+        """
+        x, y, w, h = bounds
+        cx, cy = x + w / 2, y + h / 2
+        vx, vy, vw, vh = self.visible_bounds()
+        if vx <= cx < vx + vw and vy <= cy < vy + vh:
+            return False
+        self.center_on(cx, cy)
+        return True
@@ -0,0 +1,223 @@
+# compiled_graph.py
+
+"""
+Compact, integer-indexed form of the house graph for pathfinding. Pure Python;
+does not need pygame.
+
+Room names are interned to dense ids 0..n-1. The adjacency is stored in
+compressed sparse row (CSR) form: the neighbours of room i are
+neighbors[offsets[i]:offsets[i + 1]], and weights holds the traversal cost of
+each of those connections. Room coordinates are kept in parallel arrays.
+Everything lives in flat typed arrays, so a search touches no strings, and a
+house with a million rooms takes a few tens of megabytes rather than the
+hundreds that dicts of lists would need.
+"""
+
+from array import array
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Typecode for room ids and offsets: a C int, 4 bytes on every platform the game runs on
+ID_TYPE = 'i'
+
+
+class CompiledGraph:
+    """
+    The house graph as CSR arrays.
+
+    Attributes:
+        names (List[str]): Room name of every id.
+        index (Dict[str, int]): Id of every room name.
+        offsets (array): Start of each room's neighbours in neighbors; n + 1 entries.
+        neighbors (array): Neighbour ids of every room, one room after another.
+        weights (array): Traversal cost of every connection, parallel to neighbors.
+        xs (array): x-coordinate of every room.
+        ys (array): y-coordinate of every room.
+        step_length (float): The longest Manhattan distance covered per unit of traversal cost.
+        weighted (bool): True if any connection costs something other than 1.
+        version (Optional[int]): Version of the HouseGraph it was compiled from, if any.
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        offsets: array,
+        neighbors: array,
+        xs: array,
+        ys: array,
+        version: Optional[int] = None,
+        weights: Optional[array] = None
+    ) -> None:
+        """
+        Initializes the graph from prebuilt arrays. Use from_adjacency or from_graph instead.
+
+        Args:
+            names (List[str]): Room name of every id.
+            offsets (array): CSR row offsets.
+            neighbors (array): CSR neighbour ids.
+            xs (array): x-coordinate of every room.
+            ys (array): y-coordinate of every room.
+            version (Optional[int]): Version of the HouseGraph it was compiled from, if any.
+            weights (Optional[array]): Traversal cost of every connection; every move costs 1 if not given.
+        """
+        self.names: List[str] = names
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(names)}
+        self.offsets: array = offsets
+        self.neighbors: array = neighbors
+        self.weights: array = weights if weights is not None else array('d', [1.0]) * len(neighbors)
+        self.xs: array = xs
+        self.ys: array = ys
+        self.version: Optional[int] = version
+        self.weighted: bool = any(weight != 1 for weight in self.weights)
+        self.step_length: float = self._max_step_length()
+        self._reverse: Optional[CompiledGraph] = None
+
+    @classmethod
+    def from_adjacency(
+        cls,
+        adjacency: Dict[str, Sequence[str]],
+        coordinates: Dict[str, Tuple[int, int]],
+        version: Optional[int] = None,
+        costs: Optional[Dict[Tuple[str, str], float]] = None
+    ) -> 'CompiledGraph':
+        """
+        Compiles adjacency lists, room coordinates and connection costs.
+
+        Args:
+            adjacency (Dict[str, Sequence[str]]): Neighbouring room names for every room.
+            coordinates (Dict[str, Tuple[int, int]]): (x, y) of every room.
+            version (Optional[int]): Version of the graph being compiled, if any.
+            costs (Optional[Dict[Tuple[str, str], float]]): Traversal cost of (from_room, to_room)
+                connections; connections not listed cost 1.
+
+        Returns:
+            CompiledGraph: The compiled graph.
+        """
+        names = list(adjacency)
+        index = {name: i for i, name in enumerate(names)}
+        offsets = array(ID_TYPE, [0])
+        offsets.extend(accumulate(len(adjacency[name]) for name in names))
+        neighbors = array(ID_TYPE, [index[neighbor] for name in names for neighbor in adjacency[name]])
+        xs = array('d', [coordinates[name][0] for name in names])
+        ys = array('d', [coordinates[name][1] for name in names])
+        weights = None
+        if costs:
+            weights = array('d', [costs.get((name, neighbor), 1.0) for name in names for neighbor in adjacency[name]])
+        return cls(names, offsets, neighbors, xs, ys, version, weights)
+
+    @classmethod
+    def from_graph(cls, graph: Dict[str, Sequence[str]], rooms: Dict) -> 'CompiledGraph':
+        """
+        Compiles a graph using the coordinates of its Room objects and the graph's connection costs.
+
+        Args:
+            graph (Dict[str, Sequence[str]]): The graph representation of the house.
+            rooms (Dict[str, Room]): Dictionary of Room objects.
+
+        Returns:
+            CompiledGraph: The compiled graph, remembering the graph's version if it has one.
+        """
+        coordinates = {name: (rooms[name].x, rooms[name].y) for name in graph}
+        return cls.from_adjacency(
+            graph, coordinates, getattr(graph, 'version', None), getattr(graph, 'costs', None)
+        )
+
+    def _max_step_length(self) -> float:
+        """
+        Returns the longest Manhattan distance covered per unit of cost by any connection, or 0 if there are none.
+        """
+        xs, ys, offsets, neighbors = self.xs, self.ys, self.offsets, self.neighbors
+        longest = 0.0
+        if not self.weighted:
+            for i in range(len(self.names)):
+                x, y = xs[i], ys[i]
+                for j in neighbors[offsets[i]:offsets[i + 1]]:
+                    distance = abs(x - xs[j]) + abs(y - ys[j])
+                    if distance > longest:
+                        longest = distance
+            return longest
+        weights = self.weights
+        for i in range(len(self.names)):
+            x, y = xs[i], ys[i]
+            for k in range(offsets[i], offsets[i + 1]):
+                j = neighbors[k]
+                distance = (abs(x - xs[j]) + abs(y - ys[j])) / weights[k]
+                if distance > longest:
+                    longest = distance
+        return longest
+
+    def transpose(self) -> 'CompiledGraph':
+        """
+        Returns the graph with every connection reversed, sharing the room ids and coordinates.
+        Each reversed connection keeps its cost.
+
+        Searching the reversed graph from a room finds every room that can reach it.
+
+        Returns:
+            CompiledGraph: The reversed graph.
+        """
+        incoming: List[List[Tuple[int, float]]] = [[] for _ in self.names]
+        offsets, neighbors, weights = self.offsets, self.neighbors, self.weights
+        for i in range(len(self.names)):
+            for k in range(offsets[i], offsets[i + 1]):
+                incoming[neighbors[k]].append((i, weights[k]))
+        reverse_offsets = array(ID_TYPE, [0])
+        reverse_offsets.extend(accumulate(len(sources) for sources in incoming))
+        reverse_neighbors = array(ID_TYPE, [i for sources in incoming for i, _ in sources])
+        reverse_weights = array('d', [weight for sources in incoming for _, weight in sources])
+        return CompiledGraph(
+            self.names, reverse_offsets, reverse_neighbors, self.xs, self.ys, self.version, reverse_weights
+        )
+
+    @property
+    def reverse(self) -> 'CompiledGraph':
+        """
+        The transposed graph, built on first use and kept for later searches.
+
+        Returns:
+            CompiledGraph: The reversed graph.
+        """
+        if self._reverse is None:
+            self._reverse = self.transpose()
+            self._reverse._reverse = self
+        return self._reverse
+
+    def neighbors_of(self, room_id: int) -> array:
+        """
+        Returns the neighbour ids of a room.
+
+        Args:
+            room_id (int): The room's id.
+
+        Returns:
+            array: The neighbour ids.
+        """
+        return self.neighbors[self.offsets[room_id]:self.offsets[room_id + 1]]
+
+    def ids(self, names: Iterable[str]) -> List[int]:
+        """
+        Converts room names to ids.
+
+        Args:
+            names (Iterable[str]): Room names.
+
+        Returns:
+            List[int]: Their ids.
+        """
+        return [self.index[name] for name in names]
+
+    def names_of(self, room_ids: Iterable[int]) -> List[str]:
+        """
+        Converts room ids to names.
+
+        Args:
+            room_ids (Iterable[int]): Room ids.
+
+        Returns:
+            List[str]: Their names.
+        """
+        names = self.names
+        return [names[i] for i in room_ids]
+
+    def __len__(self) -> int:
+        return len(self.names)
@@ -23,11 +23,67 @@ WHITE: tuple = (255, 255, 255)
 BLACK: tuple = (0, 0, 0)
 CLEAN_COLOR: tuple = (0, 255, 0)    # Green for clean rooms
 DIRTY_COLOR: tuple = (255, 0, 0)    # Red for dirty rooms
+AGENT_COLOR: tuple = (0, 0, 255)    # Blue marker for the agent
 
 # Font settings
 FONT_NAME: str = 'Arial'
 FONT_SIZE: int = 20
 FONT_COLOR: tuple = WHITE
 
+# Room label font (None selects pygame's default font)
+ROOM_FONT_NAME = None
+ROOM_FONT_SIZE: int = 24
+
 # Frame rate
-FPS: int = 60
\ No newline at end of file
+FPS: int = 60
+
+# Rendering caches
+TEXT_CACHE_SIZE: int = 256   # Rendered text surfaces kept by the text cache
+
+# Camera and spatial index
+SPATIAL_CELL_SIZE: int = 512        # Map units per spatial grid cell
+CAMERA_MIN_ZOOM: float = 0.05       # Furthest zoom out
+CAMERA_MAX_ZOOM: float = 4.0        # Closest zoom in
+CAMERA_ZOOM_STEP: float = 1.25      # Zoom factor per mouse wheel notch
+MIN_LABEL_FONT_SIZE: int = 8        # Room names are hidden when zoomed out below this size
+
+# Click-to-move
+ROUTE_STEP_INTERVAL: float = 0.15   # Seconds between steps along a clicked route
+ROUTE_COLOR: tuple = (255, 255, 0)  # Yellow markers previewing the route
+
+# Pathfinding
+PATH_CACHE_SIZE: int = 1024         # Routes kept by the path cache
+NEXT_HOP_MAX_ROOMS: int = 2000      # Larger layouts skip the all-pairs next-hop table (it grows with rooms squared)
+PATH_SEARCH_METHOD: str = 'auto'    # 'auto', 'astar', 'dijkstra', 'bidirectional' or 'alt' (A* with landmarks)
+LANDMARK_COUNT: int = 8             # Landmarks precomputed per layout for ALT; 16 bytes per room each
+ALT_MIN_ROOMS: int = 100            # Smaller layouts skip the landmarks; plain A* is faster there
+
+# Message log
+VISIBLE_MESSAGES: int = 5           # Lines shown in the text box
+MESSAGE_LOG_SIZE: int = 200         # Messages kept in memory; older ones are dropped or spilled
+MESSAGE_SPILL_FILE = None           # Text file to append dropped messages to, or None
+
+# Directions, and the compact integer codes stored for them in the database
+DIRECTIONS: tuple = ('North', 'South', 'East', 'West')
+DIRECTION_CODES: dict = {direction: code for code, direction in enumerate(DIRECTIONS)}
+
+# House layout
+LAYOUT_FILE: str = 'layouts/default.json'   # JSON or TOML, relative to the game directory
+LAYOUT_CACHE_DIR: str = '.cache'            # Compiled layout caches, next to the layout file
+
+# Persistence settings
+SAVE_INTERVAL: float = 5.0    # Seconds between write-behind saves of changed rows
+WRITER_BATCH_SIZE: int = 64   # Maximum queued saves the writer thread commits per transaction
+SNAPSHOT_INTERVAL: int = 50   # Journaled events between game state snapshots
+LEADERBOARD_SIZE: int = 100   # Fastest wins kept in the materialized Leaderboard table
+
+# SQLite connection tuning
+DB_CACHE_SIZE_KB: int = 8192            # Page cache per connection, in KiB
+DB_MMAP_SIZE: int = 64 * 1024 * 1024    # Bytes of the database file to memory-map
+DB_BUSY_TIMEOUT_MS: int = 5000          # How long to wait on a locked database
+DB_STATEMENT_CACHE_SIZE: int = 128      # Prepared statements kept per connection
+
+# In-memory mode: run the live game against memory and back it up to the database file
+DB_IN_MEMORY: bool = False              # True for kiosk and server deployments
+BACKUP_INTERVAL: float = 30.0           # Seconds between online backups to disk
+BACKUP_ON_GAME_END: bool = True         # Also back up when a game is won or lost
\ No newline at end of file
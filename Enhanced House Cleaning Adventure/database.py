@@ -1,23 +1,455 @@
 # database.py
 
+import os
 import sqlite3
+import threading
+from constants import (
+    DB_CACHE_SIZE_KB, DB_MMAP_SIZE, DB_BUSY_TIMEOUT_MS, DB_STATEMENT_CACHE_SIZE,
+    LEADERBOARD_SIZE, DB_IN_MEMORY, DIRECTION_CODES
+)
 
 DB_NAME = 'game.db'
 
 
+class ConnectionManager:
+    """
+    Hands out one long-lived, tuned SQLite connection per thread.
+
+    The database runs in WAL mode so read-only connections (leaderboard,
+    analytics, exports) can read while the game's writer commits.
+
+    In in-memory mode the live database is a shared-cache memory database. It is
+    loaded from the database file when first opened and written back with the
+    SQLite online backup API by backup(), so gameplay writes never touch the disk.
+
+    Attributes:
+        db_name (str): Path of the database file.
+        cache_size_kb (int): Page cache size per connection, in KiB.
+        mmap_size (int): Number of bytes of the database file to memory-map.
+        in_memory (bool): True if the live database is held in memory.
+    """
+
+    def __init__(
+        self,
+        db_name: str = DB_NAME,
+        cache_size_kb: int = DB_CACHE_SIZE_KB,
+        mmap_size: int = DB_MMAP_SIZE,
+        in_memory: bool = False
+    ) -> None:
+        """
+        Initializes the manager. Connections are opened lazily per thread.
+
+        Args:
+            db_name (str): Path of the database file.
+            cache_size_kb (int): Page cache size per connection, in KiB.
+            mmap_size (int): Number of bytes of the database file to memory-map.
+            in_memory (bool): Hold the live database in memory and back it up to db_name.
+        """
+        self.db_name: str = db_name
+        self.cache_size_kb: int = cache_size_kb
+        self.mmap_size: int = mmap_size
+        self.in_memory: bool = in_memory
+        self._local = threading.local()
+        self._memory_uri: str = f'file:{os.path.basename(db_name)}-live?mode=memory&cache=shared'
+        # Keeps the shared memory database alive while any thread uses it
+        self._memory_anchor = None
+        self._backup_lock = threading.Lock()
+
+    def _configure(self, conn: sqlite3.Connection, read_only: bool = False) -> None:
+        """
+        Applies the connection pragmas.
+
+        Args:
+            conn (sqlite3.Connection): The connection to configure.
+            read_only (bool): True if the connection was opened read-only.
+        """
+        if not read_only:
+            # WAL is stored in the database file, so this only does work the first time
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute('PRAGMA foreign_keys = ON')
+        conn.execute(f'PRAGMA cache_size = -{int(self.cache_size_kb)}')
+        conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        conn.execute(f'PRAGMA busy_timeout = {int(DB_BUSY_TIMEOUT_MS)}')
+
+    def get_connection(self) -> sqlite3.Connection:
+        """
+        Returns the calling thread's read-write connection, opening it if needed.
+
+        Returns:
+            sqlite3.Connection: The thread's connection.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.in_memory:
+                self._open_memory_database()
+            conn = sqlite3.connect(
+                self._memory_uri if self.in_memory else self.db_name,
+                uri=self.in_memory,
+                timeout=DB_BUSY_TIMEOUT_MS / 1000,
+                cached_statements=DB_STATEMENT_CACHE_SIZE
+            )
+            self._configure(conn)
+            self._local.conn = conn
+            self._local.cursor = conn.cursor()
+        return conn
+
+    def get_cursor(self) -> sqlite3.Cursor:
+        """
+        Returns a cursor on the calling thread's connection that is reused between calls.
+
+        Returns:
+            sqlite3.Cursor: The thread's cached cursor.
+        """
+        self.get_connection()
+        return self._local.cursor
+
+    def get_read_connection(self) -> sqlite3.Connection:
+        """
+        Returns the calling thread's read-only connection, opening it if needed.
+
+        Returns:
+            sqlite3.Connection: A connection that cannot write to the database.
+        """
+        conn = getattr(self._local, 'read_conn', None)
+        if conn is None:
+            if self.in_memory:
+                # Read the live memory database without taking shared-cache table locks
+                self._open_memory_database()
+                conn = sqlite3.connect(
+                    self._memory_uri,
+                    uri=True,
+                    cached_statements=DB_STATEMENT_CACHE_SIZE
+                )
+                conn.execute('PRAGMA query_only = 1')
+                conn.execute('PRAGMA read_uncommitted = 1')
+            else:
+                conn = sqlite3.connect(
+                    f'file:{self.db_name}?mode=ro',
+                    uri=True,
+                    timeout=DB_BUSY_TIMEOUT_MS / 1000,
+                    cached_statements=DB_STATEMENT_CACHE_SIZE
+                )
+                self._configure(conn, read_only=True)
+            self._local.read_conn = conn
+        return conn
+
+    def _open_memory_database(self) -> None:
+        """
+        Creates the shared memory database and restores the last backup into it.
+        """
+        with self._backup_lock:
+            if self._memory_anchor is not None:
+                return
+            anchor = sqlite3.connect(self._memory_uri, uri=True, check_same_thread=False)
+            if os.path.exists(self.db_name):
+                # Recovery path: start from the last backup written to disk
+                disk = sqlite3.connect(self.db_name)
+                try:
+                    disk.backup(anchor)
+                finally:
+                    disk.close()
+            self._memory_anchor = anchor
+
+    def backup(self) -> bool:
+        """
+        Copies the in-memory database to the database file with the online backup API.
+
+        Returns:
+            bool: True if a backup was written, False when not running in memory.
+        """
+        if not self.in_memory or self._memory_anchor is None:
+            return False
+        with self._backup_lock:
+            # Back up to a temporary file and swap it in, so a crash mid-backup
+            # never leaves a half-written database file behind
+            tmp_name = self.db_name + '.backup'
+            disk = sqlite3.connect(tmp_name)
+            try:
+                self._memory_anchor.backup(disk)
+            finally:
+                disk.close()
+            if os.path.exists(self.db_name):
+                # Fold any write-ahead log into the old file and empty it first, so the WAL
+                # left next to the database cannot be replayed over the new backup
+                target = sqlite3.connect(self.db_name)
+                try:
+                    target.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                finally:
+                    target.close()
+            os.replace(tmp_name, self.db_name)
+        return True
+
+    def close(self) -> None:
+        """
+        Closes the calling thread's connections.
+        """
+        for attr in ('conn', 'read_conn'):
+            conn = getattr(self._local, attr, None)
+            if conn is not None:
+                conn.close()
+                setattr(self._local, attr, None)
+        self._local.cursor = None
+
+
+_manager = ConnectionManager(in_memory=DB_IN_MEMORY)
+
+
+# Tables that are rebuilt when migrating from room-name keys to integer room ids.
+# {table} is filled in with the table name, or a temporary name during a rebuild.
+PLAYERS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        player_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL
+    )
+'''
+
+SESSIONS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        session_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        player_id INTEGER UNIQUE NOT NULL,
+        current_room_id INTEGER NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (player_id) REFERENCES Players(player_id) ON DELETE CASCADE,
+        FOREIGN KEY (current_room_id) REFERENCES Rooms(room_id)
+    )
+'''
+
+SESSION_ROOMS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        session_id INTEGER NOT NULL,
+        room_id INTEGER NOT NULL,
+        is_clean INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (session_id, room_id),
+        FOREIGN KEY (session_id) REFERENCES Sessions(session_id) ON DELETE CASCADE,
+        FOREIGN KEY (room_id) REFERENCES Rooms(room_id)
+    ) WITHOUT ROWID
+'''
+
+AGENT_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        agent_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id INTEGER REFERENCES Sessions(session_id) ON DELETE CASCADE,
+        agent_index INTEGER NOT NULL DEFAULT 0,
+        current_room_id INTEGER NOT NULL REFERENCES Rooms(room_id),
+        wait_counter INTEGER NOT NULL,
+        wait_threshold INTEGER NOT NULL
+    )
+'''
+
+GAME_EVENTS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id INTEGER NOT NULL,
+        event_type TEXT NOT NULL,
+        room_id INTEGER,
+        value INTEGER,
+        agent_index INTEGER,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (session_id) REFERENCES Sessions(session_id) ON DELETE CASCADE
+    )
+'''
+
+GAME_SNAPSHOTS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        snapshot_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id INTEGER NOT NULL,
+        last_event_id INTEGER NOT NULL,
+        state TEXT NOT NULL,  -- JSON
+        FOREIGN KEY (session_id) REFERENCES Sessions(session_id) ON DELETE CASCADE
+    )
+'''
+
+
+def _table_columns(cursor, table):
+    """
+    Return the column names of a table, or an empty set if it does not exist.
+
+    Args:
+        cursor (sqlite3.Cursor): The database cursor.
+        table (str): The table name.
+    """
+    cursor.execute(f'PRAGMA table_info({table})')
+    return {row[1] for row in cursor.fetchall()}
+
+
+def _rebuild_table(cursor, table, template, columns, select_sql, params=()):
+    """
+    Recreate a table in its current format and copy the old rows into it.
+
+    Foreign keys must be off, otherwise dropping the old table would cascade.
+
+    Args:
+        cursor (sqlite3.Cursor): The database cursor.
+        table (str): The table name.
+        template (str): CREATE TABLE statement with a {table} placeholder.
+        columns (str): Comma-separated columns filled by select_sql.
+        select_sql (str): SELECT producing the new rows from the old table.
+        params (tuple): Parameters for select_sql.
+    """
+    cursor.execute(f'DROP TABLE IF EXISTS {table}_new')
+    cursor.execute(template.format(table=f'{table}_new'))
+    cursor.execute(f'INSERT INTO {table}_new ({columns}) {select_sql}', params)
+    cursor.execute(f'DROP TABLE {table}')
+    cursor.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+
+
+def _migrate_room_name_keys(conn):
+    """
+    Convert tables that refer to rooms by name to integer room ids and direction codes.
+
+    Databases written by older versions store room names in RoomConnections,
+    Players, Sessions, SessionRooms, Agent and GameEvents, and key GameEvents
+    and GameSnapshots by username instead of session. Each of those is rebuilt
+    once; databases that are already converted are left untouched.
+
+    Args:
+        conn (sqlite3.Connection): The database connection.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    tables = {row[0] for row in cursor.fetchall()}
+    players_columns = _table_columns(cursor, 'Players')
+    sessions_columns = _table_columns(cursor, 'Sessions')
+    session_rooms_columns = _table_columns(cursor, 'SessionRooms')
+    agent_columns = _table_columns(cursor, 'Agent')
+    events_columns = _table_columns(cursor, 'GameEvents')
+    snapshots_columns = _table_columns(cursor, 'GameSnapshots')
+    if not (
+        'RoomConnections' in tables
+        or 'current_room' in players_columns
+        or 'current_room' in sessions_columns
+        or 'room_name' in session_rooms_columns
+        or 'current_room' in agent_columns
+        or 'room' in events_columns
+        or 'username' in events_columns
+        or 'username' in snapshots_columns
+    ):
+        return
+
+    conn.commit()
+    conn.execute('PRAGMA foreign_keys = OFF')
+    try:
+        with conn:
+            if 'RoomConnections' in tables:
+                direction_code = ' '.join(
+                    f"WHEN '{direction}' THEN {code}" for direction, code in DIRECTION_CODES.items()
+                )
+                cursor.execute(f'''
+                    INSERT OR IGNORE INTO RoomLinks (from_room_id, direction, to_room_id)
+                    SELECT f.room_id, CASE c.direction {direction_code} END, t.room_id
+                    FROM RoomConnections c
+                    JOIN Rooms f ON f.name = c.from_room
+                    JOIN Rooms t ON t.name = c.to_room
+                    WHERE c.direction IN ({', '.join('?' * len(DIRECTION_CODES))})
+                ''', tuple(DIRECTION_CODES))
+                cursor.execute('DROP TABLE RoomConnections')
+                cursor.execute('DELETE FROM Layouts')  # Rewrite the links on the next sync
+
+            if 'current_room' in sessions_columns:
+                _rebuild_table(
+                    cursor, 'Sessions', SESSIONS_TABLE,
+                    'session_id, player_id, current_room_id, created_at',
+                    '''SELECT s.session_id, s.player_id, r.room_id, s.created_at
+                       FROM Sessions s JOIN Rooms r ON r.name = s.current_room'''
+                )
+
+            if 'room_name' in session_rooms_columns:
+                _rebuild_table(
+                    cursor, 'SessionRooms', SESSION_ROOMS_TABLE,
+                    'session_id, room_id, is_clean',
+                    '''SELECT s.session_id, r.room_id, s.is_clean
+                       FROM SessionRooms s JOIN Rooms r ON r.name = s.room_name'''
+                )
+
+            if 'current_room' in agent_columns:
+                # The oldest databases have one global agent row without a session
+                session_expr = 'a.session_id' if 'session_id' in agent_columns else 'NULL'
+                index_expr = 'a.agent_index' if 'agent_index' in agent_columns else '0'
+                _rebuild_table(
+                    cursor, 'Agent', AGENT_TABLE,
+                    'agent_id, session_id, agent_index, current_room_id, wait_counter, wait_threshold',
+                    f'''SELECT a.agent_id, {session_expr}, {index_expr}, r.room_id,
+                              a.wait_counter, a.wait_threshold
+                       FROM Agent a JOIN Rooms r ON r.name = a.current_room'''
+                )
+
+            if 'current_room' in players_columns:
+                # Give every player from before sessions existed a session that
+                # carries over their position and the old global room and agent state
+                cursor.execute('SELECT COALESCE(MAX(session_id), 0) FROM Sessions')
+                last_session_id = cursor.fetchone()[0]
+                cursor.execute('''
+                    INSERT INTO Sessions (player_id, current_room_id)
+                    SELECT p.player_id, r.room_id
+                    FROM Players p JOIN Rooms r ON r.name = p.current_room
+                    WHERE p.player_id NOT IN (SELECT player_id FROM Sessions)
+                ''')
+                cursor.execute('''
+                    INSERT INTO SessionRooms (session_id, room_id, is_clean)
+                    SELECT s.session_id, r.room_id, 1
+                    FROM Sessions s, Rooms r
+                    WHERE s.session_id > ? AND r.is_clean = 1
+                ''', (last_session_id,))
+                cursor.execute('''
+                    INSERT INTO Agent (session_id, agent_index, current_room_id, wait_counter, wait_threshold)
+                    SELECT s.session_id, 0, a.current_room_id, a.wait_counter, a.wait_threshold
+                    FROM Sessions s,
+                         (SELECT * FROM Agent WHERE session_id IS NULL ORDER BY agent_id LIMIT 1) a
+                    WHERE s.session_id > ?
+                ''', (last_session_id,))
+                cursor.execute('DELETE FROM Agent WHERE session_id IS NULL')
+                _rebuild_table(
+                    cursor, 'Players', PLAYERS_TABLE,
+                    'player_id, username, password',
+                    'SELECT player_id, username, password FROM Players'
+                )
+
+            # Journals from before sessions are keyed by username; every player
+            # has a session by now, so their events and snapshots move to it
+            if 'username' in events_columns or 'room' in events_columns:
+                if 'username' in events_columns:
+                    session_expr = 's.session_id'
+                    session_join = '''JOIN Players p ON p.username = e.username
+                                     JOIN Sessions s ON s.player_id = p.player_id'''
+                else:
+                    session_expr = 'e.session_id'
+                    session_join = ''
+                if 'room' in events_columns:
+                    room_expr = 'r.room_id'
+                    room_join = 'LEFT JOIN Rooms r ON r.name = e.room'
+                else:
+                    room_expr = 'e.room_id'
+                    room_join = ''
+                agent_expr = 'e.agent_index' if 'agent_index' in events_columns else 'NULL'
+                _rebuild_table(
+                    cursor, 'GameEvents', GAME_EVENTS_TABLE,
+                    'event_id, session_id, event_type, room_id, value, agent_index, timestamp',
+                    f'''SELECT e.event_id, {session_expr}, e.event_type, {room_expr}, e.value,
+                              {agent_expr}, e.timestamp
+                       FROM GameEvents e {session_join} {room_join}'''
+                )
+
+            if 'username' in snapshots_columns:
+                _rebuild_table(
+                    cursor, 'GameSnapshots', GAME_SNAPSHOTS_TABLE,
+                    'snapshot_id, session_id, last_event_id, state',
+                    '''SELECT g.snapshot_id, s.session_id, g.last_event_id, g.state
+                       FROM GameSnapshots g
+                       JOIN Players p ON p.username = g.username
+                       JOIN Sessions s ON s.player_id = p.player_id'''
+                )
+    finally:
+        conn.execute('PRAGMA foreign_keys = ON')
+
+
 def initialize_database():
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection()
     cursor = conn.cursor()
 
     # Create Players table
-    cursor.execute('''
-            CREATE TABLE IF NOT EXISTS Players (
-                player_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                current_room TEXT NOT NULL
-            )
-        ''')
+    cursor.execute(PLAYERS_TABLE.format(table='Players'))
 
     # Create Rooms table
     cursor.execute('''
@@ -30,28 +462,42 @@ def initialize_database():
         )
     ''')
 
-    # Create Agent table
+    # Create Layouts table (checksum of the layout file last written to Rooms)
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS Agent (
-            agent_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            current_room TEXT NOT NULL,
-            wait_counter INTEGER NOT NULL,
-            wait_threshold INTEGER NOT NULL
-        )
-    ''')
+            CREATE TABLE IF NOT EXISTS Layouts (
+                name TEXT PRIMARY KEY,
+                checksum TEXT NOT NULL
+            )
+        ''')
 
-    # Create RoomConnections table
+    # Create RoomLinks table (room graph keyed by room id and direction code, with traversal costs)
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS RoomConnections (
-            from_room TEXT NOT NULL,
-            direction TEXT NOT NULL,
-            to_room TEXT NOT NULL,
-            PRIMARY KEY (from_room, direction),
-            FOREIGN KEY (from_room) REFERENCES Rooms(name),
-            FOREIGN KEY (to_room) REFERENCES Rooms(name)
-        )
+        CREATE TABLE IF NOT EXISTS RoomLinks (
+            from_room_id INTEGER NOT NULL,
+            direction INTEGER NOT NULL,
+            to_room_id INTEGER NOT NULL,
+            cost REAL NOT NULL DEFAULT 1,
+            PRIMARY KEY (from_room_id, direction),
+            FOREIGN KEY (from_room_id) REFERENCES Rooms(room_id),
+            FOREIGN KEY (to_room_id) REFERENCES Rooms(room_id)
+        ) WITHOUT ROWID
     ''')
 
+    # Create Sessions table (one saved game per player)
+    cursor.execute(SESSIONS_TABLE.format(table='Sessions'))
+
+    # Create SessionRooms table (per-session room cleanliness, clustered by session)
+    cursor.execute(SESSION_ROOMS_TABLE.format(table='SessionRooms'))
+
+    # Create Agent table
+    cursor.execute(AGENT_TABLE.format(table='Agent'))
+
+    # Create GameEvents table (append-only journal of game events)
+    cursor.execute(GAME_EVENTS_TABLE.format(table='GameEvents'))
+
+    # Create GameSnapshots table (full game state every SNAPSHOT_INTERVAL events)
+    cursor.execute(GAME_SNAPSHOTS_TABLE.format(table='GameSnapshots'))
+
     # Create GameResults table
     cursor.execute('''
             CREATE TABLE IF NOT EXISTS GameResults (
@@ -64,9 +510,136 @@ def initialize_database():
             )
         ''')
 
+    # Create Leaderboard table (the fastest LEADERBOARD_SIZE wins, kept up to date by a trigger)
+    cursor.execute('''
+            CREATE TABLE IF NOT EXISTS Leaderboard (
+                result_id INTEGER PRIMARY KEY,
+                username TEXT NOT NULL,
+                time_taken INTEGER,
+                rooms_cleaned INTEGER,
+                timestamp DATETIME,
+                FOREIGN KEY (result_id) REFERENCES GameResults(result_id)
+            )
+        ''')
+    conn.commit()
+
+    # Convert databases from older versions before indexing the converted tables
+    _migrate_room_name_keys(conn)
+
+    # Agent events name their agent now that a session can have several agents
+    if 'agent_index' not in _table_columns(cursor, 'GameEvents'):
+        cursor.execute('ALTER TABLE GameEvents ADD COLUMN agent_index INTEGER')
+        conn.commit()
+
+    # Connections have traversal costs; links stored before that cost 1
+    if 'cost' not in _table_columns(cursor, 'RoomLinks'):
+        cursor.execute('ALTER TABLE RoomLinks ADD COLUMN cost REAL NOT NULL DEFAULT 1')
+        conn.commit()
+
+    cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_agent_session
+            ON Agent (session_id, agent_index)
+        ''')
+    cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_gameevents_session
+            ON GameEvents (session_id, event_id)
+        ''')
+    cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_gamesnapshots_session
+            ON GameSnapshots (session_id, snapshot_id)
+        ''')
+
+    # Covering index for leaderboard queries: filter on result, order by time_taken
+    cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_gameresults_result_time
+            ON GameResults (result, time_taken, result_id, username, rooms_cleaned, timestamp)
+        ''')
+    # Per-player history, used by export_results --username
+    cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_gameresults_username
+            ON GameResults (username, result_id)
+        ''')
+    cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_leaderboard_time
+            ON Leaderboard (time_taken, result_id)
+        ''')
+
+    # Recreate the trigger so a changed LEADERBOARD_SIZE takes effect
+    cursor.execute('DROP TRIGGER IF EXISTS trg_gameresults_leaderboard')
+    cursor.execute(f'''
+            CREATE TRIGGER trg_gameresults_leaderboard
+            AFTER INSERT ON GameResults
+            WHEN NEW.result = 'win'
+            BEGIN
+                INSERT INTO Leaderboard (result_id, username, time_taken, rooms_cleaned, timestamp)
+                VALUES (NEW.result_id, NEW.username, NEW.time_taken, NEW.rooms_cleaned, NEW.timestamp);
+                DELETE FROM Leaderboard WHERE result_id NOT IN (
+                    SELECT result_id FROM Leaderboard
+                    ORDER BY time_taken ASC, result_id ASC
+                    LIMIT {int(LEADERBOARD_SIZE)}
+                );
+            END
+        ''')
+
+    # Refill the leaderboard when it does not hold the fastest LEADERBOARD_SIZE wins: results
+    # recorded before it existed, a changed LEADERBOARD_SIZE or rows lost some other way
+    cursor.execute('SELECT COUNT(*) FROM Leaderboard')
+    kept = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM GameResults WHERE result = 'win'")
+    if kept != min(LEADERBOARD_SIZE, cursor.fetchone()[0]):
+        cursor.execute('DELETE FROM Leaderboard')
+        cursor.execute('''
+            INSERT INTO Leaderboard (result_id, username, time_taken, rooms_cleaned, timestamp)
+            SELECT result_id, username, time_taken, rooms_cleaned, timestamp
+            FROM GameResults
+            WHERE result = 'win'
+            ORDER BY time_taken ASC, result_id ASC
+            LIMIT ?
+        ''', (LEADERBOARD_SIZE,))
+
     conn.commit()
-    conn.close()
 
 
 def get_connection():
-    return sqlite3.connect(DB_NAME)
\ No newline at end of file
+    """
+    Returns the calling thread's long-lived read-write connection.
+    """
+    return _manager.get_connection()
+
+
+def get_cursor():
+    """
+    Returns the calling thread's cached cursor.
+    """
+    return _manager.get_cursor()
+
+
+def get_read_connection():
+    """
+    Returns the calling thread's read-only connection for leaderboard and analytics queries.
+    """
+    return _manager.get_read_connection()
+
+
+def is_in_memory():
+    """
+    Returns True if the live game database is held in memory.
+    """
+    return _manager.in_memory
+
+
+def backup_database():
+    """
+    Writes the in-memory database to the database file. Does nothing for a file database.
+
+    Returns:
+        bool: True if a backup was written.
+    """
+    return _manager.backup()
+
+
+def close_connection():
+    """
+    Closes the calling thread's connections.
+    """
+    _manager.close()
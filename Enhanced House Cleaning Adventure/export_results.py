@@ -0,0 +1,233 @@
+# export_results.py
+
+"""
+Exports game history from the GameResults table for analysis.
+
+Rows are streamed from a read-only connection in batches with fetchmany, so
+memory use stays constant however large the table is, and a running game can
+keep writing while the export reads (the database runs in WAL mode).
+
+CSV is always available. Parquet output needs the optional pyarrow package.
+
+Usage:
+    python export_results.py OUTPUT [--format csv|parquet] [--username NAME]
+                             [--result win|lose] [--since TIME] [--until TIME]
+                             [--db PATH] [--batch-size N]
+
+    OUTPUT may be '-' to write CSV to standard output. TIME is an SQLite
+    timestamp such as '2024-06-01' or '2024-06-01 18:30:00' (UTC).
+"""
+
+import argparse
+import csv
+import sqlite3
+import sys
+from typing import Iterator, List, Optional, Tuple
+from database import ConnectionManager, DB_NAME
+
+COLUMNS = ['result_id', 'username', 'time_taken', 'rooms_cleaned', 'result', 'timestamp']
+
+EXPORT_BATCH_SIZE = 1000  # Rows fetched from SQLite per round trip
+
+
+def build_query(
+    username: Optional[str] = None,
+    result: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+) -> Tuple[str, tuple]:
+    """
+    Builds the SELECT for the requested filters.
+
+    Args:
+        username (Optional[str]): Only export this player's games.
+        result (Optional[str]): Only export 'win' or 'lose' results.
+        since (Optional[str]): Only export games recorded at or after this time.
+        until (Optional[str]): Only export games recorded before this time.
+
+    Returns:
+        tuple: The SQL statement and its parameters.
+    """
+    conditions = []
+    params = []
+    if username is not None:
+        conditions.append('username = ?')
+        params.append(username)
+    if result is not None:
+        conditions.append('result = ?')
+        params.append(result)
+    if since is not None:
+        conditions.append('timestamp >= ?')
+        params.append(since)
+    if until is not None:
+        conditions.append('timestamp < ?')
+        params.append(until)
+
+    sql = f'SELECT {", ".join(COLUMNS)} FROM GameResults'
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    # result_id order walks the table in insertion order without a sort step
+    sql += ' ORDER BY result_id'
+    return sql, tuple(params)
+
+
+def iter_batches(conn: sqlite3.Connection, sql: str, params: tuple, batch_size: int) -> Iterator[List[tuple]]:
+    """
+    Yields the query's rows in batches of at most batch_size.
+
+    Args:
+        conn (sqlite3.Connection): The database connection.
+        sql (str): The SELECT statement.
+        params (tuple): Its parameters.
+        batch_size (int): Rows per batch.
+
+    Yields:
+        List[tuple]: The next batch of rows.
+    """
+    cursor = conn.cursor()
+    cursor.arraysize = batch_size
+    cursor.execute(sql, params)
+    try:
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+
+def write_csv(batches: Iterator[List[tuple]], output: str) -> int:
+    """
+    Writes the batches to a CSV file with a header row.
+
+    Args:
+        batches (Iterator[List[tuple]]): Batches of GameResults rows.
+        output (str): Output path, or '-' for standard output.
+
+    Returns:
+        int: The number of rows written.
+    """
+    f = sys.stdout if output == '-' else open(output, 'w', newline='', encoding='utf-8')
+    try:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        count = 0
+        for rows in batches:
+            writer.writerows(rows)
+            count += len(rows)
+        return count
+    finally:
+        if f is not sys.stdout:
+            f.close()
+
+
+def write_parquet(batches: Iterator[List[tuple]], output: str) -> int:
+    """
+    Writes the batches to a Parquet file, one row group per batch.
+
+    Args:
+        batches (Iterator[List[tuple]]): Batches of GameResults rows.
+        output (str): Output path.
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow); use --format csv instead.")
+
+    schema = pa.schema([
+        ('result_id', pa.int64()),
+        ('username', pa.string()),
+        ('time_taken', pa.int64()),
+        ('rooms_cleaned', pa.int64()),
+        ('result', pa.string()),
+        ('timestamp', pa.string()),
+    ])
+    count = 0
+    with pq.ParquetWriter(output, schema) as writer:
+        for rows in batches:
+            columns = [list(column) for column in zip(*rows)]
+            writer.write_batch(pa.record_batch(columns, schema=schema))
+            count += len(rows)
+    return count
+
+
+def export_results(
+    conn: sqlite3.Connection,
+    output: str,
+    fmt: str = 'csv',
+    username: Optional[str] = None,
+    result: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> int:
+    """
+    Streams the matching GameResults rows to a CSV or Parquet file.
+
+    Args:
+        conn (sqlite3.Connection): The database connection, ideally read-only.
+        output (str): Output path, or '-' for CSV on standard output.
+        fmt (str): 'csv' or 'parquet'.
+        username (Optional[str]): Only export this player's games.
+        result (Optional[str]): Only export 'win' or 'lose' results.
+        since (Optional[str]): Only export games recorded at or after this time.
+        until (Optional[str]): Only export games recorded before this time.
+        batch_size (int): Rows fetched per round trip.
+
+    Returns:
+        int: The number of rows exported.
+    """
+    sql, params = build_query(username, result, since, until)
+    batches = iter_batches(conn, sql, params, batch_size)
+    if fmt == 'parquet':
+        return write_parquet(batches, output)
+    return write_csv(batches, output)
+
+
+def main() -> None:
+    """
+    Parses the command line and runs the export.
+    """
+    parser = argparse.ArgumentParser(description="Export game results for analysis.")
+    parser.add_argument('output', help="Output file, or '-' for CSV on standard output.")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help="Output format.")
+    parser.add_argument('--username', help="Only export this player's games.")
+    parser.add_argument('--result', choices=['win', 'lose'], help="Only export wins or losses.")
+    parser.add_argument('--since', help="Only export games recorded at or after this time.")
+    parser.add_argument('--until', help="Only export games recorded before this time.")
+    parser.add_argument('--db', default=DB_NAME, help="Path of the game database.")
+    parser.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE, help="Rows fetched per round trip.")
+    args = parser.parse_args()
+
+    if args.format == 'parquet' and args.output == '-':
+        parser.error("Parquet output needs a file name.")
+
+    # Read the database file directly, even when the game keeps its live copy in memory
+    manager = ConnectionManager(args.db)
+    try:
+        conn = manager.get_read_connection()
+        count = export_results(
+            conn, args.output, args.format,
+            username=args.username, result=args.result,
+            since=args.since, until=args.until,
+            batch_size=args.batch_size
+        )
+    except (sqlite3.Error, RuntimeError) as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        manager.close()
+
+    print(f"Exported {count} results.", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+# flow_field.py
+
+"""
+Shared distance field that steers any number of agents towards their targets.
+Pure Python; does not need pygame.
+
+A single multi-source breadth-first search runs backwards from every target at
+once over the reversed connections (Dijkstra's algorithm when connections have
+different costs). It records, for every room, the cost of reaching the nearest
+target and which neighbour is one step closer. Any agent
+in any room then finds its next step with one array lookup, so the cost of
+pathfinding per tick does not grow with the number of agents. The field is
+only rebuilt when the set of targets changes.
+"""
+
+import heapq
+from array import array
+from collections import deque
+from typing import FrozenSet, Iterable, List, Optional
+from compiled_graph import CompiledGraph, ID_TYPE
+
+
+class FlowField:
+    """
+    Cost-to-nearest-target and next-step arrays over a compiled house graph.
+
+    Attributes:
+        graph (CompiledGraph): The compiled house graph.
+        targets (FrozenSet[str]): Names of the rooms the field leads to.
+        distance (array): Cost from every room to the nearest target (the number of moves when every
+            connection costs 1), or -1 if none can be reached.
+        next_room (array): Id of the neighbour one step closer to the nearest target, or -1
+            in target rooms and rooms that cannot reach one.
+        builds (int): How many times the field has been built.
+    """
+
+    def __init__(self, graph: CompiledGraph) -> None:
+        """
+        Initializes an empty field; nothing is reachable until update() is given targets.
+
+        Args:
+            graph (CompiledGraph): The compiled house graph.
+        """
+        self.graph: CompiledGraph = graph
+        self.targets: FrozenSet[str] = frozenset()
+        self.distance: array = array('d', [-1.0]) * len(graph)
+        self.next_room: array = array(ID_TYPE, [-1]) * len(graph)
+        self.builds: int = 0
+        self._reverse: CompiledGraph = graph.reverse
+
+    def update(self, targets: Iterable[str]) -> bool:
+        """
+        Rebuilds the field if the targets changed since it was last built.
+
+        Args:
+            targets (Iterable[str]): Names of the rooms to lead to.
+
+        Returns:
+            bool: True if the field was rebuilt.
+        """
+        targets = frozenset(targets)
+        if targets == self.targets and self.builds:
+            return False
+        self.targets = targets
+        self._build()
+        return True
+
+    def _build(self) -> None:
+        """
+        Runs the multi-source search from every target.
+        """
+        n = len(self.graph)
+        distance = array('d', [-1.0]) * n
+        next_room = array(ID_TYPE, [-1]) * n
+        # In id order, so ties between equally near targets do not depend on the string hash seed
+        targets = sorted(self.graph.index[name] for name in self.targets if name in self.graph.index)
+        for target in targets:
+            distance[target] = 0.0
+        if self.graph.weighted:
+            self._dijkstra(targets, distance, next_room)
+        else:
+            self._bfs(targets, distance, next_room)
+
+        self.distance = distance
+        self.next_room = next_room
+        self.builds += 1
+
+    def _bfs(self, targets: List[int], distance: array, next_room: array) -> None:
+        """
+        Fills in the field by breadth-first search, for graphs where every connection costs 1.
+
+        Args:
+            targets (List[int]): Ids of the target rooms, already at distance 0.
+            distance (array): Cost to the nearest target, filled in place.
+            next_room (array): Next step towards it, filled in place.
+        """
+        offsets, sources = self._reverse.offsets, self._reverse.neighbors
+        queue = deque(targets)
+        while queue:
+            current = queue.popleft()
+            moves = distance[current] + 1
+            # Each source has a connection into current, so it is one move from it
+            for source in sources[offsets[current]:offsets[current + 1]]:
+                if distance[source] < 0:
+                    distance[source] = moves
+                    next_room[source] = current
+                    queue.append(source)
+
+    def _dijkstra(self, targets: List[int], distance: array, next_room: array) -> None:
+        """
+        Fills in the field by Dijkstra's algorithm, for graphs whose connections have different costs.
+
+        Args:
+            targets (List[int]): Ids of the target rooms, already at distance 0.
+            distance (array): Cost to the nearest target, filled in place.
+            next_room (array): Next step towards it, filled in place.
+        """
+        offsets, sources, weights = self._reverse.offsets, self._reverse.neighbors, self._reverse.weights
+        closed = bytearray(len(distance))
+        queue = [(0.0, target) for target in targets]
+        heapq.heapify(queue)
+        while queue:
+            current_cost, current = heapq.heappop(queue)
+            if closed[current]:
+                continue
+            closed[current] = 1
+            for k in range(offsets[current], offsets[current + 1]):
+                source = sources[k]
+                new_cost = current_cost + weights[k]
+                if not closed[source] and (distance[source] < 0 or new_cost < distance[source]):
+                    distance[source] = new_cost
+                    next_room[source] = current
+                    heapq.heappush(queue, (new_cost, source))
+
+    def next_hop(self, room_name: str) -> Optional[str]:
+        """
+        Returns the neighbouring room one move closer to the nearest target.
+
+        Args:
+            room_name (str): The current room name.
+
+        Returns:
+            Optional[str]: The room to move to, or None in a target room or where no target can be reached.
+        """
+        room_id = self.graph.index.get(room_name)
+        if room_id is None or self.next_room[room_id] < 0:
+            return None
+        return self.graph.names[self.next_room[room_id]]
+
+    def cost_to_target(self, room_name: str) -> Optional[float]:
+        """
+        Returns the cost of reaching the nearest target from a room.
+
+        Args:
+            room_name (str): The room name.
+
+        Returns:
+            Optional[float]: The cost (the number of moves when every connection costs 1),
+                or None if no target can be reached.
+        """
+        room_id = self.graph.index.get(room_name)
+        if room_id is None or self.distance[room_id] < 0:
+            return None
+        return self.distance[room_id]
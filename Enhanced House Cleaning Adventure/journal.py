@@ -0,0 +1,323 @@
+# journal.py
+
+"""
+Append-only journal of game events with periodic snapshots.
+
+Events are recorded per game session. Every state change (player move, clean, agent move, agent dirty, agent wait,
+win/lose) is appended to the GameEvents table instead of rewriting rows. Every
+snapshot_interval events a compact JSON snapshot of the whole game state is
+written to GameSnapshots. On startup the latest snapshot plus the events that
+follow it rebuild the exact state of an interrupted game.
+
+The journal only has to cover what the last write-behind save may have missed,
+so writing a snapshot also deletes the session's events it covers and its
+older snapshots. Each session's journal therefore never holds more than one
+snapshot and about snapshot_interval events.
+"""
+
+import json
+from typing import Dict, List, Optional, Tuple
+from constants import SNAPSHOT_INTERVAL
+from room import Room
+
+# Event types stored in GameEvents.event_type
+EVENT_MOVE = 'move'                 # room_id: room the player moved into
+EVENT_CLEAN = 'clean'               # room_id: room the player cleaned
+EVENT_AGENT_MOVE = 'agent_move'     # room_id: room the agent moved into
+EVENT_AGENT_DIRTY = 'agent_dirty'   # room_id: room the agent dirtied
+EVENT_AGENT_WAIT = 'agent_wait'     # value: the agent's new wait counter
+# Agent events also store the agent's agent_index (NULL in older journals means the first agent)
+EVENT_WIN = 'win'                   # value: time taken in seconds
+EVENT_LOSE = 'lose'                 # value: time taken in seconds
+
+INSERT_EVENT_SQL = '''
+    INSERT INTO GameEvents (session_id, event_type, room_id, value, agent_index)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+# The snapshot covers every event already appended for the session, so it is
+# correct even when it is applied later by the background writer
+INSERT_SNAPSHOT_SQL = '''
+    INSERT INTO GameSnapshots (session_id, last_event_id, state)
+    VALUES (?, (SELECT COALESCE(MAX(event_id), 0) FROM GameEvents WHERE session_id = ?), ?)
+'''
+
+# Run right after INSERT_SNAPSHOT_SQL, in the same transaction: restore never
+# reads events the latest snapshot covers, or any snapshot but the latest.
+# Event ids are AUTOINCREMENT, so later events never reuse a deleted id.
+TRIM_EVENTS_SQL = '''
+    DELETE FROM GameEvents
+    WHERE session_id = ?
+    AND event_id <= (SELECT MAX(last_event_id) FROM GameSnapshots WHERE session_id = ?)
+'''
+TRIM_SNAPSHOTS_SQL = '''
+    DELETE FROM GameSnapshots
+    WHERE session_id = ?
+    AND snapshot_id < (SELECT MAX(snapshot_id) FROM GameSnapshots WHERE session_id = ?)
+'''
+
+
+def capture_state(player, agents, rooms: Dict[str, Room]) -> dict:
+    """
+    Captures the game state in the form stored in a snapshot.
+
+    Args:
+        player (Player): The player object.
+        agents (Iterable[Agent]): The session's agents, in roster order.
+        rooms (RoomRegistry): All rooms, with their cleanliness index.
+
+    Returns:
+        dict: The game state.
+    """
+    return {
+        'player_room': player.current_room.name,
+        'agents': [
+            {
+                'room': agent.current_room.name,
+                'wait_counter': agent.wait_counter,
+                'wait_threshold': agent.wait_threshold,
+            }
+            for agent in agents
+        ],
+        'clean_rooms': [room.name for room in rooms.clean_rooms()],
+    }
+
+
+def snapshot_records(session_id: int, state: dict) -> List[Tuple[str, tuple]]:
+    """
+    Builds the statements that store a snapshot of the given state and trim
+    the journal entries it replaces. Run them in order, in one transaction.
+
+    Args:
+        session_id (int): The game session id.
+        state (dict): The game state, as returned by capture_state.
+
+    Returns:
+        List[Tuple[str, tuple]]: The SQL statements and their parameters.
+    """
+    return [
+        (INSERT_SNAPSHOT_SQL, (session_id, session_id, json.dumps(state, separators=(',', ':')))),
+        (TRIM_EVENTS_SQL, (session_id, session_id)),
+        (TRIM_SNAPSHOTS_SQL, (session_id, session_id)),
+    ]
+
+
+class GameJournal:
+    """
+    Records game events for one game session and restores state from them.
+
+    Attributes:
+        conn (sqlite3.Connection): The database connection used for reads and
+            for writes when there is no background writer.
+        session_id (int): The game session id.
+        writer (Optional[DatabaseWriter]): Background writer the appends are handed to.
+        snapshot_interval (int): Number of events between snapshots.
+        events_since_snapshot (int): Events appended since the last snapshot.
+    """
+
+    def __init__(self, conn, session_id: int, writer=None, snapshot_interval: int = SNAPSHOT_INTERVAL) -> None:
+        """
+        Initializes the journal for a game session.
+
+        Args:
+            conn (sqlite3.Connection): The database connection.
+            session_id (int): The game session id.
+            writer (Optional[DatabaseWriter]): Background writer to hand appends to.
+            snapshot_interval (int): Number of events between snapshots.
+        """
+        self.conn = conn
+        self.session_id: int = session_id
+        self.writer = writer
+        self.snapshot_interval: int = snapshot_interval
+        self.events_since_snapshot: int = 0
+        self.player = None
+        self.agents: List = []
+        self.rooms: Dict[str, Room] = {}
+        self.rooms_by_id: Dict[int, Room] = {}
+
+    def attach(self, player, agents, rooms: Dict[str, Room]) -> None:
+        """
+        Connects the journal to the game objects whose events it records.
+
+        Args:
+            player (Player): The player object.
+            agents (Iterable[Agent]): The session's agents, in roster order.
+            rooms (Dict[str, Room]): Dictionary of all rooms.
+        """
+        self.player = player
+        self.agents = list(agents)
+        self.rooms = rooms
+        self.rooms_by_id = {room.room_id: room for room in rooms.values()}
+        player.journal = self
+        for agent in self.agents:
+            agent.journal = self
+
+    def _write(self, records: List[Tuple[str, tuple]]) -> None:
+        """
+        Writes records through the background writer, or directly on conn.
+
+        Args:
+            records (List[Tuple[str, tuple]]): SQL statements and their parameters.
+        """
+        if self.writer is not None:
+            self.writer.submit(records)
+        else:
+            with self.conn:
+                for sql, params in records:
+                    self.conn.execute(sql, params)
+
+    def record(
+        self,
+        event_type: str,
+        room: Optional[Room] = None,
+        value: Optional[int] = None,
+        agent_index: Optional[int] = None
+    ) -> None:
+        """
+        Appends an event, and a snapshot once snapshot_interval events have accumulated.
+
+        Args:
+            event_type (str): One of the EVENT_* constants.
+            room (Optional[Room]): The room the event happened in.
+            value (Optional[int]): The event's numeric payload.
+            agent_index (Optional[int]): The agent an agent event belongs to.
+        """
+        room_id = room.room_id if room is not None else None
+        records = [(INSERT_EVENT_SQL, (self.session_id, event_type, room_id, value, agent_index))]
+        self.events_since_snapshot += 1
+        if self.events_since_snapshot >= self.snapshot_interval and self.player is not None:
+            records.extend(snapshot_records(self.session_id, capture_state(self.player, self.agents, self.rooms)))
+            self.events_since_snapshot = 0
+        self._write(records)
+
+    def snapshot(self) -> None:
+        """
+        Writes a snapshot of the attached game state immediately.
+        """
+        self._write(snapshot_records(self.session_id, capture_state(self.player, self.agents, self.rooms)))
+        self.events_since_snapshot = 0
+
+    def restore(self) -> int:
+        """
+        Rebuilds the attached game state from the latest snapshot and the events after it.
+
+        Restored objects are flagged for saving so the row tables catch up.
+
+        Returns:
+            int: The number of events replayed on top of the snapshot.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            SELECT last_event_id, state FROM GameSnapshots
+            WHERE session_id = ?
+            ORDER BY snapshot_id DESC
+            LIMIT 1
+        ''', (self.session_id,))
+        row = cursor.fetchone()
+        last_event_id = 0
+        if row:
+            last_event_id, state_json = row
+            self._apply_snapshot(json.loads(state_json))
+
+        cursor.execute('''
+            SELECT event_type, room_id, value, agent_index FROM GameEvents
+            WHERE session_id = ? AND event_id > ?
+            ORDER BY event_id
+        ''', (self.session_id, last_event_id))
+        replayed = 0
+        for event_type, room_id, value, agent_index in cursor:
+            self._apply_event(event_type, room_id, value, agent_index)
+            replayed += 1
+        self.events_since_snapshot = replayed
+        return replayed
+
+    def _apply_snapshot(self, state: dict) -> None:
+        """
+        Applies a snapshot to the attached game objects.
+
+        Args:
+            state (dict): The game state, as returned by capture_state.
+        """
+        clean_rooms = set(state['clean_rooms'])
+        for room in self.rooms.values():
+            is_clean = room.name in clean_rooms
+            if room.is_clean != is_clean:
+                room.is_clean = is_clean
+                room.needs_save = True
+        self._set_player_room(state['player_room'])
+        agent_states = state.get('agents')
+        if agent_states is None:
+            # Snapshots from before sessions had several agents describe only the first
+            agent_states = [{
+                'room': state['agent_room'],
+                'wait_counter': state['wait_counter'],
+                'wait_threshold': state['wait_threshold'],
+            }]
+        for agent, agent_state in zip(self.agents, agent_states):
+            self._set_agent_room(agent, agent_state['room'])
+            agent.wait_counter = agent_state['wait_counter']
+            agent.wait_threshold = agent_state['wait_threshold']
+            agent.needs_save = True
+
+    def _apply_event(
+        self,
+        event_type: str,
+        room_id: Optional[int],
+        value: Optional[int],
+        agent_index: Optional[int] = None
+    ) -> None:
+        """
+        Applies one journaled event to the attached game objects.
+
+        Args:
+            event_type (str): One of the EVENT_* constants.
+            room_id (Optional[int]): The id of the room the event happened in.
+            value (Optional[int]): The event's numeric payload.
+            agent_index (Optional[int]): The agent an agent event belongs to; None means the first.
+        """
+        room_name = None
+        if room_id is not None:
+            if room_id not in self.rooms_by_id:
+                return  # The room no longer exists in this house
+            room_name = self.rooms_by_id[room_id].name
+        if event_type == EVENT_MOVE:
+            self._set_player_room(room_name)
+        elif event_type == EVENT_CLEAN:
+            self.rooms[room_name].is_clean = True
+            self.rooms[room_name].needs_save = True
+        elif event_type == EVENT_AGENT_MOVE:
+            agent = self._agent(agent_index)
+            if agent is not None:
+                self._set_agent_room(agent, room_name)
+        elif event_type == EVENT_AGENT_DIRTY:
+            self.rooms[room_name].is_clean = False
+            self.rooms[room_name].needs_save = True
+        elif event_type == EVENT_AGENT_WAIT:
+            agent = self._agent(agent_index)
+            if agent is not None:
+                agent.wait_counter = value
+                agent.needs_save = True
+        # Win and lose events are followed by a reset snapshot, so they change nothing here
+
+    def _set_player_room(self, room_name: str) -> None:
+        """
+        Moves the player to the named room without journaling the move.
+        """
+        if room_name in self.rooms and self.player.current_room.name != room_name:
+            self.player.current_room = self.rooms[room_name]
+            self.player.needs_save = True
+
+    def _agent(self, agent_index: Optional[int]):
+        """
+        Returns the attached agent with the given index, or None if the session has no such agent.
+        """
+        agent_index = agent_index or 0
+        return self.agents[agent_index] if agent_index < len(self.agents) else None
+
+    def _set_agent_room(self, agent, room_name: str) -> None:
+        """
+        Moves an agent to the named room without journaling the move.
+        """
+        if room_name in self.rooms and agent.current_room.name != room_name:
+            agent.current_room = self.rooms[room_name]
+            agent.needs_save = True
@@ -0,0 +1,400 @@
+# layout.py
+
+"""
+Loads house layouts from data files.
+
+A layout file (JSON or TOML) lists the rooms with their coordinates and the
+connections between them, as [from_room, direction, to_room] or, for stairs,
+long hallways and other slow connections, [from_room, direction, to_room, cost];
+a connection without a cost costs 1. Parsed layouts are compiled into a binary
+cache next to the source file: a JSON header with the rooms and connections,
+followed by the raw arrays of the all-pairs next-hop table used to route the
+agents and of the ALT landmarks, so later launches skip the shortest-path
+precomputation entirely. The cache holds plain data only, never pickles, so a
+tampered cache file cannot run code. The layout is written to the database in
+one transaction with executemany, and only when it changed. TOML layouts need
+Python 3.11 or later (for tomllib); JSON layouts work everywhere.
+"""
+
+import hashlib
+import json
+import math
+import os
+import sys
+from array import array
+from typing import Dict, List, Optional, Tuple
+from constants import LAYOUT_CACHE_DIR, DIRECTION_CODES, NEXT_HOP_MAX_ROOMS, ALT_MIN_ROOMS, LANDMARK_COUNT
+from room import Room, RoomRegistry
+from compiled_graph import CompiledGraph, ID_TYPE
+from pathfinding import HouseGraph, Landmarks, NextHopTable
+from session import START_ROOM, GOAL_ROOM, AGENT_ROSTER
+
+# Bump when the compiled cache format changes so stale caches are rebuilt
+CACHE_FORMAT_VERSION = 5
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Rooms the game refers to by name: where the player and the agents start, and the goal
+GAME_ROOMS = frozenset({START_ROOM, GOAL_ROOM, *(start_room for _, start_room, _ in AGENT_ROSTER)})
+
+
+class Layout:
+    """
+    A compiled house layout.
+
+    Attributes:
+        name (str): The layout name.
+        checksum (str): SHA-256 of the source file, used to detect layout changes.
+        rooms (List[Tuple[str, int, int]]): Room names and coordinates.
+        connections (List[Tuple[str, str, str, float]]): (from_room, direction, to_room, cost) tuples.
+        adjacency (Dict[str, List[str]]): Neighbouring room names for every room.
+        costs (Dict[Tuple[str, str], float]): Cost of every (from_room, to_room) connection that does not cost 1.
+        compiled (CompiledGraph): The adjacency and costs as CSR arrays over dense room ids.
+        next_hops (Optional[NextHopTable]): First room on a cheapest path between every pair
+            of rooms, or None for layouts with more than NEXT_HOP_MAX_ROOMS rooms.
+        landmarks (Optional[Landmarks]): Costs to and from the layout's landmark rooms, for ALT
+            searches, or None for layouts with fewer than ALT_MIN_ROOMS rooms.
+        room_ids (Dict[str, int]): Room ids in the database, filled in by sync_layout.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        checksum: str,
+        rooms: List[Tuple[str, int, int]],
+        connections: List[Tuple[str, str, str, float]],
+        build_tables: bool = True
+    ) -> None:
+        """
+        Initializes the layout and builds its adjacency lists, compiled graph, next-hop table and landmarks.
+
+        Args:
+            name (str): The layout name.
+            checksum (str): SHA-256 of the source file.
+            rooms (List[Tuple[str, int, int]]): Room names and coordinates.
+            connections (List[Tuple[str, str, str, float]]): (from_room, direction, to_room, cost) tuples.
+            build_tables (bool): Build the next-hop table and landmarks; False when they are read from the cache.
+        """
+        self.name: str = name
+        self.checksum: str = checksum
+        self.rooms: List[Tuple[str, int, int]] = rooms
+        self.connections: List[Tuple[str, str, str, float]] = connections
+        self.adjacency: Dict[str, List[str]] = {room_name: [] for room_name, _, _ in rooms}
+        cheapest: Dict[Tuple[str, str], float] = {}
+        for from_room, _, to_room, cost in connections:
+            self.adjacency[from_room].append(to_room)
+            # Two doors between the same rooms: routes take the cheaper one
+            cheapest[(from_room, to_room)] = min(cost, cheapest.get((from_room, to_room), cost))
+        self.costs: Dict[Tuple[str, str], float] = {pair: cost for pair, cost in cheapest.items() if cost != 1}
+        coordinates = {room_name: (x, y) for room_name, x, y in rooms}
+        self.compiled: CompiledGraph = CompiledGraph.from_adjacency(self.adjacency, coordinates, costs=self.costs)
+        self.next_hops: Optional[NextHopTable] = None
+        if build_tables and len(rooms) <= NEXT_HOP_MAX_ROOMS:
+            self.next_hops = NextHopTable(self.compiled)
+        self.landmarks: Optional[Landmarks] = None
+        if build_tables and len(rooms) >= ALT_MIN_ROOMS:
+            self.landmarks = Landmarks(self.compiled)
+        self.room_ids: Dict[str, int] = {}
+
+    def build_rooms(self) -> RoomRegistry:
+        """
+        Creates Room objects, with their connections, for every room in the layout.
+
+        Returns:
+            RoomRegistry: The Room objects keyed by name.
+        """
+        rooms = RoomRegistry({
+            room_name: Room(room_name, x, y, room_id=self.room_ids.get(room_name))
+            for room_name, x, y in self.rooms
+        })
+        for from_room, direction, to_room, _ in self.connections:
+            rooms[from_room].connections[direction] = to_room
+        return rooms
+
+    def build_graph(self) -> HouseGraph:
+        """
+        Returns a copy of the adjacency lists and costs for pathfinding.
+
+        The graph carries the layout's compiled graph and landmarks until it is changed.
+
+        Returns:
+            HouseGraph: The graph representation of the house.
+        """
+        return HouseGraph(self.adjacency, self.costs, self.compiled, self.landmarks)
+
+
+def resolve_path(path: str) -> str:
+    """
+    Resolves a layout path relative to the game directory.
+
+    Args:
+        path (str): Absolute path, or path relative to the game directory.
+
+    Returns:
+        str: The absolute path.
+    """
+    return path if os.path.isabs(path) else os.path.join(BASE_DIR, path)
+
+
+def parse_layout_file(path: str) -> Layout:
+    """
+    Parses and validates a JSON or TOML layout file.
+
+    Args:
+        path (str): Path to the layout file.
+
+    Returns:
+        Layout: The parsed layout.
+
+    Raises:
+        ValueError: If the file is not a valid layout, or is TOML and tomllib is not available.
+    """
+    with open(path, 'rb') as f:
+        source = f.read()
+    if path.endswith('.toml'):
+        try:
+            import tomllib  # Standard library from Python 3.11
+        except ModuleNotFoundError:
+            raise ValueError(f"Layout {path} is TOML, which needs Python 3.11 or later; use a JSON layout.") from None
+        data = tomllib.loads(source.decode('utf-8'))
+    else:
+        data = json.loads(source)
+
+    rooms = [(str(room['name']), int(room['x']), int(room['y'])) for room in data['rooms']]
+    if not rooms:
+        raise ValueError(f"Layout {path} has no rooms.")
+    room_names = {room_name for room_name, _, _ in rooms}
+    if len(room_names) != len(rooms):
+        raise ValueError(f"Layout {path} has duplicate room names.")
+    missing = GAME_ROOMS - room_names
+    if missing:
+        raise ValueError(f"Layout {path} lacks rooms the game needs: {', '.join(sorted(missing))}.")
+
+    connections = []
+    for connection in data['connections']:
+        if len(connection) not in (3, 4):
+            raise ValueError(f"Layout {path} has a malformed connection: {connection}.")
+        from_room, direction, to_room = (str(field) for field in connection[:3])
+        cost = float(connection[3]) if len(connection) == 4 else 1.0
+        if from_room not in room_names or to_room not in room_names:
+            raise ValueError(f"Layout {path} connects unknown room: {from_room} {direction} {to_room}.")
+        if direction not in DIRECTION_CODES:
+            raise ValueError(f"Layout {path} uses unknown direction: {from_room} {direction} {to_room}.")
+        if not (cost > 0 and math.isfinite(cost)):
+            raise ValueError(f"Layout {path} has a connection cost that is not positive: {connection}.")
+        connections.append((from_room, direction, to_room, cost))
+
+    name = data.get('name', os.path.splitext(os.path.basename(path))[0])
+    return Layout(name, hashlib.sha256(source).hexdigest(), rooms, connections)
+
+
+def cache_path_for(path: str) -> str:
+    """
+    Returns where the compiled cache of a layout file is stored.
+
+    Args:
+        path (str): Absolute path to the layout file.
+
+    Returns:
+        str: Absolute path to the cache file.
+    """
+    cache_dir = os.path.join(os.path.dirname(path), LAYOUT_CACHE_DIR)
+    return os.path.join(cache_dir, os.path.basename(path) + '.bin')
+
+
+def _write_cache(cache_path: str, key: list, layout: Layout) -> None:
+    """
+    Writes a layout's compiled cache: a JSON header line, then the raw table arrays.
+
+    Args:
+        cache_path (str): Path to the cache file.
+        key (list): The cache key of the layout file.
+        layout (Layout): The layout to store.
+    """
+    landmarks = layout.landmarks
+    header = {
+        'key': key,
+        'name': layout.name,
+        'checksum': layout.checksum,
+        'rooms': layout.rooms,
+        'connections': layout.connections,
+        'next_hops': layout.next_hops is not None,
+        'landmarks': landmarks.rooms if landmarks is not None else None,
+    }
+    rows: List[array] = []
+    if layout.next_hops is not None:
+        rows.extend(layout.next_hops.rows)
+    if landmarks is not None:
+        rows.extend(landmarks.from_landmark)
+        rows.extend(landmarks.to_landmark)
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    # Write to a temporary file first so a crash never leaves a half-written cache
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(json.dumps(header).encode('utf-8') + b'\n')
+        for row in rows:
+            row.tofile(f)
+    os.replace(tmp_path, cache_path)
+
+
+def _read_cache(cache_path: str, key: list) -> Optional[Layout]:
+    """
+    Reads a layout's compiled cache written by _write_cache.
+
+    Args:
+        cache_path (str): Path to the cache file.
+        key (list): The cache key of the layout file.
+
+    Returns:
+        Optional[Layout]: The layout, or None if the cache was built for another key.
+
+    Raises:
+        OSError: If the cache cannot be read.
+        ValueError: If the cache is malformed.
+    """
+    with open(cache_path, 'rb') as f:
+        header = json.loads(f.readline())
+        if header['key'] != key:
+            return None
+        layout = Layout(
+            header['name'],
+            header['checksum'],
+            [(name, x, y) for name, x, y in header['rooms']],
+            [(from_room, direction, to_room, cost) for from_room, direction, to_room, cost in header['connections']],
+            build_tables=False
+        )
+        graph = layout.compiled
+        n = len(graph)
+
+        def read_rows(typecode: str, count: int) -> List[array]:
+            rows = []
+            for _ in range(count):
+                row = array(typecode)
+                row.fromfile(f, n)  # Raises EOFError on a truncated cache
+                rows.append(row)
+            return rows
+
+        if header['next_hops']:
+            layout.next_hops = NextHopTable.from_rows(graph, read_rows(ID_TYPE, n))
+        if header['landmarks'] is not None:
+            rooms = [int(room) for room in header['landmarks']]
+            if not all(0 <= room < n for room in rooms):
+                raise ValueError(f"Layout cache {cache_path} has an unknown landmark room.")
+            from_landmark = read_rows('d', len(rooms))
+            to_landmark = read_rows('d', len(rooms))
+            layout.landmarks = Landmarks.from_rows(graph, rooms, from_landmark, to_landmark)
+        if f.read(1):
+            raise ValueError(f"Layout cache {cache_path} has trailing data.")
+    return layout
+
+
+def load_layout(path: str) -> Layout:
+    """
+    Loads a layout, from its compiled cache when the cache is still valid.
+
+    The cache is keyed on the source file's size and modification time, so
+    editing the layout file rebuilds it on the next launch, and on the settings
+    that decide which tables are built and how, so changing those rebuilds it too.
+
+    Args:
+        path (str): Path to the layout file, relative to the game directory or absolute.
+
+    Returns:
+        Layout: The compiled layout.
+    """
+    path = resolve_path(path)
+    stat = os.stat(path)
+    key = [
+        CACHE_FORMAT_VERSION, stat.st_size, stat.st_mtime_ns, sys.byteorder,
+        NEXT_HOP_MAX_ROOMS, ALT_MIN_ROOMS, LANDMARK_COUNT, sorted(GAME_ROOMS)
+    ]
+    cache_path = cache_path_for(path)
+
+    try:
+        layout = _read_cache(cache_path, key)
+        if layout is not None:
+            return layout
+    except (OSError, EOFError, ValueError, KeyError, TypeError):
+        pass  # Missing or unreadable cache; rebuild it below
+
+    layout = parse_layout_file(path)
+    try:
+        _write_cache(cache_path, key, layout)
+    except OSError:
+        pass  # A read-only install still works, it just parses every launch
+    return layout
+
+
+def _load_room_ids(cursor, layout: Layout) -> None:
+    """
+    Fills in layout.room_ids from the Rooms table.
+
+    Args:
+        cursor (sqlite3.Cursor): The database cursor.
+        layout (Layout): The layout whose rooms are looked up.
+    """
+    cursor.execute('SELECT name, room_id FROM Rooms')
+    layout.room_ids = {name: room_id for name, room_id in cursor.fetchall() if name in layout.adjacency}
+
+
+def sync_layout(conn, layout: Layout) -> bool:
+    """
+    Writes the layout to the Rooms and RoomLinks tables if it changed.
+
+    Rooms are upserted so existing room ids, and the session rows that refer to
+    them, stay valid. Rooms the layout no longer has are deleted along with their
+    links and session cleanliness rows; players and agents standing in one are
+    moved to the layout's first room. Journal events that name a deleted room are
+    skipped on replay. Everything is written in a single transaction. Either way
+    the layout's room_ids are filled in from the database afterwards.
+
+    Args:
+        conn (sqlite3.Connection): The database connection.
+        layout (Layout): The layout to store.
+
+    Returns:
+        bool: True if the database was updated, False if it already matched.
+    """
+    cursor = conn.cursor()
+    cursor.execute('SELECT checksum FROM Layouts WHERE name = ?', (layout.name,))
+    row = cursor.fetchone()
+    if row and row[0] == layout.checksum:
+        _load_room_ids(cursor, layout)
+        return False
+
+    with conn:
+        cursor.executemany('''
+            INSERT INTO Rooms (name, x_coordinate, y_coordinate, is_clean)
+            VALUES (?, ?, ?, 0)
+            ON CONFLICT(name) DO UPDATE SET
+            x_coordinate=excluded.x_coordinate,
+            y_coordinate=excluded.y_coordinate
+        ''', layout.rooms)
+        _load_room_ids(cursor, layout)
+        room_ids = layout.room_ids
+        cursor.execute('DELETE FROM RoomLinks')
+
+        cursor.execute('SELECT room_id FROM Rooms')
+        kept = set(room_ids.values())
+        removed = [(room_id,) for room_id, in cursor.fetchall() if room_id not in kept]
+        if removed:
+            first_room_id = room_ids[layout.rooms[0][0]]
+            moves = [(first_room_id, room_id) for room_id, in removed]
+            cursor.executemany('UPDATE Sessions SET current_room_id = ? WHERE current_room_id = ?', moves)
+            cursor.executemany('UPDATE Agent SET current_room_id = ? WHERE current_room_id = ?', moves)
+            cursor.executemany('DELETE FROM SessionRooms WHERE room_id = ?', removed)
+            cursor.executemany('DELETE FROM Rooms WHERE room_id = ?', removed)
+
+        cursor.executemany('''
+            INSERT INTO RoomLinks (from_room_id, direction, to_room_id, cost)
+            VALUES (?, ?, ?, ?)
+        ''', [
+            (room_ids[from_room], DIRECTION_CODES[direction], room_ids[to_room], cost)
+            for from_room, direction, to_room, cost in layout.connections
+        ])
+        cursor.execute('''
+            INSERT INTO Layouts (name, checksum) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET checksum=excluded.checksum
+        ''', (layout.name, layout.checksum))
+    return True
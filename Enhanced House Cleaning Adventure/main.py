@@ -4,19 +4,33 @@
 Main module for the House Cleaning Adventure game.
 
 This module initializes the game, handles the main game loop,
-and coordinates interactions between the player, agent, and rooms.
+and coordinates interactions between the player, agents, and rooms.
 """
 
 import pygame
+import sqlite3
 import sys
+import atexit
 import time
 import hashlib
+from typing import Optional
 from constants import *
 from room import Room
 from player import Player
 from utils import render_messages
-from agent import Agent
-from database import initialize_database, get_connection
+from renderer import Renderer
+from camera import Camera
+from route import RouteWalker
+from message_log import MessageLog
+from agent import Agent, AgentGroup
+from rules import check_win_condition
+from persistence import DatabaseWriter, GameSaver, BackupScheduler
+from journal import GameJournal, snapshot_records, EVENT_WIN, EVENT_LOSE
+from layout import load_layout, sync_layout
+from session import (
+    create_session, get_or_create_session, START_ROOM, GOAL_ROOM, AGENT_ROSTER
+)
+from database import initialize_database, get_connection, get_cursor, close_connection, is_in_memory
 
 def hash_password(password):
     """
@@ -63,6 +77,42 @@ def display_error_message(screen, message):
     pygame.display.flip()
     pygame.time.delay(2000)
 
+def wait_for_events(timeout: Optional[float] = None) -> list:
+    """
+    Sleeps until at least one event arrives, then returns every pending event.
+
+    Blocking here instead of polling every frame keeps the CPU idle while the
+    player is not doing anything.
+
+    Args:
+        timeout (Optional[float]): Seconds to wait at most, or None to wait indefinitely.
+
+    Returns:
+        list: The pending events; empty if the timeout expired first.
+    """
+    if timeout is None:
+        event = pygame.event.wait()
+    else:
+        # pygame treats a timeout of 0 as "wait forever", so wait at least 1 ms
+        event = pygame.event.wait(max(1, int(timeout * 1000)))
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
+def next_wakeup(*schedulers) -> Optional[float]:
+    """
+    Returns how long the game loop may sleep before a scheduled task falls due.
+
+    Args:
+        *schedulers: Objects with a seconds_until_due() method (GameSaver, BackupScheduler).
+
+    Returns:
+        Optional[float]: Seconds until the earliest task, or None if nothing is scheduled.
+    """
+    due = [s.seconds_until_due() for s in schedulers]
+    due = [seconds for seconds in due if seconds is not None]
+    return min(due) if due else None
+
 def title_screen(screen):
     """
     Display the title screen with "New Game" and "Log in" options.
@@ -76,34 +126,37 @@ def title_screen(screen):
     pygame.font.init()
     font_title = pygame.font.Font(None, 64)
     font_option = pygame.font.Font(None, 48)
-    clock = pygame.time.Clock()
     selected_option = None
 
+    # The title screen never changes, so render it once
+    title_surface = font_title.render("House Cleaning Adventure", True, WHITE)
+    subtitle_surface = font_option.render("It's a fight to stay Clean!", True, WHITE)
+    option_new = font_option.render("1. New User", True, WHITE)
+    option_login = font_option.render("2. Log in", True, WHITE)
+    needs_redraw = True
+
     while selected_option is None:
-        for event in pygame.event.get():
+        if needs_redraw:
+            screen.fill(BLACK)
+            screen.blit(title_surface, (SCREEN_WIDTH // 2 - title_surface.get_width() // 2, 150))
+            screen.blit(subtitle_surface, (SCREEN_WIDTH // 2 - subtitle_surface.get_width() // 2, 220))
+            screen.blit(option_new, (SCREEN_WIDTH // 2 - option_new.get_width() // 2, 300))
+            screen.blit(option_login, (SCREEN_WIDTH // 2 - option_login.get_width() // 2, 350))
+            pygame.display.flip()
+            needs_redraw = False
+
+        # Sleep until the player does something
+        for event in wait_for_events():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                needs_redraw = True
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_1:
                     selected_option = 'new'
                 elif event.key == pygame.K_2:
                     selected_option = 'login'
-
-        screen.fill(BLACK)
-        # Render the title
-        title_surface = font_title.render("House Cleaning Adventure", True, WHITE)
-        subtitle_surface = font_option.render("It's a fight to stay Clean!", True, WHITE)
-        option_new = font_option.render("1. New User", True, WHITE)
-        option_login = font_option.render("2. Log in", True, WHITE)
-
-        screen.blit(title_surface, (SCREEN_WIDTH // 2 - title_surface.get_width() // 2, 150))
-        screen.blit(subtitle_surface, (SCREEN_WIDTH // 2 - subtitle_surface.get_width() // 2, 220))
-        screen.blit(option_new, (SCREEN_WIDTH // 2 - option_new.get_width() // 2, 300))
-        screen.blit(option_login, (SCREEN_WIDTH // 2 - option_login.get_width() // 2, 350))
-
-        pygame.display.flip()
-        clock.tick(30)
     return selected_option
 
 def get_player_credentials(screen, is_new_game=True):
@@ -130,11 +183,20 @@ def get_player_credentials(screen, is_new_game=True):
     username = ''
     password = ''
     done = False
-    clock = pygame.time.Clock()
     error_message = ""
+    needs_redraw = True
 
     while not done:
-        for event in pygame.event.get():
+        if needs_redraw:
+            draw_credentials_screen(
+                screen, font, is_new_game, error_message, username, password,
+                input_box_username, input_box_password, color_username, color_password
+            )
+            needs_redraw = False
+
+        # Sleep until the player types or clicks; every event can change the screen
+        for event in wait_for_events():
+            needs_redraw = True
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -187,38 +249,56 @@ def get_player_credentials(screen, is_new_game=True):
                         error_message = "Please enter valid credentials."
                         username = ''
                         password = ''
-
-        screen.fill(BLACK)
-        # Center the prompt text
-        prompt_text = "Create New Account" if is_new_game else "Log In"
-        if error_message:
-            prompt_text = error_message
-        prompt_surface = font.render(prompt_text, True, WHITE)
-        screen.blit(prompt_surface, (SCREEN_WIDTH // 2 - prompt_surface.get_width() // 2, input_box_username.y - 60))
-        # Adjusted label positions
-        username_label = font.render("Username:", True, WHITE)
-        screen.blit(username_label, (input_box_username.x - 150, input_box_username.y + 5))
-        password_label = font.render("Password:", True, WHITE)
-        screen.blit(password_label, (input_box_password.x - 150, input_box_password.y + 5))
-        # Render the username and password inputs
-        txt_surface_username = font.render(username, True, color_username)
-        txt_surface_password = font.render('*' * len(password), True, color_password)
-        # Adjust input box widths if necessary
-        width_username = max(200, txt_surface_username.get_width() + 10)
-        width_password = max(200, txt_surface_password.get_width() + 10)
-        input_box_username.w = width_username
-        input_box_password.w = width_password
-        # Blit the input texts
-        screen.blit(txt_surface_username, (input_box_username.x + 5, input_box_username.y + 5))
-        screen.blit(txt_surface_password, (input_box_password.x + 5, input_box_password.y + 5))
-        # Draw the input boxes
-        pygame.draw.rect(screen, color_username, input_box_username, 2)
-        pygame.draw.rect(screen, color_password, input_box_password, 2)
-
-        pygame.display.flip()
-        clock.tick(30)
     return username.strip(), hash_password(password.strip())
 
+def draw_credentials_screen(
+    screen, font, is_new_game, error_message, username, password,
+    input_box_username, input_box_password, color_username, color_password
+):
+    """
+    Draw the account prompt with the username and password input boxes.
+
+    Args:
+        screen (pygame.Surface): The game screen.
+        font (pygame.font.Font): The font for labels and input.
+        is_new_game (bool): True if creating a new account, False if logging in.
+        error_message (str): Error shown in place of the prompt, if any.
+        username (str): The username typed so far.
+        password (str): The password typed so far.
+        input_box_username (pygame.Rect): The username box; its width grows with the text.
+        input_box_password (pygame.Rect): The password box; its width grows with the text.
+        color_username (pygame.Color): Border and text color of the username box.
+        color_password (pygame.Color): Border and text color of the password box.
+    """
+    screen.fill(BLACK)
+    # Center the prompt text
+    prompt_text = "Create New Account" if is_new_game else "Log In"
+    if error_message:
+        prompt_text = error_message
+    prompt_surface = font.render(prompt_text, True, WHITE)
+    screen.blit(prompt_surface, (SCREEN_WIDTH // 2 - prompt_surface.get_width() // 2, input_box_username.y - 60))
+    # Adjusted label positions
+    username_label = font.render("Username:", True, WHITE)
+    screen.blit(username_label, (input_box_username.x - 150, input_box_username.y + 5))
+    password_label = font.render("Password:", True, WHITE)
+    screen.blit(password_label, (input_box_password.x - 150, input_box_password.y + 5))
+    # Render the username and password inputs
+    txt_surface_username = font.render(username, True, color_username)
+    txt_surface_password = font.render('*' * len(password), True, color_password)
+    # Adjust input box widths if necessary
+    width_username = max(200, txt_surface_username.get_width() + 10)
+    width_password = max(200, txt_surface_password.get_width() + 10)
+    input_box_username.w = width_username
+    input_box_password.w = width_password
+    # Blit the input texts
+    screen.blit(txt_surface_username, (input_box_username.x + 5, input_box_username.y + 5))
+    screen.blit(txt_surface_password, (input_box_password.x + 5, input_box_password.y + 5))
+    # Draw the input boxes
+    pygame.draw.rect(screen, color_username, input_box_username, 2)
+    pygame.draw.rect(screen, color_password, input_box_password, 2)
+
+    pygame.display.flip()
+
 def record_game_result(conn, username, time_taken, rooms_cleaned, result):
     """
     Record the result of the game into the GameResults table in the database.
@@ -262,6 +342,9 @@ def get_top_scores(conn, limit=5):
     """
     Retrieve the top high scores from the database.
 
+    Reads the materialized Leaderboard table, so the cost depends only on limit
+    and not on how many games have been recorded.
+
     Args:
         conn (sqlite3.Connection): The database connection.
         limit (int, optional): The maximum number of top scores to retrieve. Defaults to 5.
@@ -270,64 +353,99 @@ def get_top_scores(conn, limit=5):
         list: A list of tuples containing high score information.
     """
     cursor = conn.cursor()
-    cursor.execute('''
-        SELECT username, time_taken, rooms_cleaned, result, timestamp
-        FROM GameResults
-        WHERE result = 'win'
-        ORDER BY time_taken ASC
-        LIMIT ?
-    ''', (limit,))
+    if limit > LEADERBOARD_SIZE:
+        # More rows than the leaderboard keeps; walk the covering index instead
+        cursor.execute('''
+            SELECT username, time_taken, rooms_cleaned, result, timestamp
+            FROM GameResults
+            WHERE result = 'win'
+            ORDER BY time_taken ASC, result_id ASC
+            LIMIT ?
+        ''', (limit,))
+    else:
+        cursor.execute('''
+            SELECT username, time_taken, rooms_cleaned, 'win', timestamp
+            FROM Leaderboard
+            ORDER BY time_taken ASC, result_id ASC
+            LIMIT ?
+        ''', (limit,))
     return cursor.fetchall()
 
-def reset_game_state(conn, username):
+def reset_game_state(conn, session_id):
     """
     Reset the game state in the database to start a new game.
 
+    Only the given session is touched, so other players' saved games are unaffected.
+
     Args:
         conn (sqlite3.Connection): The database connection.
-        username (str): The name of the player whose game state is to be reset.
+        session_id (int): The game session to reset.
     """
     cursor = conn.cursor()
     # Reset player's current room to the starting room
-    cursor.execute('UPDATE Players SET current_room = ? WHERE username = ?', ('The Foyer', username))
+    cursor.execute('''
+        UPDATE Sessions SET current_room_id = (SELECT room_id FROM Rooms WHERE name = ?)
+        WHERE session_id = ?
+    ''', (START_ROOM, session_id))
 
-    # Reset rooms to dirty (set is_clean to 0)
-    cursor.execute('UPDATE Rooms SET is_clean = 0')
+    # Reset the session's rooms to dirty (set is_clean to 0)
+    cursor.execute('UPDATE SessionRooms SET is_clean = 0 WHERE session_id = ?', (session_id,))
 
-    # Reset agent's state
-    cursor.execute('''
+    # Reset the session's agents to their start rooms
+    cursor.executemany('''
         UPDATE Agent SET
-        current_room = ?,
+        current_room_id = (SELECT room_id FROM Rooms WHERE name = ?),
         wait_counter = 0,
-        wait_threshold = 2
-    ''', ('Kitchen',))  # Starting room for the agent
+        wait_threshold = ?
+        WHERE session_id = ? AND agent_index = ?
+    ''', [
+        (start_room, wait_threshold, session_id, agent_index)
+        for agent_index, (_, start_room, wait_threshold) in enumerate(AGENT_ROSTER)
+    ])
+
+    # Snapshot the reset state so journal replay starts the next game from here
+    for sql, params in snapshot_records(session_id, {
+        'player_room': START_ROOM,
+        'agents': [
+            {'room': start_room, 'wait_counter': 0, 'wait_threshold': wait_threshold}
+            for _, start_room, wait_threshold in AGENT_ROSTER
+        ],
+        'clean_rooms': [],
+    }):
+        cursor.execute(sql, params)
 
     conn.commit()
 
-def check_win_condition(player: Player, rooms: dict) -> str | None:
+def save_before_quit(saver: GameSaver, writer: Optional[DatabaseWriter]) -> None:
     """
-    Check if the player has met the win or lose conditions.
+    Saves any unsaved progress and stops the background writer before the game exits.
 
-    Args:
-        player (Player): The player object.
-        rooms (dict): Dictionary of all room objects.
+    A failed write is retried once, then reported on stderr along with what was
+    not saved, instead of being raised, so quitting always closes the game.
 
-    Returns:
-        str: 'win' if the player wins, 'lose' if the player loses, or None if the game should continue.
+    Args:
+        saver (GameSaver): The saver of the game in progress.
+        writer (Optional[DatabaseWriter]): The background writer, if one is running.
     """
-    # Exclude the Master Bedroom from rooms to clean
-    rooms_to_clean = [room for room in rooms.values() if room.name != 'Master Bedroom']
-    all_clean = all(room.is_clean for room in rooms_to_clean)
-
-    if all_clean and player.current_room.name == 'Master Bedroom':
-        # Player wins if all rooms are clean, and they are in the Master Bedroom
-        return 'win'
-    elif player.current_room.name == 'Master Bedroom' and not all_clean:
-        # Player loses if they go to the Master Bedroom before cleaning all rooms
-        return 'lose'
+    for _ in range(2):
+        try:
+            # A second flush flags the lost objects again and resubmits them
+            saver.flush()
+            break
+        except sqlite3.Error as e:
+            print(f"Could not save the game ({e}).", file=sys.stderr)
+
+    if writer is None:
+        unsaved = saver.changed_objects()
     else:
-        # Game continues
-        return None
+        try:
+            writer.close()
+        except sqlite3.Error as e:
+            print(f"Could not save the game ({e}).", file=sys.stderr)
+        unsaved = writer.take_failed()
+    if unsaved:
+        names = sorted({getattr(obj, 'name', type(obj).__name__) for obj in unsaved})
+        print(f"Progress not saved for: {', '.join(names)}.", file=sys.stderr)
 
 def main() -> None:
     """
@@ -340,9 +458,23 @@ def main() -> None:
 
     # Initialize database outside the loop
     initialize_database()
-    conn = get_connection()
-    conn.execute('PRAGMA foreign_keys = ON')  # Enable foreign key constraints
-    cursor = conn.cursor()
+    conn = get_connection()  # Tuned, long-lived connection (WAL, foreign keys on)
+    cursor = get_cursor()
+
+    # Load the house layout (from its compiled cache) and store it if it changed
+    layout = load_layout(LAYOUT_FILE)
+    sync_layout(conn, layout)
+
+    # Start the background writer; it opens its own connection. An in-memory
+    # database needs no writer since its writes never touch the disk.
+    writer = None
+    if not is_in_memory():
+        writer = DatabaseWriter()
+        writer.start()
+
+    # Back up an in-memory database on a timer, on game end and at shutdown
+    backups = BackupScheduler()
+    atexit.register(backups.backup)
 
     while True:
         # Display title screen and get user choice
@@ -365,17 +497,19 @@ def main() -> None:
                 else:
                     # Create new player
                     cursor.execute('''
-                        INSERT INTO Players (username, password, current_room)
-                        VALUES (?, ?, ?)
-                    ''', (username, hashed_password, 'The Foyer'))
+                        INSERT INTO Players (username, password)
+                        VALUES (?, ?)
+                    ''', (username, hashed_password))
                     conn.commit()
+                    session_id = create_session(conn, username)
                     authenticated = True
             else:
                 # Load existing player
                 cursor.execute('SELECT password FROM Players WHERE username = ?', (username,))
                 row = cursor.fetchone()
                 if row and row[0] == hashed_password:
-                    # Password matches, proceed
+                    # Password matches, proceed with the player's saved game
+                    session_id = get_or_create_session(conn, username)
                     authenticated = True
                 else:
                     # Authentication failed
@@ -383,85 +517,41 @@ def main() -> None:
                     display_error_message(screen, error_message)
                     continue  # Loop back to get credentials
 
-        # Initialize message queue
-        messages = [
+        # Initialize the bounded message log
+        messages = MessageLog([
             f"Welcome, {username}!",
-            "Your goal is to clean all 6 rooms and show proof to your Wife in the Master Bedroom!",
+            f"Your goal is to clean all {len(layout.rooms) - 1} rooms and show proof to your Wife in the {GOAL_ROOM}!",
             "Move using Arrow keys. Clean a room with the Spacebar."
-        ]
-
-        # Check if rooms exist in the database
-        cursor.execute('SELECT COUNT(*) FROM Rooms')
-        rooms_count = cursor.fetchone()[0]
-
-        if rooms_count == 0:
-            # Define the rooms and their positions
-            rooms = {
-                'The Foyer': Room('The Foyer', 325, 250),
-                'Kitchen': Room('Kitchen', 325, 375),
-                'Bedroom': Room('Bedroom', 500, 375),
-                'Bathroom': Room('Bathroom', 325, 0),
-                'Living Room': Room('Living Room', 500, 250),
-                'Master Bedroom': Room('Master Bedroom', 500, 125),
-                'Backyard': Room('Backyard', 150, 250),
-                'Garage': Room('Garage', 500, 0),
-            }
-
-            # Define the room connections
-            room_connections = [
-                ('The Foyer', 'South', 'Kitchen'),
-                ('The Foyer', 'North', 'Bathroom'),
-                ('The Foyer', 'East', 'Living Room'),
-                ('The Foyer', 'West', 'Backyard'),
-                ('Kitchen', 'North', 'The Foyer'),
-                ('Kitchen', 'East', 'Bedroom'),
-                ('Bedroom', 'West', 'Kitchen'),
-                ('Bathroom', 'South', 'The Foyer'),
-                ('Bathroom', 'East', 'Garage'),
-                ('Living Room', 'West', 'The Foyer'),
-                ('Living Room', 'North', 'Master Bedroom'),
-                ('Master Bedroom', 'South', 'Living Room'),
-                ('Backyard', 'East', 'The Foyer'),
-                ('Garage', 'West', 'Bathroom'),
-            ]
-
-            # Save rooms to the database
-            for room in rooms.values():
-                room.save_to_db(conn)
-
-            # Save room connections to the database and assign to Room objects
-            for from_room, direction, to_room in room_connections:
-                cursor.execute('''
-                    INSERT INTO RoomConnections (from_room, direction, to_room)
-                    VALUES (?, ?, ?)
-                ''', (from_room, direction, to_room))
-                # Assign connections to Room objects
-                rooms[from_room].connections[direction] = to_room
-            conn.commit()
-        else:
-            # Load rooms from the database
-            rooms = Room.load_rooms_from_db(conn)
-
-            # Load room connections from the database
-            cursor.execute('SELECT from_room, direction, to_room FROM RoomConnections')
-            connections = cursor.fetchall()
-            for from_room_name, direction, to_room_name in connections:
-                if from_room_name in rooms and to_room_name in rooms:
-                    rooms[from_room_name].connections[direction] = to_room_name
+        ], spill_path=MESSAGE_SPILL_FILE)
+
+        # Build the rooms from the layout and apply this session's room state
+        rooms = Room.load_rooms_from_db(conn, session_id, layout)
 
         # Build the graph representation of the house
-        graph = {}
-        for room in rooms.values():
-            room_name = room.name
-            graph[room_name] = []
-            for direction, connected_room_name in room.connections.items():
-                graph[room_name].append(connected_room_name)
+        graph = layout.build_graph()
 
         # Initialize the player
-        player = Player.load_from_db(conn, rooms, username)
+        player = Player.load_from_db(conn, rooms, session_id)
+
+        # Initialize the agents; they route with the layout's next-hop table
+        agents = AgentGroup(Agent.load_all_from_db(conn, rooms, session_id), layout.compiled, layout.next_hops)
+
+        # Journal every event and rebuild an interrupted game from snapshot + tail
+        journal = GameJournal(conn, session_id, writer)
+        journal.attach(player, agents, rooms)
+        journal.restore()
+
+        # Track changed rows and write them behind the game loop
+        saver = GameSaver(conn, session_id, player, agents, rooms, writer)
+
+        # Scrollable, zoomable view of the map above the text box
+        camera = Camera(SCREEN_WIDTH, TEXT_BOX_Y)
+
+        # Redraws only what changed since the previous frame
+        renderer = Renderer(screen, camera)
 
-        # Initialize the agent
-        agent = Agent.load_from_db(conn, rooms)
+        # Walks the player to a clicked room
+        walker = RouteWalker(player)
 
         # Start the game timer
         start_time = time.time()
@@ -469,14 +559,36 @@ def main() -> None:
         # Main game loop
         running = True
         while running:
-            screen.fill(BLACK)
-
-            # Event handling
-            for event in pygame.event.get():
+            # Sleep until input arrives or a save or backup falls due. The game is
+            # turn based: nothing changes between keypresses, and the agents only
+            # acts in the frame after the player cleans a room.
+            for event in wait_for_events(next_wakeup(saver, backups, walker)):
                 if event.type == pygame.QUIT:
+                    # Persist any unsaved progress before quitting
+                    save_before_quit(saver, writer)
+                    messages.close()
                     running = False
                     sys.exit()
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    # The window contents were lost; repaint everything
+                    renderer.invalidate()
+                elif event.type == pygame.MOUSEWHEEL:
+                    # Zoom around the mouse pointer
+                    camera.zoom_at(CAMERA_ZOOM_STEP ** event.y, *pygame.mouse.get_pos())
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    # Click a room to walk there
+                    target = renderer.room_at(event.pos)
+                    if target is None or target is player.current_room:
+                        walker.cancel()
+                    elif not walker.plan(target, rooms, graph):
+                        messages.append(f"You can't get to the {target.name} from here.")
+                elif event.type == pygame.MOUSEMOTION and event.buttons[2]:
+                    # Drag with the right mouse button to scroll the map
+                    camera.pan(*event.rel)
                 elif event.type == pygame.KEYDOWN:
+                    # Keyboard moves and cleaning take over from a clicked route
+                    if event.key != pygame.K_c:
+                        walker.cancel()
                     if event.key in (pygame.K_w, pygame.K_UP):
                         player.move('North', rooms, messages)
                     elif event.key in (pygame.K_s, pygame.K_DOWN):
@@ -485,22 +597,28 @@ def main() -> None:
                         player.move('West', rooms, messages)
                     elif event.key in (pygame.K_d, pygame.K_RIGHT):
                         player.move('East', rooms, messages)
+                    elif event.key == pygame.K_c:
+                        # Centre the view on the player
+                        camera.center_on(*player.current_room.center)
                     elif event.key == pygame.K_SPACE:
                         # Attempt to clean the room
                         room_cleaned = player.clean_room(messages)
                         if room_cleaned:
-                            # Agent will wait longer if player cleans a room
-                            agent.increment_wait_counter()
+                            # Agents will wait longer if player cleans a room
+                            agents.increment_wait_counters()
 
-            # Agent's turn
-            agent.move(rooms, graph)
-            agent.dirty_room(messages)
+            # Take the next step along a clicked route
+            walker.maybe_step(rooms, messages)
+
+            # Agents' turn
+            agents.move(rooms)
+            agents.dirty_rooms(messages)
 
             # Check for win/lose condition
             condition = check_win_condition(player, rooms)
 
             if condition == 'win':
-                messages.append("You have cleaned all the rooms and reached the Master Bedroom!")
+                messages.append(f"You have cleaned all the rooms and reached the {GOAL_ROOM}!")
                 messages.append("Wife: Wow, the house looks awesome! Have fun with your friends!")
                 render_messages(screen, messages)
                 pygame.display.flip()
@@ -509,15 +627,21 @@ def main() -> None:
                 # Record game result
                 end_time = time.time()
                 time_taken = int(end_time - start_time)
-                rooms_cleaned = sum(1 for room in rooms.values() if room.is_clean)
+                rooms_cleaned = rooms.clean_count
+                journal.record(EVENT_WIN, value=time_taken)
+
+                # Persist the final state before recording the result
+                saver.flush()
                 record_game_result(conn, username, time_taken, rooms_cleaned, 'win')
 
                 # Reset the game state
-                reset_game_state(conn, username)
+                reset_game_state(conn, session_id)
+                backups.game_ended()
 
                 # Display high scores
                 display_high_scores(screen, conn)
 
+                messages.close()
                 running = False
                 continue
             elif condition == 'lose':
@@ -530,40 +654,42 @@ def main() -> None:
                 # Record game result
                 end_time = time.time()
                 time_taken = int(end_time - start_time)
-                rooms_cleaned = sum(1 for room in rooms.values() if room.is_clean)
+                rooms_cleaned = rooms.clean_count
+                journal.record(EVENT_LOSE, value=time_taken)
+
+                # Persist the final state before recording the result
+                saver.flush()
                 record_game_result(conn, username, time_taken, rooms_cleaned, 'lose')
 
                 # Reset the game state
-                reset_game_state(conn, username)
+                reset_game_state(conn, session_id)
+                backups.game_ended()
 
                 # Display high scores
                 display_high_scores(screen, conn)
 
+                messages.close()
                 running = False
                 continue
 
-            # Draw rooms
-            for room in rooms.values():
-                is_current_room = (room == player.current_room)
-                has_agent = (room == agent.current_room)
-                room.draw(screen, is_current_room, has_agent)
-
-            # Render messages
-            render_messages(screen, messages)
+            # Keep the player's room on screen
+            camera.ensure_visible(player.current_room.bounds)
 
-            pygame.display.flip()
+            # Draw the rooms and messages that changed since the last frame
+            renderer.draw(rooms, player, agents, messages, walker.path)
+            # Caps the frame rate while events arrive in bursts (e.g. key repeat)
             clock.tick(FPS)
 
-            # Save game state after each turn
-            player.save_to_db(conn, username)
-            agent.save_to_db(conn)
-            for room in rooms.values():
-                room.save_to_db(conn)
+            # Save changed rows once the save interval has elapsed
+            saver.maybe_save()
+            backups.maybe_backup()
 
         continue  # Go back to the start of the main while loop
 
+    if writer:
+        writer.close()
     pygame.quit()
-    conn.close()
+    close_connection()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,119 @@
+# message_log.py
+
+"""
+Bounded log of the messages shown to the player.
+
+The log is a ring buffer: once it holds capacity messages, each new message
+evicts the oldest, so long sessions use constant memory. Evicted messages can
+optionally be spilled to a text file or handed to a callback (for example to
+store them in the database) instead of being dropped.
+
+Every append bumps a version counter. Renderers compare it with the version
+they last drew to decide whether the visible lines changed, instead of
+comparing the text itself every frame.
+"""
+
+from collections import deque
+from typing import Callable, Iterator, List, Optional
+from constants import MESSAGE_LOG_SIZE, VISIBLE_MESSAGES
+
+
+class MessageLog:
+    """
+    Ring buffer of player messages with a change counter.
+
+    Supports the list operations the game uses on messages: append, len,
+    iteration and indexing or slicing (e.g. messages[-5:]).
+
+    Attributes:
+        capacity (int): Maximum number of messages kept in memory.
+        version (int): Incremented every time a message is appended.
+        spill_path (Optional[str]): Text file evicted messages are appended to.
+        spill (Optional[Callable[[str], None]]): Called with each evicted message.
+    """
+
+    def __init__(
+        self,
+        messages: Optional[List[str]] = None,
+        capacity: int = MESSAGE_LOG_SIZE,
+        spill_path: Optional[str] = None,
+        spill: Optional[Callable[[str], None]] = None
+    ) -> None:
+        """
+        Initializes the log.
+
+        Args:
+            messages (Optional[List[str]]): Initial messages.
+            capacity (int): Maximum number of messages kept in memory.
+            spill_path (Optional[str]): Text file to append evicted messages to.
+            spill (Optional[Callable[[str], None]]): Called with each evicted message.
+        """
+        if capacity < VISIBLE_MESSAGES:
+            raise ValueError(f"Message log capacity must be at least {VISIBLE_MESSAGES}.")
+        self.capacity: int = capacity
+        self.version: int = 0
+        self.spill_path: Optional[str] = spill_path
+        self.spill: Optional[Callable[[str], None]] = spill
+        self._lines: deque = deque(maxlen=capacity)
+        self._spill_file = None
+        for message in messages or []:
+            self.append(message)
+
+    def append(self, message: str) -> None:
+        """
+        Adds a message, evicting the oldest one if the log is full.
+
+        Args:
+            message (str): The message to add.
+        """
+        if len(self._lines) == self.capacity:
+            self._evict(self._lines[0])
+        self._lines.append(message)
+        self.version += 1
+
+    def _evict(self, message: str) -> None:
+        """
+        Spills a message that is about to fall out of the ring buffer.
+
+        Args:
+            message (str): The evicted message.
+        """
+        if self.spill is not None:
+            self.spill(message)
+        if self.spill_path is not None:
+            if self._spill_file is None:
+                self._spill_file = open(self.spill_path, 'a', encoding='utf-8')
+            self._spill_file.write(message + '\n')
+
+    def visible(self, count: int = VISIBLE_MESSAGES) -> List[str]:
+        """
+        Returns the newest messages, oldest first.
+
+        Args:
+            count (int): How many messages to return.
+
+        Returns:
+            List[str]: Up to count messages.
+        """
+        start = max(len(self._lines) - count, 0)
+        return [self._lines[i] for i in range(start, len(self._lines))]
+
+    def close(self) -> None:
+        """
+        Closes the spill file, if one was opened.
+        """
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._lines)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self._lines))
+            return [self._lines[i] for i in range(start, stop, step)]
+        return self._lines[index]
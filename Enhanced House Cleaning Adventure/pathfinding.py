@@ -0,0 +1,1181 @@
+# pathfinding.py
+
+"""
+Pathfinding over the house graph. Pure Python; does not need pygame.
+
+Every connection has a traversal cost, 1 unless the layout says otherwise
+(stairs, long hallways and stiff doors cost more), and the searches find the
+cheapest route. The searches used by the game run on a CompiledGraph, where
+rooms are dense integer ids and adjacency and costs are stored in flat arrays:
+
+- astar_ids: A* with the Manhattan distance as its estimate.
+- dijkstra_ids: Dijkstra's algorithm, with no estimate at all.
+- bidirectional_astar_ids: A* from the start and from the goal at once, stopping
+  when the two searches meet.
+- ALT: A* whose estimate also uses landmarks (triangle inequality lower bounds
+  from a few rooms whose costs to and from every room are precomputed per layout).
+
+search_ids runs any of them by name; 'auto' picks ALT when landmarks are
+available and the house is large enough for them to pay off, and plain A* otherwise. astar, dijkstra and bfs_path work on plain
+dictionaries of room names and serve as the readable reference versions.
+
+Routes found through find_path are memoized in a shared LRU cache. The cache
+is stamped with the graph's version and the rooms' connections version and is
+emptied as soon as either changes, so it never returns a route through a
+connection that no longer exists.
+"""
+
+import heapq
+from array import array
+from collections import OrderedDict, deque
+from typing import Callable, List, Dict, Optional, Set, Tuple
+from compiled_graph import CompiledGraph, ID_TYPE
+from constants import PATH_CACHE_SIZE, PATH_SEARCH_METHOD, LANDMARK_COUNT, ALT_MIN_ROOMS
+from room import Room, connections_version
+
+INF = float('inf')
+
+# Names accepted by search_ids and find_path
+SEARCH_METHODS = ('auto', 'astar', 'dijkstra', 'bidirectional', 'alt')
+
+
+class HouseGraph(dict):
+    """
+    Graph representation of the house: room name -> neighbouring room names.
+
+    Neighbour lists are stored as tuples so they cannot be changed in place;
+    every change goes through the mapping and bumps the version. Connections
+    that do not cost 1 have their cost in costs, which is changed through
+    set_cost so that it bumps the version too.
+
+    A layout hands over its precompiled graph and landmarks with the graph, so
+    the path cache does not have to build them again. Both are dropped as soon
+    as the graph changes.
+
+    Attributes:
+        version (int): Incremented every time the graph or a cost changes.
+        costs (Dict[Tuple[str, str], float]): Cost of every (from_room, to_room) connection that does not cost 1.
+        compiled (Optional[CompiledGraph]): The graph in compiled form, while it is unchanged.
+        landmarks (Optional[Landmarks]): ALT landmarks of compiled, while the graph is unchanged.
+    """
+
+    def __init__(
+        self,
+        adjacency: Optional[Dict[str, List[str]]] = None,
+        costs: Optional[Dict[Tuple[str, str], float]] = None,
+        compiled: Optional[CompiledGraph] = None,
+        landmarks: Optional['Landmarks'] = None
+    ) -> None:
+        """
+        Initializes the graph from adjacency lists.
+
+        Args:
+            adjacency (Optional[Dict[str, List[str]]]): Neighbouring room names for every room.
+            costs (Optional[Dict[Tuple[str, str], float]]): Cost of connections that do not cost 1.
+            compiled (Optional[CompiledGraph]): The same graph already compiled, if available.
+            landmarks (Optional[Landmarks]): Landmarks precomputed for compiled, if available.
+        """
+        super().__init__((name, tuple(neighbors)) for name, neighbors in (adjacency or {}).items())
+        self.version: int = 0
+        self.costs: Dict[Tuple[str, str], float] = dict(costs or {})
+        self.compiled: Optional[CompiledGraph] = compiled
+        self.landmarks: Optional[Landmarks] = landmarks
+
+    def _changed(self) -> None:
+        self.version += 1
+        self.compiled = None
+        self.landmarks = None
+
+    def __setitem__(self, name: str, neighbors) -> None:
+        super().__setitem__(name, tuple(neighbors))
+        self._changed()
+
+    def __delitem__(self, name: str) -> None:
+        super().__delitem__(name)
+        self._changed()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self) -> None:
+        super().clear()
+        self._changed()
+
+    def pop(self, *args):
+        result = super().pop(*args)
+        self._changed()
+        return result
+
+    def popitem(self):
+        result = super().popitem()
+        self._changed()
+        return result
+
+    def setdefault(self, name: str, neighbors=()):
+        if name not in self:
+            self[name] = neighbors
+        return self[name]
+
+    def update(self, *args, **kwargs) -> None:
+        for name, neighbors in dict(*args, **kwargs).items():
+            self[name] = neighbors
+
+    def cost(self, from_room: str, to_room: str) -> float:
+        """
+        Returns the cost of moving from one room to a neighbouring room.
+
+        Args:
+            from_room (str): The room moved from.
+            to_room (str): The room moved to.
+
+        Returns:
+            float: The traversal cost.
+        """
+        return self.costs.get((from_room, to_room), 1.0)
+
+    def set_cost(self, from_room: str, to_room: str, cost: float) -> None:
+        """
+        Changes the cost of a connection.
+
+        Args:
+            from_room (str): The room moved from.
+            to_room (str): The room moved to.
+            cost (float): The new traversal cost; must be positive.
+
+        Raises:
+            ValueError: If the cost is not positive.
+        """
+        if not cost > 0:
+            raise ValueError(f"Connection cost must be positive: {from_room} -> {to_room} costs {cost}.")
+        if cost == 1:
+            self.costs.pop((from_room, to_room), None)
+        else:
+            self.costs[(from_room, to_room)] = float(cost)
+        self._changed()
+
+
+def _edge_cost(graph: Dict[str, List[str]]) -> Optional[Callable[[str, str], float]]:
+    """
+    Returns the graph's cost lookup, or None if every move costs 1.
+    """
+    return graph.cost if isinstance(graph, HouseGraph) and graph.costs else None
+
+
+def max_step_length(graph: Dict[str, List[str]], rooms: Dict[str, Room]) -> float:
+    """
+    Returns the longest Manhattan distance covered per unit of traversal cost by any move in the house.
+
+    Args:
+        graph (Dict[str, List[str]]): The graph representation of the house.
+        rooms (Dict[str, Room]): Dictionary of Room objects.
+
+    Returns:
+        float: The longest distance per unit of cost between two connected rooms, or 0 if there
+            are no connections. With every move costing 1 this is the longest single move.
+    """
+    cost = _edge_cost(graph)
+    longest = 0.0
+    for a, neighbors in graph.items():
+        ax, ay = rooms[a].x, rooms[a].y
+        for b in neighbors:
+            distance = abs(ax - rooms[b].x) + abs(ay - rooms[b].y)
+            longest = max(longest, distance / cost(a, b) if cost else distance)
+    return longest
+
+
+def heuristic(a: str, b: str, rooms: Dict[str, Room], step_length: float) -> float:
+    """
+    Estimate the cost of moving from room a to room b.
+
+    No move covers more than step_length of Manhattan distance per unit of cost,
+    so the distance divided by step_length never overestimates the cost. This
+    keeps the estimate admissible and consistent, which is what lets A* return
+    cheapest paths without reopening rooms.
+
+    Args:
+        a (str): Name of the start room.
+        b (str): Name of the goal room.
+        rooms (Dict[str, Room]): Dictionary of Room objects.
+        step_length (float): The longest distance covered per unit of cost, from max_step_length.
+
+    Returns:
+        float: Lower bound on the cost of moving from room a to room b.
+    """
+    if step_length <= 0:
+        return 0.0
+    ax, ay = rooms[a].x, rooms[a].y
+    bx, by = rooms[b].x, rooms[b].y
+    return (abs(ax - bx) + abs(ay - by)) / step_length
+
+
+def _reconstruct_path(came_from: Dict[str, Optional[str]], goal: str) -> List[str]:
+    """
+    Follows came_from links back from the goal to build the path.
+
+    Args:
+        came_from (Dict[str, Optional[str]]): The room each room was reached from.
+        goal (str): The goal room name.
+
+    Returns:
+        List[str]: Room names from the start to the goal.
+    """
+    path: List[str] = []
+    current: Optional[str] = goal
+    while current is not None:
+        path.append(current)
+        current = came_from[current]
+    path.reverse()
+    return path
+
+
+def astar(
+    graph: Dict[str, List[str]],
+    start: str,
+    goal: str,
+    rooms: Dict[str, Room],
+    avoid: Optional[Set[str]] = None,
+    step_length: Optional[float] = None,
+    stats: Optional[Dict[str, int]] = None
+) -> Optional[List[str]]:
+    """
+    Perform A* search to find the cheapest path from start to goal.
+
+    Moves cost 1 unless the graph is a HouseGraph with other costs. Rooms are expanded at most once (closed set), and
+    among rooms with the same estimated total cost the one furthest from the
+    start is expanded first, then the one queued first, so results are
+    deterministic and fewer rooms are expanded on open floor plans.
+
+    Args:
+        graph (Dict[str, List[str]]): The graph representation of the house.
+        start (str): The starting room name.
+        goal (str): The goal room name.
+        rooms (Dict[str, Room]): Dictionary of Room objects.
+        avoid (Optional[Set[str]]): Rooms the path may not pass through (the goal itself is allowed).
+        step_length (Optional[float]): The longest distance covered per unit of cost. Computed
+            from the graph when not given; pass it in when searching the same graph repeatedly.
+        stats (Optional[Dict[str, int]]): If given, 'expanded' is set to the number of rooms expanded.
+
+    Returns:
+        Optional[List[str]]: A list of room names representing the cheapest path, or None if no path exists.
+    """
+    cost = _edge_cost(graph)
+    if step_length is None:
+        step_length = max_step_length(graph, rooms)
+
+    # Entries are (estimated total, -cost so far, insertion order, room)
+    order = 0
+    queue: List = [(heuristic(start, goal, rooms, step_length), 0, order, start)]
+    came_from: Dict[str, Optional[str]] = {start: None}
+    cost_so_far: Dict[str, float] = {start: 0}
+    closed: Set[str] = set()
+
+    try:
+        while queue:
+            _, _, _, current = heapq.heappop(queue)
+            if current in closed:
+                continue  # A stale entry left behind when a shorter route was found
+            closed.add(current)
+
+            if current == goal:
+                return _reconstruct_path(came_from, goal)
+
+            for neighbor in graph[current]:
+                if neighbor in closed:
+                    continue
+                if avoid and neighbor in avoid and neighbor != goal:
+                    continue
+                new_cost = cost_so_far[current] + (cost(current, neighbor) if cost else 1)
+                if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
+                    cost_so_far[neighbor] = new_cost
+                    came_from[neighbor] = current
+                    order += 1
+                    priority = new_cost + heuristic(neighbor, goal, rooms, step_length)
+                    heapq.heappush(queue, (priority, -new_cost, order, neighbor))
+
+        return None  # No path found
+    finally:
+        if stats is not None:
+            stats['expanded'] = len(closed)
+
+
+def bfs_path(
+    graph: Dict[str, List[str]],
+    start: str,
+    goal: str,
+    avoid: Optional[Set[str]] = None,
+    stats: Optional[Dict[str, int]] = None
+) -> Optional[List[str]]:
+    """
+    Breadth-first search for a path with the fewest moves. Used as a reference for A*.
+
+    Args:
+        graph (Dict[str, List[str]]): The graph representation of the house.
+        start (str): The starting room name.
+        goal (str): The goal room name.
+        avoid (Optional[Set[str]]): Rooms the path may not pass through (the goal itself is allowed).
+        stats (Optional[Dict[str, int]]): If given, 'expanded' is set to the number of rooms expanded.
+
+    Returns:
+        Optional[List[str]]: A list of room names representing the shortest path, or None if no path exists.
+    """
+    came_from: Dict[str, Optional[str]] = {start: None}
+    queue = deque([start])
+    expanded = 0
+    try:
+        while queue:
+            current = queue.popleft()
+            expanded += 1
+            if current == goal:
+                return _reconstruct_path(came_from, goal)
+            for neighbor in graph[current]:
+                if neighbor in came_from:
+                    continue
+                if avoid and neighbor in avoid and neighbor != goal:
+                    continue
+                came_from[neighbor] = current
+                queue.append(neighbor)
+        return None
+    finally:
+        if stats is not None:
+            stats['expanded'] = expanded
+
+
+def dijkstra(
+    graph: Dict[str, List[str]],
+    start: str,
+    goal: str,
+    avoid: Optional[Set[str]] = None,
+    stats: Optional[Dict[str, int]] = None
+) -> Optional[List[str]]:
+    """
+    Dijkstra's algorithm for the cheapest path. Used as a reference for the weighted searches.
+
+    Args:
+        graph (Dict[str, List[str]]): The graph representation of the house.
+        start (str): The starting room name.
+        goal (str): The goal room name.
+        avoid (Optional[Set[str]]): Rooms the path may not pass through (the goal itself is allowed).
+        stats (Optional[Dict[str, int]]): If given, 'expanded' is set to the number of rooms expanded.
+
+    Returns:
+        Optional[List[str]]: A list of room names representing the cheapest path, or None if no path exists.
+    """
+    cost = _edge_cost(graph)
+    came_from: Dict[str, Optional[str]] = {start: None}
+    cost_so_far: Dict[str, float] = {start: 0}
+    closed: Set[str] = set()
+    order = 0
+    queue: List = [(0, order, start)]
+    try:
+        while queue:
+            current_cost, _, current = heapq.heappop(queue)
+            if current in closed:
+                continue
+            closed.add(current)
+            if current == goal:
+                return _reconstruct_path(came_from, goal)
+            for neighbor in graph[current]:
+                if neighbor in closed:
+                    continue
+                if avoid and neighbor in avoid and neighbor != goal:
+                    continue
+                new_cost = current_cost + (cost(current, neighbor) if cost else 1)
+                if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
+                    cost_so_far[neighbor] = new_cost
+                    came_from[neighbor] = current
+                    order += 1
+                    heapq.heappush(queue, (new_cost, order, neighbor))
+        return None
+    finally:
+        if stats is not None:
+            stats['expanded'] = len(closed)
+
+
+def path_cost(graph: Dict[str, List[str]], path: List[str]) -> float:
+    """
+    Returns the total traversal cost of a path.
+
+    Args:
+        graph (Dict[str, List[str]]): The graph representation of the house.
+        path (List[str]): Room names from start to goal.
+
+    Returns:
+        float: The sum of the costs of its moves.
+    """
+    cost = _edge_cost(graph)
+    if cost is None:
+        return len(path) - 1
+    return sum(cost(a, b) for a, b in zip(path, path[1:]))
+
+
+def _distances(graph: CompiledGraph, source: int) -> array:
+    """
+    Dijkstra's algorithm from one room to every room.
+
+    Args:
+        graph (CompiledGraph): The compiled house graph (pass graph.reverse for costs to the source).
+        source (int): The room id searched from.
+
+    Returns:
+        array: The cheapest cost from source to every room, or inf where it cannot be reached.
+    """
+    offsets, neighbors, weights = graph.offsets, graph.neighbors, graph.weights
+    distance = array('d', [INF]) * len(graph)
+    distance[source] = 0.0
+    queue: List[Tuple[float, int]] = [(0.0, source)]
+    while queue:
+        current_cost, current = heapq.heappop(queue)
+        if current_cost > distance[current]:
+            continue
+        for k in range(offsets[current], offsets[current + 1]):
+            neighbor = neighbors[k]
+            new_cost = current_cost + weights[k]
+            if new_cost < distance[neighbor]:
+                distance[neighbor] = new_cost
+                heapq.heappush(queue, (new_cost, neighbor))
+    return distance
+
+
+class Landmarks:
+    """
+    Costs to and from a few landmark rooms, giving ALT lower bounds for A*.
+
+    For any landmark L the triangle inequality bounds the cost from room v to
+    room t from below by d(L, t) - d(L, v) and by d(v, L) - d(t, L). With
+    landmarks at the far edges of the house, behind or beyond the goal as seen
+    from the start, these bounds are close to the true cost even on winding or
+    weighted layouts where the Manhattan distance says little, so A* expands
+    far fewer rooms. An infinite bound proves the goal cannot be reached at all.
+
+    Landmarks are picked one after another as the room furthest from all the
+    landmarks picked so far. Building them runs two Dijkstra searches per
+    landmark; they are stored with the compiled layout, so this happens once
+    per layout. They take 16 bytes per room per landmark.
+
+    Attributes:
+        graph (CompiledGraph): The graph the landmarks were computed on.
+        rooms (List[int]): Ids of the landmark rooms.
+        from_landmark (List[array]): from_landmark[i][v] is the cost from landmark i to room v (inf if unreachable).
+        to_landmark (List[array]): to_landmark[i][v] is the cost from room v to landmark i (inf if unreachable).
+    """
+
+    def __init__(self, graph: CompiledGraph, count: int = LANDMARK_COUNT) -> None:
+        """
+        Picks the landmarks and computes their costs.
+
+        Args:
+            graph (CompiledGraph): The compiled house graph.
+            count (int): Number of landmarks to pick (fewer on tiny houses).
+        """
+        self.graph: CompiledGraph = graph
+        self.rooms: List[int] = []
+        self.from_landmark: List[array] = []
+        self.to_landmark: List[array] = []
+        n = len(graph)
+        if n == 0 or count <= 0:
+            return
+
+        # Cost between every room and the nearest landmark in either direction. The best connected
+        # room stands in for a landmark at first, so the first real one lands at the edge of the house.
+        # Rooms not connected to any landmark either way (inf) are never picked: a landmark in a
+        # closet cut off from the rest of the house bounds nothing.
+        offsets = graph.offsets
+        seed = max(range(n), key=lambda room: offsets[room + 1] - offsets[room])
+        nearest = array('d', map(min, _distances(graph, seed), _distances(graph.reverse, seed)))
+        for _ in range(min(count, n)):
+            room = max(range(n), key=lambda room: nearest[room] if nearest[room] < INF else -1.0)
+            if not 0 < nearest[room] < INF:
+                break  # Every connected room is a landmark already
+            from_row = _distances(graph, room)
+            to_row = _distances(graph.reverse, room)
+            self.rooms.append(room)
+            self.from_landmark.append(from_row)
+            self.to_landmark.append(to_row)
+            nearest = array('d', map(min, nearest, from_row, to_row))
+            nearest[room] = 0.0
+
+    @classmethod
+    def from_rows(
+        cls,
+        graph: CompiledGraph,
+        rooms: List[int],
+        from_landmark: List[array],
+        to_landmark: List[array]
+    ) -> 'Landmarks':
+        """
+        Rebuilds landmarks from costs computed earlier, such as those in a layout cache.
+
+        Args:
+            graph (CompiledGraph): The compiled house graph the costs were computed on.
+            rooms (List[int]): Ids of the landmark rooms.
+            from_landmark (List[array]): Costs from every landmark to every room.
+            to_landmark (List[array]): Costs from every room to every landmark.
+
+        Returns:
+            Landmarks: The landmarks.
+        """
+        landmarks = cls(graph, count=0)
+        landmarks.rooms = rooms
+        landmarks.from_landmark = from_landmark
+        landmarks.to_landmark = to_landmark
+        return landmarks
+
+    def __len__(self) -> int:
+        return len(self.rooms)
+
+
+def _lower_bound(
+    graph: CompiledGraph,
+    room: int,
+    landmarks: Optional[Landmarks],
+    towards: bool
+) -> Callable[[int], float]:
+    """
+    Builds an admissible, consistent estimate of the cost between any room and one fixed room.
+
+    The estimate is the Manhattan distance divided by the graph's step length,
+    raised to the best landmark bound when landmarks are given.
+
+    Args:
+        graph (CompiledGraph): The compiled house graph.
+        room (int): The fixed room id.
+        landmarks (Optional[Landmarks]): Landmarks of the graph, if any.
+        towards (bool): Estimate the cost from any room to room (True) or from room to any room (False).
+
+    Returns:
+        Callable[[int], float]: Maps a room id to its estimate; inf if the landmarks prove there is no path.
+    """
+    xs, ys = graph.xs, graph.ys
+    scale = 1 / graph.step_length if graph.step_length > 0 else 0.0
+    room_x, room_y = xs[room], ys[room]
+    if not landmarks:
+        def manhattan(v: int) -> float:
+            return (abs(xs[v] - room_x) + abs(ys[v] - room_y)) * scale
+        return manhattan
+
+    # Per landmark: distances from and to it, and those of the fixed room. Comparing with '>'
+    # skips the NaN that inf - inf gives when neither room is connected to a landmark.
+    rows = [
+        (from_row, to_row, from_row[room], to_row[room])
+        for from_row, to_row in zip(landmarks.from_landmark, landmarks.to_landmark)
+    ]
+    if towards:
+        def to_room(v: int) -> float:
+            best = (abs(xs[v] - room_x) + abs(ys[v] - room_y)) * scale
+            for from_row, to_row, from_room, to_room_cost in rows:
+                bound = from_room - from_row[v]  # d(L, room) - d(L, v)
+                if bound > best:
+                    best = bound
+                bound = to_row[v] - to_room_cost  # d(v, L) - d(room, L)
+                if bound > best:
+                    best = bound
+            return best
+        return to_room
+
+    def from_room(v: int) -> float:
+        best = (abs(xs[v] - room_x) + abs(ys[v] - room_y)) * scale
+        for from_row, to_row, from_room_cost, to_room in rows:
+            bound = from_row[v] - from_room_cost  # d(L, v) - d(L, room)
+            if bound > best:
+                best = bound
+            bound = to_room - to_row[v]  # d(room, L) - d(v, L)
+            if bound > best:
+                best = bound
+        return best
+    return from_room
+
+
+def _follow(came_from: Dict[int, int], room: int, end: int) -> List[int]:
+    """
+    Follows came_from links from a room until end is reached.
+
+    Args:
+        came_from (Dict[int, int]): The room each reached room was reached from.
+        room (int): The room id to start at.
+        end (int): The room id to stop at.
+
+    Returns:
+        List[int]: Room ids from room to end.
+    """
+    path = [room]
+    while room != end:
+        room = came_from[room]
+        path.append(room)
+    return path
+
+
+def astar_ids(
+    graph: CompiledGraph,
+    start: int,
+    goal: int,
+    avoid: Optional[Set[int]] = None,
+    stats: Optional[Dict[str, int]] = None,
+    landmarks: Optional[Landmarks] = None
+) -> Optional[List[int]]:
+    """
+    A* search on a compiled graph. Same costs, heuristic and tie-breaking as astar.
+
+    Per-room search state is kept only for the rooms the search reaches, so a
+    query costs nothing for the rest of the house, however large it is. Given
+    landmarks, this is ALT: the estimate is also
+    raised to the landmark lower bounds, and rooms from which the landmarks
+    prove the goal unreachable are never queued.
+
+    Args:
+        graph (CompiledGraph): The compiled house graph.
+        start (int): The starting room id.
+        goal (int): The goal room id.
+        avoid (Optional[Set[int]]): Room ids the path may not pass through (the goal itself is allowed).
+        stats (Optional[Dict[str, int]]): If given, 'expanded' is set to the number of rooms expanded.
+        landmarks (Optional[Landmarks]): Landmarks of the graph, for ALT.
+
+    Returns:
+        Optional[List[int]]: Room ids from start to goal, or None if no path exists.
+    """
+    offsets, neighbors, weights, xs, ys = graph.offsets, graph.neighbors, graph.weights, graph.xs, graph.ys
+    scale = 1 / graph.step_length if graph.step_length > 0 else 0.0
+    goal_x, goal_y = xs[goal], ys[goal]
+    # The Manhattan estimate is inlined below; the landmark one needs a loop per room
+    estimate = _lower_bound(graph, goal, landmarks, towards=True) if landmarks else None
+    cost_so_far: Dict[int, float] = {start: 0.0}
+    came_from: Dict[int, int] = {}
+    closed: Set[int] = set()
+    expanded = 0
+
+    order = 0
+    first_estimate = estimate(start) if estimate else (abs(xs[start] - goal_x) + abs(ys[start] - goal_y)) * scale
+    queue: List = [(first_estimate, 0, order, start)]
+    try:
+        while queue:
+            _, _, _, current = heapq.heappop(queue)
+            if current in closed:
+                continue  # A stale entry left behind when a cheaper route was found
+            closed.add(current)
+            expanded += 1
+
+            if current == goal:
+                path = _follow(came_from, goal, start)
+                path.reverse()
+                return path
+
+            current_cost = cost_so_far[current]
+            for k in range(offsets[current], offsets[current + 1]):
+                neighbor = neighbors[k]
+                if neighbor in closed:
+                    continue
+                if avoid and neighbor in avoid and neighbor != goal:
+                    continue
+                new_cost = current_cost + weights[k]
+                if new_cost < cost_so_far.get(neighbor, INF):
+                    if estimate is None:
+                        remaining = (abs(xs[neighbor] - goal_x) + abs(ys[neighbor] - goal_y)) * scale
+                    else:
+                        remaining = estimate(neighbor)
+                        if remaining == INF:
+                            continue  # The landmarks prove the goal cannot be reached from this room
+                    cost_so_far[neighbor] = new_cost
+                    came_from[neighbor] = current
+                    order += 1
+                    heapq.heappush(queue, (new_cost + remaining, -new_cost, order, neighbor))
+
+        return None  # No path found
+    finally:
+        if stats is not None:
+            stats['expanded'] = expanded
+
+
+def dijkstra_ids(
+    graph: CompiledGraph,
+    start: int,
+    goal: int,
+    avoid: Optional[Set[int]] = None,
+    stats: Optional[Dict[str, int]] = None
+) -> Optional[List[int]]:
+    """
+    Dijkstra's algorithm on a compiled graph: A* without an estimate.
+
+    It expands every room cheaper to reach than the goal, so it is mostly a
+    baseline, but it needs no coordinates and does no work per room beyond the heap.
+
+    Args:
+        graph (CompiledGraph): The compiled house graph.
+        start (int): The starting room id.
+        goal (int): The goal room id.
+        avoid (Optional[Set[int]]): Room ids the path may not pass through (the goal itself is allowed).
+        stats (Optional[Dict[str, int]]): If given, 'expanded' is set to the number of rooms expanded.
+
+    Returns:
+        Optional[List[int]]: Room ids from start to goal, or None if no path exists.
+    """
+    offsets, neighbors, weights = graph.offsets, graph.neighbors, graph.weights
+    cost_so_far: Dict[int, float] = {start: 0.0}
+    came_from: Dict[int, int] = {}
+    closed: Set[int] = set()
+    expanded = 0
+
+    order = 0
+    queue: List = [(0.0, order, start)]
+    try:
+        while queue:
+            current_cost, _, current = heapq.heappop(queue)
+            if current in closed:
+                continue
+            closed.add(current)
+            expanded += 1
+
+            if current == goal:
+                path = _follow(came_from, goal, start)
+                path.reverse()
+                return path
+
+            for k in range(offsets[current], offsets[current + 1]):
+                neighbor = neighbors[k]
+                if neighbor in closed:
+                    continue
+                if avoid and neighbor in avoid and neighbor != goal:
+                    continue
+                new_cost = current_cost + weights[k]
+                if new_cost < cost_so_far.get(neighbor, INF):
+                    cost_so_far[neighbor] = new_cost
+                    came_from[neighbor] = current
+                    order += 1
+                    heapq.heappush(queue, (new_cost, order, neighbor))
+
+        return None
+    finally:
+        if stats is not None:
+            stats['expanded'] = expanded
+
+
+def bidirectional_astar_ids(
+    graph: CompiledGraph,
+    start: int,
+    goal: int,
+    avoid: Optional[Set[int]] = None,
+    stats: Optional[Dict[str, int]] = None,
+    landmarks: Optional[Landmarks] = None
+) -> Optional[List[int]]:
+    """
+    Bidirectional A* on a compiled graph.
+
+    One search runs forwards from the start and one backwards from the goal
+    over the reversed graph, each time expanding the side whose next room has
+    the lower key. Both use the average potential p(v) = (h_goal(v) - h_start(v)) / 2
+    (forwards) and -p(v) (backwards), where h_goal bounds the cost from v to the
+    goal and h_start the cost from the start to v. The two searches then work on
+    the same consistent reduced costs, so they can stop as soon as the smallest
+    keys on both sides add up to the cheapest route found where they meet.
+
+    Args:
+        graph (CompiledGraph): The compiled house graph.
+        start (int): The starting room id.
+        goal (int): The goal room id.
+        avoid (Optional[Set[int]]): Room ids the path may not pass through (the goal itself is allowed).
+        stats (Optional[Dict[str, int]]): If given, 'expanded' is set to the number of rooms expanded
+            by both searches together.
+        landmarks (Optional[Landmarks]): Landmarks of the graph, to tighten both estimates.
+
+    Returns:
+        Optional[List[int]]: Room ids from start to goal, or None if no path exists.
+    """
+    if start == goal:
+        if stats is not None:
+            stats['expanded'] = 1
+        return [start]
+
+    to_goal = _lower_bound(graph, goal, landmarks, towards=True)
+    from_start = _lower_bound(graph, start, landmarks, towards=False)
+    reverse = graph.reverse
+    # Index 0 is the forward search from the start, index 1 the backward search from the goal
+    csr = ((graph.offsets, graph.neighbors, graph.weights), (reverse.offsets, reverse.neighbors, reverse.weights))
+    cost_so_far: Tuple[Dict[int, float], Dict[int, float]] = ({start: 0.0}, {goal: 0.0})
+    came_from: Tuple[Dict[int, int], Dict[int, int]] = ({}, {})
+    closed: Tuple[Set[int], Set[int]] = (set(), set())
+    sign = (0.5, -0.5)
+    ends = (goal, start)  # The room each side may enter even if it is avoided
+    expanded = 0
+
+    order = 0
+    potential = (to_goal(start) - from_start(start)) * 0.5
+    queues: Tuple[List, List] = (
+        [(potential, 0, order, start)],
+        [(-(to_goal(goal) - from_start(goal)) * 0.5, 0, order, goal)]
+    )
+    best = INF
+    meeting: Optional[Tuple[int, int]] = None  # (room reached forwards, room reached backwards)
+    try:
+        while queues[0] and queues[1]:
+            if queues[0][0][0] + queues[1][0][0] >= best:
+                break  # No route through an unexpanded room can be cheaper
+            side = 0 if queues[0][0][0] <= queues[1][0][0] else 1
+            _, _, _, current = heapq.heappop(queues[side])
+            own_closed = closed[side]
+            if current in own_closed:
+                continue
+            own_closed.add(current)
+            expanded += 1
+
+            offsets, neighbors, weights = csr[side]
+            own_cost, other_cost = cost_so_far[side], cost_so_far[1 - side]
+            own_came_from, end, scale = came_from[side], ends[side], sign[side]
+            current_cost = own_cost[current]
+            for k in range(offsets[current], offsets[current + 1]):
+                neighbor = neighbors[k]
+                if avoid and neighbor in avoid and neighbor != end:
+                    continue
+                new_cost = current_cost + weights[k]
+                other = other_cost.get(neighbor)
+                if other is not None and new_cost + other < best:
+                    best = new_cost + other
+                    meeting = (current, neighbor) if side == 0 else (neighbor, current)
+                if neighbor in own_closed or new_cost >= own_cost.get(neighbor, INF):
+                    continue
+                potential = (to_goal(neighbor) - from_start(neighbor)) * scale
+                if potential == INF or potential == -INF or potential != potential:
+                    continue  # The landmarks prove no route from the start to the goal passes here
+                own_cost[neighbor] = new_cost
+                own_came_from[neighbor] = current
+                order += 1
+                heapq.heappush(queues[side], (new_cost + potential, -new_cost, order, neighbor))
+
+        if meeting is None:
+            return None
+        path = _follow(came_from[0], meeting[0], start)
+        path.reverse()
+        path.extend(_follow(came_from[1], meeting[1], goal))
+        return path
+    finally:
+        if stats is not None:
+            stats['expanded'] = expanded
+
+
+def search_ids(
+    graph: CompiledGraph,
+    start: int,
+    goal: int,
+    avoid: Optional[Set[int]] = None,
+    stats: Optional[Dict[str, int]] = None,
+    method: str = 'auto',
+    landmarks: Optional[Landmarks] = None
+) -> Optional[List[int]]:
+    """
+    Finds the cheapest path on a compiled graph with the chosen search.
+
+    Every method returns a path of the same, cheapest cost; they differ in how
+    many rooms they expand on the way and in the work per room. 'auto' is ALT
+    when landmarks are given and the house has at least ALT_MIN_ROOMS rooms,
+    where it expands the fewest rooms and is the fastest, and A* otherwise: on
+    small houses the landmark bounds cost more per room than they save.
+
+    Args:
+        graph (CompiledGraph): The compiled house graph.
+        start (int): The starting room id.
+        goal (int): The goal room id.
+        avoid (Optional[Set[int]]): Room ids the path may not pass through (the goal itself is allowed).
+        stats (Optional[Dict[str, int]]): If given, 'expanded' is set to the number of rooms expanded.
+        method (str): One of SEARCH_METHODS.
+        landmarks (Optional[Landmarks]): Landmarks of the graph; required for 'alt'.
+
+    Returns:
+        Optional[List[int]]: Room ids from start to goal, or None if no path exists.
+
+    Raises:
+        ValueError: If the method is unknown, or is 'alt' without landmarks.
+    """
+    if method == 'auto':
+        method = 'alt' if landmarks and len(graph) >= ALT_MIN_ROOMS else 'astar'
+    if method == 'astar':
+        return astar_ids(graph, start, goal, avoid, stats)
+    if method == 'alt':
+        if not landmarks:
+            raise ValueError("The 'alt' search needs landmarks.")
+        return astar_ids(graph, start, goal, avoid, stats, landmarks)
+    if method == 'dijkstra':
+        return dijkstra_ids(graph, start, goal, avoid, stats)
+    if method == 'bidirectional':
+        return bidirectional_astar_ids(graph, start, goal, avoid, stats)
+    raise ValueError(f"Unknown search method: {method}.")
+
+
+class PathCache:
+    """
+    LRU cache of search results keyed by (start, goal, avoided rooms) and the graph version.
+
+    Only HouseGraph graphs are cached, because plain dictionaries have no
+    version to tell when they change; other graphs are searched every time.
+    The cache also keeps the compiled form of the current graph and its
+    landmarks, which its searches run on. Both are taken from the graph when a
+    layout precomputed them, and otherwise compiled when the graph changes.
+    Every search method finds a route of the same cost, so routes are shared
+    between methods.
+
+    Attributes:
+        capacity (int): Maximum number of routes kept.
+        hits (int): Lookups served from the cache.
+        misses (int): Lookups that ran a search.
+        invalidations (int): Times the cache was emptied because the graph or the connections changed.
+    """
+
+    def __init__(self, capacity: int = PATH_CACHE_SIZE) -> None:
+        """
+        Initializes an empty cache.
+
+        Args:
+            capacity (int): Maximum number of routes kept.
+        """
+        self.capacity: int = capacity
+        self.hits: int = 0
+        self.misses: int = 0
+        self.invalidations: int = 0
+        self._paths: OrderedDict = OrderedDict()
+        self._graph: Optional[HouseGraph] = None
+        self._version: Optional[Tuple[int, int]] = None
+        self._compiled: Optional[CompiledGraph] = None
+        self._landmarks: Optional[Landmarks] = None
+
+    def find(
+        self,
+        graph: Dict[str, List[str]],
+        start: str,
+        goal: str,
+        rooms: Dict[str, Room],
+        avoid: Optional[Set[str]] = None,
+        method: str = PATH_SEARCH_METHOD
+    ) -> Optional[List[str]]:
+        """
+        Returns the cheapest path from start to goal, from the cache when it was found before.
+
+        Args:
+            graph (Dict[str, List[str]]): The graph representation of the house.
+            start (str): The starting room name.
+            goal (str): The goal room name.
+            rooms (Dict[str, Room]): Dictionary of Room objects.
+            avoid (Optional[Set[str]]): Rooms the path may not pass through (the goal itself is allowed).
+            method (str): The search to run on a miss, one of SEARCH_METHODS. 'alt' computes
+                landmarks for the graph if its layout did not.
+
+        Returns:
+            Optional[List[str]]: A new list of room names from start to goal, or None if no path exists.
+        """
+        if not isinstance(graph, HouseGraph):
+            self.misses += 1
+            return astar(graph, start, goal, rooms, avoid)
+
+        version = (graph.version, connections_version())
+        if graph is not self._graph or version != self._version:
+            if self._paths:
+                self.invalidations += 1
+            self._paths.clear()
+            self._graph = graph
+            self._version = version
+            self._compiled = graph.compiled
+            self._landmarks = graph.landmarks
+
+        key = (start, goal, frozenset(avoid) if avoid else None)
+        if key in self._paths:
+            self._paths.move_to_end(key)
+            self.hits += 1
+            path = self._paths[key]
+            return list(path) if path is not None else None
+
+        self.misses += 1
+        if self._compiled is None:
+            self._compiled = CompiledGraph.from_graph(graph, rooms)
+        compiled = self._compiled
+        if method == 'alt' and self._landmarks is None:
+            self._landmarks = Landmarks(compiled)
+        avoid_ids = {compiled.index[name] for name in avoid if name in compiled.index} if avoid else None
+        path_ids = search_ids(
+            compiled, compiled.index[start], compiled.index[goal], avoid_ids,
+            method=method, landmarks=self._landmarks
+        )
+        path = compiled.names_of(path_ids) if path_ids is not None else None
+        self._paths[key] = tuple(path) if path is not None else None
+        if len(self._paths) > self.capacity:
+            self._paths.popitem(last=False)
+        return path
+
+    def clear(self) -> None:
+        """
+        Drops every cached route and resets the counters.
+        """
+        self._paths.clear()
+        self._graph = None
+        self._version = None
+        self._compiled = None
+        self._landmarks = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the cache's size and hit counters.
+
+        Returns:
+            Dict[str, float]: size, capacity, hits, misses, invalidations and hit_rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._paths),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+
+# Shared by the player's routes and the agent
+path_cache = PathCache()
+
+
+def find_path(
+    graph: Dict[str, List[str]],
+    start: str,
+    goal: str,
+    rooms: Dict[str, Room],
+    avoid: Optional[Set[str]] = None,
+    method: str = PATH_SEARCH_METHOD
+) -> Optional[List[str]]:
+    """
+    Finds the cheapest path from start to goal through the shared path cache.
+
+    Args:
+        graph (Dict[str, List[str]]): The graph representation of the house.
+        start (str): The starting room name.
+        goal (str): The goal room name.
+        rooms (Dict[str, Room]): Dictionary of Room objects.
+        avoid (Optional[Set[str]]): Rooms the path may not pass through (the goal itself is allowed).
+        method (str): The search to use, one of SEARCH_METHODS.
+
+    Returns:
+        Optional[List[str]]: A list of room names representing the cheapest path, or None if no path exists.
+    """
+    return path_cache.find(graph, start, goal, rooms, avoid, method)
+
+
+class NextHopTable:
+    """
+    The first step of a cheapest path between every pair of rooms.
+
+    Built by a breadth-first search from every room of a compiled graph (Dijkstra's
+    algorithm when connections have different costs), so building it costs
+    O(V * (V + E)), or O(V * E log V), once per layout. Each room has one row,
+    a flat array of V room ids (-1 where the goal is unreachable or is the
+    room itself), so the table takes 4 to 8 bytes per pair of rooms and
+    finding the next room towards any goal is two array lookups.
+
+    Attributes:
+        graph (CompiledGraph): The graph the table was built from.
+        rows (List[array]): rows[start][goal] is the id of the next room, or -1.
+    """
+
+    def __init__(self, graph: CompiledGraph) -> None:
+        """
+        Builds the table.
+
+        Args:
+            graph (CompiledGraph): The compiled house graph.
+        """
+        self.graph: CompiledGraph = graph
+        build_row = self._dijkstra_row if graph.weighted else self._bfs_row
+        self.rows: List[array] = [build_row(start) for start in range(len(graph))]
+
+    @classmethod
+    def from_rows(cls, graph: CompiledGraph, rows: List[array]) -> 'NextHopTable':
+        """
+        Rebuilds a table from rows computed earlier, such as those in a layout cache.
+
+        Args:
+            graph (CompiledGraph): The compiled house graph the rows were built from.
+            rows (List[array]): One row of next room ids per room.
+
+        Returns:
+            NextHopTable: The table.
+        """
+        table = cls.__new__(cls)
+        table.graph = graph
+        table.rows = rows
+        return table
+
+    def _bfs_row(self, start: int) -> array:
+        """
+        Finds the first step from one room towards every other room.
+
+        Args:
+            start (int): The starting room id.
+
+        Returns:
+            array: The next room id towards every goal, or -1.
+        """
+        offsets, neighbors = self.graph.offsets, self.graph.neighbors
+        row = array(ID_TYPE, [-1]) * len(self.graph)
+        queue = deque()
+        for k in range(offsets[start], offsets[start + 1]):
+            neighbor = neighbors[k]
+            if neighbor != start and row[neighbor] < 0:
+                row[neighbor] = neighbor
+                queue.append(neighbor)
+        while queue:
+            current = queue.popleft()
+            first_hop = row[current]
+            for k in range(offsets[current], offsets[current + 1]):
+                neighbor = neighbors[k]
+                if neighbor != start and row[neighbor] < 0:
+                    row[neighbor] = first_hop
+                    queue.append(neighbor)
+        return row
+
+    def _dijkstra_row(self, start: int) -> array:
+        """
+        Finds the first step of the cheapest path from one room towards every other room.
+
+        Args:
+            start (int): The starting room id.
+
+        Returns:
+            array: The next room id towards every goal, or -1.
+        """
+        offsets, neighbors, weights = self.graph.offsets, self.graph.neighbors, self.graph.weights
+        n = len(self.graph)
+        row = array(ID_TYPE, [-1]) * n
+        distance = array('d', [INF]) * n
+        distance[start] = 0.0
+        queue: List[Tuple[float, int]] = [(0.0, start)]
+        while queue:
+            current_cost, current = heapq.heappop(queue)
+            if current_cost > distance[current]:
+                continue
+            # Rooms reached from the start are their own first step; the rest inherit it
+            first_hop = row[current]
+            for k in range(offsets[current], offsets[current + 1]):
+                neighbor = neighbors[k]
+                new_cost = current_cost + weights[k]
+                if new_cost < distance[neighbor]:
+                    distance[neighbor] = new_cost
+                    row[neighbor] = neighbor if current == start else first_hop
+                    heapq.heappush(queue, (new_cost, neighbor))
+        return row
+
+    def next_hop(self, start: str, goal: str) -> Optional[str]:
+        """
+        Looks up the next room on a cheapest path from start to goal.
+
+        Args:
+            start (str): The current room name.
+            goal (str): The goal room name.
+
+        Returns:
+            Optional[str]: The neighbouring room to move to, or None if start is the
+                goal or the goal cannot be reached.
+        """
+        index = self.graph.index
+        if start not in index or goal not in index:
+            return None
+        hop = self.rows[index[start]][index[goal]]
+        return self.graph.names[hop] if hop >= 0 else None
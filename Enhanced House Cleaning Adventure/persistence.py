@@ -0,0 +1,410 @@
+# persistence.py
+
+"""
+Write-behind persistence for the game state.
+
+Instead of rewriting every row at the end of each frame, the GameSaver collects
+the Player, Agent and Room objects whose state changed and writes only those rows,
+in a single transaction, at a fixed interval or when the game asks for it.
+
+Writes can be handed to a DatabaseWriter, a background thread that owns its own
+SQLite connection, so the render loop never waits on a commit. When the live
+database is held in memory, the BackupScheduler copies it to disk instead.
+"""
+
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+from constants import SAVE_INTERVAL, WRITER_BATCH_SIZE, BACKUP_INTERVAL, BACKUP_ON_GAME_END
+from database import get_connection, close_connection, backup_database, is_in_memory
+from room import Room, RoomRegistry
+from player import Player
+from agent import Agent
+
+
+class DatabaseWriter(threading.Thread):
+    """
+    Background thread that applies queued writes to the database in batches.
+
+    Each submitted batch is a list of (sql, params) records. The thread merges
+    whatever batches are waiting, up to batch_size, into a single transaction.
+    If that transaction fails, the failure is reported on stderr straight away
+    and the game objects whose changes were lost are handed back through
+    take_failed(), so their owner can flag them to be saved again.
+
+    Attributes:
+        batch_size (int): Maximum number of queued batches committed per transaction.
+        error (Optional[sqlite3.Error]): The last error raised while writing, if any.
+    """
+
+    def __init__(self, batch_size: int = WRITER_BATCH_SIZE) -> None:
+        """
+        Initializes the writer. Call start() to begin draining the queue.
+
+        Args:
+            batch_size (int): Maximum number of queued batches committed per transaction.
+        """
+        super().__init__(name='DatabaseWriter', daemon=True)
+        self.batch_size: int = batch_size
+        self.error: Optional[sqlite3.Error] = None
+        self._queue: queue.Queue = queue.Queue()
+        self._closed: bool = False
+        self._failed: List = []
+        self._failed_lock = threading.Lock()
+
+    def submit(self, records: List[Tuple[str, tuple]], owners: Iterable = ()) -> None:
+        """
+        Queues a batch of records to be written in the same transaction.
+
+        Args:
+            records (List[Tuple[str, tuple]]): SQL statements and their parameters.
+            owners (Iterable): The game objects whose changes the records save. They are
+                handed back by take_failed() if the transaction fails.
+        """
+        if self._closed:
+            raise RuntimeError("DatabaseWriter is closed.")
+        if records:
+            self._queue.put((records, list(owners)))
+
+    def take_failed(self) -> List:
+        """
+        Returns the owners of every batch that failed since the last call, and forgets them.
+
+        Call it from the game loop's thread, which can then safely flag them for saving.
+
+        Returns:
+            List: Game objects whose changes were not written.
+        """
+        with self._failed_lock:
+            failed, self._failed = self._failed, []
+        return failed
+
+    def flush(self) -> None:
+        """
+        Blocks until every submitted record has been committed.
+
+        Raises:
+            sqlite3.Error: If a queued write failed since the last flush.
+        """
+        self._queue.join()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def close(self) -> None:
+        """
+        Flushes pending writes, then stops the thread and closes its connection.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)  # Sentinel that stops the thread
+        self.join()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def run(self) -> None:
+        """
+        Drains the queue until the stop sentinel arrives.
+        """
+        # The connection is created here so it belongs to the writer thread
+        conn = get_connection()
+        try:
+            stopping = False
+            while not stopping:
+                batches = [self._queue.get()]
+                while len(batches) < self.batch_size:
+                    try:
+                        batches.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                if batches[-1] is None:
+                    stopping = True
+
+                try:
+                    with conn:
+                        for batch in batches:
+                            if batch is None:
+                                continue
+                            for sql, params in batch[0]:
+                                conn.execute(sql, params)
+                except sqlite3.Error as e:
+                    self.error = e
+                    owners = [owner for batch in batches if batch is not None for owner in batch[1]]
+                    with self._failed_lock:
+                        self._failed.extend(owners)
+                    print(
+                        f"Database write failed ({e}); {len(owners)} objects will be saved again.",
+                        file=sys.stderr
+                    )
+                finally:
+                    for _ in batches:
+                        self._queue.task_done()
+        finally:
+            close_connection()
+
+
+class BackupScheduler:
+    """
+    Backs up the in-memory database to disk on a timer and on important events.
+
+    Does nothing when the live database is a file.
+
+    Attributes:
+        enabled (bool): True if the live database is held in memory.
+        backup_interval (float): Minimum number of seconds between timed backups.
+        backup_on_game_end (bool): Whether a won or lost game triggers a backup.
+        last_backup (float): Monotonic timestamp of the last backup.
+    """
+
+    def __init__(
+        self,
+        backup_interval: float = BACKUP_INTERVAL,
+        backup_on_game_end: bool = BACKUP_ON_GAME_END
+    ) -> None:
+        """
+        Initializes the scheduler.
+
+        Args:
+            backup_interval (float): Minimum number of seconds between timed backups.
+            backup_on_game_end (bool): Whether a won or lost game triggers a backup.
+        """
+        self.enabled: bool = is_in_memory()
+        self.backup_interval: float = backup_interval
+        self.backup_on_game_end: bool = backup_on_game_end
+        self.last_backup: float = time.monotonic()
+
+    def backup(self) -> bool:
+        """
+        Backs up the in-memory database now.
+
+        Returns:
+            bool: True if a backup was written.
+        """
+        self.last_backup = time.monotonic()
+        return self.enabled and backup_database()
+
+    def maybe_backup(self) -> bool:
+        """
+        Backs up the in-memory database if the backup interval has elapsed.
+
+        Returns:
+            bool: True if a backup was written.
+        """
+        if time.monotonic() - self.last_backup < self.backup_interval:
+            return False
+        return self.backup()
+
+    def seconds_until_due(self) -> Optional[float]:
+        """
+        Returns how long until the next timed backup is due.
+
+        Returns:
+            Optional[float]: Seconds until maybe_backup() would back up (0 if overdue),
+                or None if backups are disabled.
+        """
+        if not self.enabled:
+            return None
+        return max(0.0, self.last_backup + self.backup_interval - time.monotonic())
+
+    def game_ended(self) -> bool:
+        """
+        Backs up the in-memory database after a win or loss, if configured to.
+
+        Returns:
+            bool: True if a backup was written.
+        """
+        return self.backup_on_game_end and self.backup()
+
+
+class GameSaver:
+    """
+    Persists changed game objects to the database in batches.
+
+    Attributes:
+        conn (sqlite3.Connection): The database connection.
+        session_id (int): The game session id.
+        player (Player): The player being tracked.
+        agents (List[Agent]): The agents being tracked.
+        rooms (RoomRegistry): All rooms being tracked, with their index of unsaved rooms.
+        writer (Optional[DatabaseWriter]): Background writer that applies the saves,
+            or None to write synchronously on conn.
+        save_interval (float): Minimum number of seconds between interval saves.
+        last_save (float): Monotonic timestamp of the last save.
+    """
+
+    def __init__(
+        self,
+        conn,
+        session_id: int,
+        player: Player,
+        agents: Iterable[Agent],
+        rooms: RoomRegistry,
+        writer: Optional[DatabaseWriter] = None,
+        save_interval: float = SAVE_INTERVAL
+    ) -> None:
+        """
+        Initializes the saver with the objects it should track.
+
+        Args:
+            conn (sqlite3.Connection): The database connection.
+            session_id (int): The game session id.
+            player (Player): The player to track.
+            agents (Iterable[Agent]): The agents to track.
+            rooms (RoomRegistry): All rooms to track.
+            writer (Optional[DatabaseWriter]): Background writer to hand saves to.
+            save_interval (float): Minimum number of seconds between interval saves.
+        """
+        self.conn = conn
+        self.session_id: int = session_id
+        self.player: Player = player
+        self.agents: List[Agent] = list(agents)
+        self.rooms: RoomRegistry = rooms
+        self.writer: Optional[DatabaseWriter] = writer
+        self.save_interval: float = save_interval
+        self.last_save: float = time.monotonic()
+
+    def changed_rooms(self) -> List[Room]:
+        """
+        Returns the rooms whose state changed since they were last saved.
+
+        Read from the registry's unsaved index, so it does not scan the house.
+
+        Returns:
+            List[Room]: Rooms that need to be written.
+        """
+        return self.rooms.unsaved_rooms()
+
+    def has_changes(self) -> bool:
+        """
+        Checks whether any tracked object has unsaved changes.
+
+        Costs the same however many rooms the house has, since the loop asks
+        this every time it works out how long it may sleep.
+
+        Returns:
+            bool: True if at least one row needs to be written.
+        """
+        self._recover_failed()
+        return (
+            self.player.needs_save
+            or self.rooms.unsaved_count > 0
+            or any(agent.needs_save for agent in self.agents)
+        )
+
+    def changed_objects(self) -> List:
+        """
+        Returns every tracked object with unsaved changes.
+
+        Returns:
+            List: The changed Player, Agent and Room objects.
+        """
+        objects = []
+        if self.player.needs_save:
+            objects.append(self.player)
+        objects.extend(agent for agent in self.agents if agent.needs_save)
+        objects.extend(self.changed_rooms())
+        return objects
+
+    def collect_records(self) -> Tuple[List[Tuple[str, tuple]], List]:
+        """
+        Builds the save statements for every changed object and clears their flags.
+
+        The flags are cleared before the records are committed; if the commit
+        fails, the returned objects must be flagged again (see _reflag).
+
+        Returns:
+            Tuple[List[Tuple[str, tuple]], List]: SQL statements and their parameters,
+                and the objects they save.
+        """
+        records = []
+        objects = self.changed_objects()
+        for obj in objects:
+            records.append(obj.db_record(self.session_id))
+            obj.needs_save = False
+        return records, objects
+
+    def _reflag(self, objects: Iterable) -> None:
+        """
+        Flags objects whose saves were lost so the next save writes them again.
+
+        Args:
+            objects (Iterable): Player, Agent and Room objects.
+        """
+        for obj in objects:
+            obj.needs_save = True
+
+    def _recover_failed(self) -> None:
+        """
+        Flags again the objects of every background write that failed.
+        """
+        if self.writer is not None:
+            self._reflag(self.writer.take_failed())
+
+    def save(self) -> int:
+        """
+        Writes every changed row in a single transaction.
+
+        Call this directly on important events (win, lose, quit), followed by
+        flush() when later reads must see the saved rows.
+
+        Returns:
+            int: The number of rows written or queued.
+
+        Raises:
+            sqlite3.Error: If writing synchronously failed; the objects stay flagged.
+        """
+        self.last_save = time.monotonic()
+        self._recover_failed()
+        records, objects = self.collect_records()
+        if not records:
+            return 0
+
+        if self.writer is not None:
+            self.writer.submit(records, objects)
+        else:
+            try:
+                # The connection context manager commits once, or rolls back on error
+                with self.conn:
+                    for sql, params in records:
+                        self.conn.execute(sql, params)
+            except sqlite3.Error:
+                self._reflag(objects)
+                raise
+        return len(records)
+
+    def maybe_save(self) -> int:
+        """
+        Saves changed rows if the save interval has elapsed.
+
+        Returns:
+            int: The number of rows written or queued, 0 if the interval has not elapsed.
+        """
+        if time.monotonic() - self.last_save < self.save_interval:
+            return 0
+        return self.save()
+
+    def seconds_until_due(self) -> Optional[float]:
+        """
+        Returns how long until maybe_save() would write the pending changes.
+
+        Returns:
+            Optional[float]: Seconds until the next save (0 if overdue), or None if
+                nothing has changed, so there is nothing to wake up for.
+        """
+        if not self.has_changes():
+            return None
+        return max(0.0, self.last_save + self.save_interval - time.monotonic())
+
+    def flush(self) -> None:
+        """
+        Saves any changed rows and waits until the writer has committed them.
+        """
+        self.save()
+        if self.writer is not None:
+            self.writer.flush()
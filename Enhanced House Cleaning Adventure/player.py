@@ -6,6 +6,8 @@ Contains the Player class, representing the player character in the game.
 
 from typing import Dict, List
 from room import Room
+from journal import EVENT_MOVE, EVENT_CLEAN
+from session import GOAL_ROOM
 
 
 class Player:
@@ -14,6 +16,8 @@ class Player:
 
     Attributes:
         current_room (Room): The room where the player is currently located.
+        needs_save (bool): True if the player moved since the last save.
+        journal (Optional[GameJournal]): Journal that records the player's actions, if any.
     """
 
     def __init__(self, current_room: Room) -> None:
@@ -24,45 +28,67 @@ class Player:
             current_room (Room): The room where the player starts.
         """
         self.current_room: Room = current_room
+        self.needs_save: bool = False
+        self.journal = None
 
     @classmethod
-    def load_from_db(cls, conn, rooms, username):
+    def load_from_db(cls, conn, rooms, session_id):
         """
         Load player data from the database.
 
         Args:
             conn (sqlite3.Connection): The database connection.
             rooms (dict): Dictionary of Room objects.
-            username (str): The player's username.
+            session_id (int): The game session id.
 
         Returns:
             Player: The player object.
         """
         cursor = conn.cursor()
-        cursor.execute('SELECT current_room FROM Players WHERE username = ?', (username,))
+        cursor.execute('''
+            SELECT r.name FROM Sessions s
+            JOIN Rooms r ON r.room_id = s.current_room_id
+            WHERE s.session_id = ?
+        ''', (session_id,))
         row = cursor.fetchone()
         if row:
             current_room_name = row[0]
             current_room = rooms[current_room_name]
             return cls(current_room)
         else:
-            # Player does not exist
-            raise ValueError("Player does not exist.")
+            # Session does not exist
+            raise ValueError("Session does not exist.")
 
-    def save_to_db(self, conn, username):
+    def db_record(self, session_id):
+        """
+        Build the statement that saves the player's current state.
+
+        Args:
+            session_id (int): The game session id.
+
+        Returns:
+            tuple: The SQL statement and its parameters.
+        """
+        return '''
+            UPDATE Sessions SET current_room_id = ?
+            WHERE session_id = ?
+        ''', (self.current_room.room_id, session_id)
+
+    def save_to_db(self, conn, session_id, commit: bool = True):
         """
         Save the player's current state to the database.
 
         Args:
             conn (sqlite3.Connection): The database connection.
-            username (str): The player's username.
+            session_id (int): The game session id.
+            commit (bool): Commit immediately. Pass False when the caller batches
+                several saves into one transaction.
         """
         cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE Players SET current_room = ?
-            WHERE username = ?
-        ''', (self.current_room.name, username))
-        conn.commit()
+        cursor.execute(*self.db_record(session_id))
+        if commit:
+            conn.commit()
+        self.needs_save = False
 
     def move(self, direction: str, rooms: Dict[str, Room], messages: List[str]) -> None:
         """
@@ -77,13 +103,16 @@ class Player:
             prev_room = self.current_room.name
             next_room_name = self.current_room.connections[direction]
             self.current_room = rooms[next_room_name]
+            self.needs_save = True
+            if self.journal:
+                self.journal.record(EVENT_MOVE, self.current_room)
             message = f"You moved from {prev_room} to the {self.current_room.name}."
             print(message)
             messages.append(message)
 
 
-            if self.current_room.name == 'Master Bedroom':
-                messages.append("You have entered the Master Bedroom.")
+            if self.current_room.name == GOAL_ROOM:
+                messages.append(f"You have entered the {GOAL_ROOM}.")
         else:
             message = "Trying to escape?! There is no escape! Please try your move again."
             print(message)
@@ -101,6 +130,8 @@ class Player:
         """
         if not self.current_room.is_clean:
             self.current_room.clean()
+            if self.journal:
+                self.journal.record(EVENT_CLEAN, self.current_room)
             messages.append(f"You cleaned the {self.current_room.name} and took a picture.")
             return True  # Room was cleaned
         else:
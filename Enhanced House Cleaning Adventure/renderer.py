@@ -0,0 +1,308 @@
+# renderer.py
+
+"""
+Draws the game screen, updating only the regions that changed.
+
+The map is seen through a Camera that can scroll and zoom. Rooms are found
+through a SpatialGrid, so only rooms that intersect the viewport are ever
+touched, however large the house is.
+
+The visible part of the map (room shapes, colors and names) is pre-rendered
+once per layout, screen size and camera position into two layers, one with
+every room clean and one with every room dirty. Drawing a room is a single blit
+from the matching layer plus the route marker on top. The player's room and
+rooms holding an agent are composed by hand instead, because their highlight and
+agent marker go between the room and its name; every room is drawn in the same
+order as before the layers existed, which verify_rendering.py checks.
+
+The renderer remembers what every visible room looked like when it was last
+drawn and which version of the message log it showed. Each frame it redraws
+only the rooms whose cleanliness, player highlight or agent markers changed, and
+the message box only when new messages arrived, then hands just those rects to
+pygame.display.update. A frame in which nothing changed draws nothing.
+"""
+
+import pygame
+from typing import Dict, List, Optional, Sequence, Tuple
+from constants import *
+from camera import Camera
+from message_log import MessageLog
+from room import Room
+from spatial import SpatialGrid
+from text_cache import render_text
+from utils import render_messages
+
+# How a room was drawn: (is_clean, is_current_room, has_agent, on_route)
+RoomState = Tuple[bool, bool, bool, bool]
+
+
+class StaticMap:
+    """
+    Pre-composited view of the house map, rebuilt when the layout, screen size
+    or camera view changes.
+
+    Attributes:
+        layers (Dict[bool, pygame.Surface]): The view with every room clean (True) or dirty (False).
+        visible (List[Room]): The rooms intersecting the viewport.
+        rects (Dict[str, pygame.Rect]): Screen rectangle of every visible room, by room name.
+        spatial (Optional[SpatialGrid]): Spatial index over the current rooms.
+        label_size (Optional[int]): Font size of room names at the current zoom, or None if hidden.
+        size (Optional[Tuple[int, int]]): The screen size the layers were built for.
+        builds (int): How many times the layers have been built.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty map; the layers are built on first use.
+        """
+        self.layers: Dict[bool, pygame.Surface] = {}
+        self.visible: List[Room] = []
+        self.rects: Dict[str, pygame.Rect] = {}
+        self.spatial: Optional[SpatialGrid] = None
+        self.label_size: Optional[int] = None
+        self.size: Optional[Tuple[int, int]] = None
+        self.builds: int = 0
+        self._rooms: Optional[Dict[str, Room]] = None
+        self._layout_key: Optional[tuple] = None
+        self._camera_version: Optional[Tuple[int, int]] = None
+
+    def ensure(self, screen: pygame.Surface, rooms: Dict[str, Room], camera: Camera) -> bool:
+        """
+        Rebuilds the layers if the rooms, the screen size or the camera changed since they were built.
+
+        Args:
+            screen (pygame.Surface): The display surface.
+            rooms (Dict[str, Room]): Dictionary of all rooms.
+            camera (Camera): The camera looking at the map.
+
+        Returns:
+            bool: True if the layers were rebuilt.
+        """
+        size = screen.get_size()
+        camera_version = (id(camera), camera.version)
+        if rooms is not self._rooms:
+            # A new rooms dictionary is only a new layout if the rooms themselves differ
+            layout_key = tuple((room.name, *room.bounds) for room in rooms.values())
+            self._rooms = rooms
+            self.spatial = SpatialGrid.from_rooms(rooms)
+            if layout_key != self._layout_key:
+                self._layout_key = layout_key
+                self._camera_version = None
+            else:
+                # Same layout, new Room objects: keep the layers, look the rooms up again
+                self.visible = [rooms[room.name] for room in self.visible]
+        if size == self.size and camera_version == self._camera_version:
+            return False
+
+        self.size = size
+        self._camera_version = camera_version
+        self.visible = self.spatial.query(camera.visible_bounds())
+        self.rects = {room.name: pygame.Rect(camera.bounds_to_screen(room.bounds)) for room in self.visible}
+        label_size = round(ROOM_FONT_SIZE * camera.zoom)
+        self.label_size = label_size if label_size >= MIN_LABEL_FONT_SIZE else None
+        self.layers = {is_clean: self._build_layer(screen, is_clean) for is_clean in (True, False)}
+        self.builds += 1
+        return True
+
+    def label(self, room: Room) -> Optional[pygame.Surface]:
+        """
+        Returns the rendered name of a room at the current zoom.
+
+        Args:
+            room (Room): The room.
+
+        Returns:
+            Optional[pygame.Surface]: The label, or None when zoomed out too far to read it.
+        """
+        if self.label_size is None:
+            return None
+        return render_text(room.name, ROOM_FONT_NAME, self.label_size, BLACK)
+
+    def _build_layer(self, screen: pygame.Surface, is_clean: bool) -> pygame.Surface:
+        """
+        Renders the visible rooms in one cleanliness state.
+
+        Args:
+            screen (pygame.Surface): The display surface, whose size and pixel format are used.
+            is_clean (bool): Draw the rooms clean (True) or dirty (False).
+
+        Returns:
+            pygame.Surface: The map layer.
+        """
+        layer = pygame.Surface(screen.get_size(), 0, screen)
+        layer.fill(BLACK)
+        color = CLEAN_COLOR if is_clean else DIRTY_COLOR
+        for room in self.visible:
+            rect = self.rects[room.name]
+            pygame.draw.rect(layer, color, rect)
+            label = self.label(room)
+            if label is not None:
+                layer.blit(label, label.get_rect(center=rect.center))
+        return layer
+
+
+class Renderer:
+    """
+    Dirty-rectangle renderer for the game screen.
+
+    Attributes:
+        screen (pygame.Surface): The display surface.
+        camera (Camera): The view onto the map.
+        viewport_rect (pygame.Rect): The area of the screen the map is drawn in.
+        text_box_rect (pygame.Rect): The area of the message box.
+        needs_full_redraw (bool): True if the next frame must redraw the whole screen.
+        static_map (StaticMap): The pre-rendered view of the map.
+    """
+
+    def __init__(self, screen: pygame.Surface, camera: Optional[Camera] = None) -> None:
+        """
+        Initializes the renderer. The first frame is always drawn in full.
+
+        Args:
+            screen (pygame.Surface): The display surface.
+            camera (Optional[Camera]): The view onto the map; defaults to the
+                unzoomed map in the area above the text box.
+        """
+        self.screen: pygame.Surface = screen
+        self.camera: Camera = camera if camera is not None else Camera(SCREEN_WIDTH, TEXT_BOX_Y)
+        # The map never extends into the text box, whatever size the camera is
+        self.viewport_rect: pygame.Rect = pygame.Rect(0, 0, self.camera.width, min(self.camera.height, TEXT_BOX_Y))
+        self.text_box_rect: pygame.Rect = pygame.Rect(TEXT_BOX_X, TEXT_BOX_Y, TEXT_BOX_WIDTH, TEXT_BOX_HEIGHT)
+        self.needs_full_redraw: bool = True
+        self.static_map: StaticMap = StaticMap()
+        self._room_states: Dict[str, RoomState] = {}
+        self._messages: Optional[MessageLog] = None
+        self._messages_version: int = -1
+
+    def invalidate(self) -> None:
+        """
+        Forces the next frame to redraw the whole screen, e.g. after another
+        screen was shown or the window was exposed.
+        """
+        self.needs_full_redraw = True
+
+    def draw(
+        self,
+        rooms: Dict[str, Room],
+        player,
+        agents,
+        messages: MessageLog,
+        route: Sequence[str] = ()
+    ) -> List[pygame.Rect]:
+        """
+        Draws the parts of the frame that changed and updates them on the display.
+
+        Args:
+            rooms (Dict[str, Room]): Dictionary of all rooms.
+            player (Player): The player object.
+            agents (Iterable[Agent]): The agents.
+            messages (MessageLog): The message log to display.
+            route (Sequence[str]): Names of the rooms on the player's planned route, previewed on the map.
+
+        Returns:
+            List[pygame.Rect]: The regions that were updated (the whole screen on a full redraw).
+        """
+        if self.static_map.ensure(self.screen, rooms, self.camera):
+            self.needs_full_redraw = True
+
+        full = self.needs_full_redraw
+        if full:
+            self.screen.blit(self.static_map.layers[False], (0, 0))
+            self._room_states.clear()
+            self._messages = None
+            self.needs_full_redraw = False
+
+        # Each room is clipped to its own rect within the viewport, so it never draws
+        # over the text box and markers on tiny, zoomed-out rooms never spill into
+        # a neighbour that is not being redrawn
+        dirty_rects: List[pygame.Rect] = []
+        route_rooms = set(route)
+        agent_rooms = {agent.current_room.name for agent in agents}
+        for room in self.static_map.visible:
+            state = (
+                room.is_clean,
+                room is player.current_room,
+                room.name in agent_rooms,
+                room.name in route_rooms
+            )
+            if self._room_states.get(room.name) != state:
+                clip = self.static_map.rects[room.name].clip(self.viewport_rect)
+                self.screen.set_clip(clip)
+                self._draw_room(room, *state)
+                self._room_states[room.name] = state
+                dirty_rects.append(clip)
+        self.screen.set_clip(None)
+
+        # Every append changes the visible lines, so the log's version says when to re-render
+        if messages is not self._messages or messages.version != self._messages_version:
+            render_messages(self.screen, messages)
+            self._messages = messages
+            self._messages_version = messages.version
+            dirty_rects.append(self.text_box_rect)
+
+        if full:
+            pygame.display.flip()
+            return [self.screen.get_rect()]
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
+        return dirty_rects
+
+    def room_at(self, pos: Tuple[int, int]) -> Optional[Room]:
+        """
+        Returns the room drawn at a screen position, e.g. a mouse click.
+
+        Uses the spatial grid, so the cost does not depend on the number of rooms.
+
+        Args:
+            pos (Tuple[int, int]): The pixel position.
+
+        Returns:
+            Optional[Room]: The room at that position, or None.
+        """
+        if self.static_map.spatial is None or not self.viewport_rect.collidepoint(pos):
+            return None
+        return self.static_map.spatial.room_at(*self.camera.screen_to_world(*pos))
+
+    def _draw_room(
+        self,
+        room: Room,
+        is_clean: bool,
+        is_current_room: bool,
+        has_agent: bool,
+        on_route: bool
+    ) -> None:
+        """
+        Draws one room from the static map with its dynamic overlays.
+
+        Args:
+            room (Room): The room to draw.
+            is_clean (bool): True if the room is clean.
+            is_current_room (bool): True if the player is in this room.
+            has_agent (bool): True if an agent is in this room.
+            on_route (bool): True if the room is on the player's planned route.
+        """
+        rect = self.static_map.rects[room.name]
+        zoom = self.camera.zoom
+        if is_current_room or has_agent:
+            # The highlight and the agent sit under the room name, so this room is composed by hand
+            pygame.draw.rect(self.screen, CLEAN_COLOR if is_clean else DIRTY_COLOR, rect)
+
+            # Highlight current room
+            if is_current_room:
+                pygame.draw.rect(self.screen, WHITE, rect, max(1, round(3 * zoom)))
+
+            # Draw the agent if present
+            if has_agent:
+                pygame.draw.circle(self.screen, AGENT_COLOR, rect.center, max(2, round(10 * zoom)))
+
+            label = self.static_map.label(room)
+            if label is not None:
+                self.screen.blit(label, label.get_rect(center=rect.center))
+        else:
+            # The map layer covers the whole room rect, erasing the previous overlays
+            self.screen.blit(self.static_map.layers[is_clean], rect, rect)
+
+        # Mark the rooms the player is about to walk through, below the room name
+        if on_route:
+            marker = (rect.centerx, rect.centery + rect.height // 3)
+            pygame.draw.circle(self.screen, ROUTE_COLOR, marker, max(2, round(6 * zoom)))
@@ -2,11 +2,84 @@
 
 """
 Contains the Room class, representing a room in the game.
+
+Rooms are plain game state and do not depend on pygame; renderer.py draws them.
+
+A RoomRegistry holds a game's rooms by name and keeps an index of which are
+clean and which have unsaved changes. Every room in a registry reports its own
+cleanliness and save-state changes to it, so win checks, clean and dirty counts,
+picking a random clean room and finding the rooms to save cost the same however
+many rooms the house has.
 """
 
-import pygame
+import random
 import time
-from constants import *
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from constants import ROOM_WIDTH, ROOM_HEIGHT, DIRECTIONS
+
+# Incremented whenever any room's connections change, so cached routes can tell they are stale
+_connections_version: int = 0
+
+
+def connections_version() -> int:
+    """
+    Returns a counter that changes whenever any room's connections change.
+
+    Returns:
+        int: The current connections version.
+    """
+    return _connections_version
+
+
+def _connections_changed() -> None:
+    global _connections_version
+    _connections_version += 1
+
+
+class Connections(dict):
+    """
+    A room's connections (direction -> room name). Every change bumps connections_version().
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        _connections_changed()
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        _connections_changed()
+
+    def __delitem__(self, key) -> None:
+        super().__delitem__(key)
+        _connections_changed()
+
+    def __ior__(self, other):
+        result = super().__ior__(other)
+        _connections_changed()
+        return result
+
+    def clear(self) -> None:
+        super().clear()
+        _connections_changed()
+
+    def pop(self, *args):
+        result = super().pop(*args)
+        _connections_changed()
+        return result
+
+    def popitem(self):
+        result = super().popitem()
+        _connections_changed()
+        return result
+
+    def setdefault(self, key, default=None):
+        result = super().setdefault(key, default)
+        _connections_changed()
+        return result
+
+    def update(self, *args, **kwargs) -> None:
+        super().update(*args, **kwargs)
+        _connections_changed()
 
 
 class Room:
@@ -14,16 +87,21 @@ class Room:
     Represents a room in the game.
 
     Attributes:
+        room_id (Optional[int]): The room's id in the Rooms table, once it has been stored.
         name (str): The name of the room.
         x (int): The x-coordinate of the room's position.
         y (int): The y-coordinate of the room's position.
-        rect (pygame.Rect): The rectangle representing the room's position and size.
+        width (int): The width of the room on the map.
+        height (int): The height of the room on the map.
         connections (Dict[str, str]): Possible moves from this room.
-        is_clean (bool): Indicates whether the room is clean.
+        is_clean (bool): Indicates whether the room is clean. Changes are reported to the registry.
+        registry (Optional[RoomRegistry]): The registry holding the room, if any.
         last_cleaned (float): Timestamp of when the room was last cleaned.
+        needs_save (bool): True if the room's state changed since it was last saved. Changes
+            are reported to the registry.
     """
 
-    def __init__(self, name: str, x: int, y: int, connections: dict = None) -> None:
+    def __init__(self, name: str, x: int, y: int, connections: dict = None, room_id: Optional[int] = None) -> None:
         """
         Initializes the Room with its name, position, and connections.
 
@@ -32,77 +110,378 @@ class Room:
             x (int): The x-coordinate of the room's position.
             y (int): The y-coordinate of the room's position.
             connections (dict): Dictionary of possible moves from this room.
+            room_id (Optional[int]): The room's id in the Rooms table.
         """
+        self.room_id: Optional[int] = room_id
         self.name: str = name
         self.x: int = x
         self.y: int = y
-        self.rect: pygame.Rect = pygame.Rect(x, y, ROOM_WIDTH, ROOM_HEIGHT)
-        self.connections: dict = connections if connections else {}
-        self.is_clean: bool = False
+        self.width: int = ROOM_WIDTH
+        self.height: int = ROOM_HEIGHT
+        self.connections = connections if connections else {}
+        self.registry: Optional[RoomRegistry] = None
+        self._is_clean: bool = False
         self.last_cleaned: float = 0.0
+        self._needs_save: bool = False
+
+    @property
+    def connections(self) -> Connections:
+        """
+        The possible moves from this room, direction -> room name.
+        """
+        return self._connections
+
+    @connections.setter
+    def connections(self, connections: dict) -> None:
+        self._connections = Connections(connections)
+
+    @property
+    def is_clean(self) -> bool:
+        """
+        Indicates whether the room is clean.
+        """
+        return self._is_clean
+
+    @is_clean.setter
+    def is_clean(self, is_clean: bool) -> None:
+        is_clean = bool(is_clean)
+        if is_clean != self._is_clean:
+            self._is_clean = is_clean
+            if self.registry is not None:
+                self.registry.cleanliness_changed(self)
+
+    @property
+    def needs_save(self) -> bool:
+        """
+        True if the room's state changed since it was last saved.
+        """
+        return self._needs_save
+
+    @needs_save.setter
+    def needs_save(self, needs_save: bool) -> None:
+        needs_save = bool(needs_save)
+        if needs_save != self._needs_save:
+            self._needs_save = needs_save
+            if self.registry is not None:
+                self.registry.save_state_changed(self)
 
     @classmethod
-    def load_rooms_from_db(cls, conn):
+    def load_rooms_from_db(cls, conn, session_id, layout=None):
         """
-        Load rooms from the database and return a dictionary of Room instances.
+        Load rooms from the database and return a RoomRegistry of Room instances.
+
+        The layout comes from the shared Rooms and RoomLinks tables, or from a
+        compiled layout when one is given; cleanliness comes from the session's
+        SessionRooms rows. Rooms the session never saved start dirty.
+
+        Args:
+            conn (sqlite3.Connection): The database connection.
+            session_id (int): The game session id.
+            layout (Optional[Layout]): Compiled layout to build the rooms and their
+                connections from, so only the session's rows are read.
         """
         cursor = conn.cursor()
-        cursor.execute('SELECT name, x_coordinate, y_coordinate, is_clean FROM Rooms')
-        rooms = {}
+        if layout is not None:
+            rooms = layout.build_rooms()
+            rooms_by_id = {room.room_id: room for room in rooms.values()}
+            cursor.execute('''
+                SELECT room_id, is_clean FROM SessionRooms WHERE session_id = ?
+            ''', (session_id,))
+            for room_id, is_clean in cursor.fetchall():
+                if room_id in rooms_by_id:
+                    rooms_by_id[room_id].is_clean = bool(is_clean)
+            return rooms
+
+        cursor.execute('''
+            SELECT r.room_id, r.name, r.x_coordinate, r.y_coordinate, COALESCE(s.is_clean, 0)
+            FROM Rooms r
+            LEFT JOIN SessionRooms s ON s.session_id = ? AND s.room_id = r.room_id
+        ''', (session_id,))
+        rooms = RoomRegistry()
+        rooms_by_id = {}
         for row in cursor.fetchall():
-            name, x, y, is_clean = row
-            room = cls(name, x, y)
+            room_id, name, x, y, is_clean = row
+            room = cls(name, x, y, room_id=room_id)
             room.is_clean = bool(is_clean)
             rooms[name] = room
+            rooms_by_id[room_id] = room
+
+        cursor.execute('SELECT from_room_id, direction, to_room_id FROM RoomLinks')
+        for from_room_id, direction, to_room_id in cursor.fetchall():
+            rooms_by_id[from_room_id].connections[DIRECTIONS[direction]] = rooms_by_id[to_room_id].name
         return rooms
 
-    def save_to_db(self, conn):
+    def db_record(self, session_id):
+        """
+        Build the statement that saves the room's current state for a session.
+
+        Args:
+            session_id (int): The game session id.
+
+        Returns:
+            tuple: The SQL statement and its parameters.
+        """
+        return '''
+            INSERT INTO SessionRooms (session_id, room_id, is_clean)
+            VALUES (?, ?, ?)
+            ON CONFLICT(session_id, room_id) DO UPDATE SET
+            is_clean=excluded.is_clean
+        ''', (session_id, self.room_id, int(self.is_clean))
+
+    def save_to_db(self, conn, session_id, commit: bool = True):
         """
         Save the room's current state to the database.
+
+        Args:
+            conn (sqlite3.Connection): The database connection.
+            session_id (int): The game session id.
+            commit (bool): Commit immediately. Pass False when the caller batches
+                several saves into one transaction.
         """
         cursor = conn.cursor()
-        cursor.execute('''
-            INSERT OR REPLACE INTO Rooms (name, x_coordinate, y_coordinate, is_clean)
-            VALUES (?, ?, ?, ?)
-        ''', (self.name, self.x, self.y, int(self.is_clean)))
-        conn.commit()
+        cursor.execute(*self.db_record(session_id))
+        if commit:
+            conn.commit()
+        self.needs_save = False
 
     def dirty(self) -> None:
         """
         Marks the room as dirty.
         """
+        if self.is_clean:
+            self.needs_save = True
         self.is_clean = False
 
     def clean(self) -> None:
         """
         Marks the room as clean and updates the last cleaned timestamp.
         """
+        if not self.is_clean:
+            self.needs_save = True
         self.is_clean = True
         self.last_cleaned = time.time()
 
-    def draw(self, surface: pygame.Surface, is_current_room: bool, has_agent: bool) -> None:
+    @property
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """
+        The room's rectangle on the map as (x, y, width, height).
+        """
+        return self.x, self.y, self.width, self.height
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        """
+        The centre point of the room on the map.
+        """
+        return self.x + self.width // 2, self.y + self.height // 2
+
+    def contains(self, px: int, py: int) -> bool:
+        """
+        Checks whether a map point lies inside the room.
+
+        Args:
+            px (int): The x-coordinate of the point.
+            py (int): The y-coordinate of the point.
+
+        Returns:
+            bool: True if the point is inside the room.
         """
-        Draws the room on the given surface.
+        return self.x <= px < self.x + self.width and self.y <= py < self.y + self.height
+
+
+class RoomRegistry(dict):
+    """
+    A game's rooms by name, with an index of the clean and dirty rooms and of
+    the rooms with unsaved changes.
+
+    The clean rooms are kept in a list with each room's position in it, so a
+    room can be removed by swapping it with the last one, and a random clean
+    room can be picked without building a list. Rooms added to the registry
+    report every change to is_clean through cleanliness_changed() and every
+    change to needs_save through save_state_changed().
+    """
+
+    def __init__(self, rooms: Optional[Dict[str, Room]] = None) -> None:
+        """
+        Initializes the registry and indexes the given rooms.
+
+        Args:
+            rooms (Optional[Dict[str, Room]]): Rooms to add, by name.
+        """
+        super().__init__()
+        self._clean: List[Room] = []
+        self._clean_positions: Dict[str, int] = {}
+        self._dirty: Set[str] = set()
+        # Kept in the order the rooms changed, so saves write rows in a stable order
+        self._unsaved: Dict[str, Room] = {}
+        for name, room in (rooms or {}).items():
+            self[name] = room
+
+    def __setitem__(self, name: str, room: Room) -> None:
+        if name in self:
+            del self[name]
+        super().__setitem__(name, room)
+        room.registry = self
+        self._add_to_index(room)
+
+    def __delitem__(self, name: str) -> None:
+        room = self[name]
+        self._remove_from_index(room)
+        room.registry = None
+        super().__delitem__(name)
+
+    def update(self, *args, **kwargs) -> None:
+        for name, room in dict(*args, **kwargs).items():
+            self[name] = room
+
+    def pop(self, name: str, *default):
+        if name not in self and default:
+            return default[0]
+        room = self[name]
+        del self[name]
+        return room
+
+    def clear(self) -> None:
+        for room in self.values():
+            room.registry = None
+        super().clear()
+        self._clean.clear()
+        self._clean_positions.clear()
+        self._dirty.clear()
+        self._unsaved.clear()
+
+    def _add_to_index(self, room: Room) -> None:
+        if room.is_clean:
+            self._clean_positions[room.name] = len(self._clean)
+            self._clean.append(room)
+        else:
+            self._dirty.add(room.name)
+        if room.needs_save:
+            self._unsaved[room.name] = room
+
+    def _remove_from_index(self, room: Room) -> None:
+        self._unsaved.pop(room.name, None)
+        self._remove_from_clean_index(room)
+
+    def _remove_from_clean_index(self, room: Room) -> None:
+        position = self._clean_positions.pop(room.name, None)
+        if position is None:
+            self._dirty.discard(room.name)
+            return
+        # Move the last clean room into the gap so removal is O(1)
+        last = self._clean.pop()
+        if last is not room:
+            self._clean[position] = last
+            self._clean_positions[last.name] = position
+
+    def cleanliness_changed(self, room: Room) -> None:
+        """
+        Moves a room between the clean and dirty indexes. Called by Room when is_clean changes.
+
+        Args:
+            room (Room): The room whose cleanliness changed.
+        """
+        if room.is_clean:
+            self._dirty.discard(room.name)
+            self._clean_positions[room.name] = len(self._clean)
+            self._clean.append(room)
+        else:
+            self._remove_from_clean_index(room)
+            self._dirty.add(room.name)
+
+    def save_state_changed(self, room: Room) -> None:
+        """
+        Adds a room to or removes it from the unsaved index. Called by Room when needs_save changes.
+
+        Args:
+            room (Room): The room whose needs_save flag changed.
+        """
+        if room.needs_save:
+            self._unsaved[room.name] = room
+        else:
+            self._unsaved.pop(room.name, None)
+
+    @property
+    def clean_count(self) -> int:
+        """
+        The number of clean rooms.
+        """
+        return len(self._clean)
+
+    @property
+    def dirty_count(self) -> int:
+        """
+        The number of dirty rooms.
+        """
+        return len(self._dirty)
+
+    @property
+    def unsaved_count(self) -> int:
+        """
+        The number of rooms with unsaved changes.
+        """
+        return len(self._unsaved)
+
+    def unsaved_rooms(self) -> List[Room]:
+        """
+        Returns the rooms whose state changed since they were last saved.
+
+        Returns:
+            List[Room]: A copy of the unsaved rooms, in the order they changed.
+        """
+        return list(self._unsaved.values())
+
+    def clean_rooms(self) -> List[Room]:
+        """
+        Returns the clean rooms.
+
+        Returns:
+            List[Room]: A copy of the clean rooms, in no particular order.
+        """
+        return list(self._clean)
+
+    def dirty_names(self) -> Set[str]:
+        """
+        Returns the names of the dirty rooms.
+
+        Returns:
+            Set[str]: A copy of the dirty room names.
+        """
+        return set(self._dirty)
+
+    def all_clean(self, except_names: Iterable[str] = ()) -> bool:
+        """
+        Checks whether every room is clean, ignoring some rooms.
 
         Args:
-            surface (pygame.Surface): The surface to draw on.
-            is_current_room (bool): True if the player is in this room.
-            has_agent (bool): True if the agent is in this room.
-        """
-        # Set color based on cleanliness
-        color = CLEAN_COLOR if self.is_clean else DIRTY_COLOR
-        pygame.draw.rect(surface, color, self.rect)
-
-        # Highlight current room
-        if is_current_room:
-            pygame.draw.rect(surface, WHITE, self.rect, 3)
-
-        # Draw the agent if present
-        if has_agent:
-            pygame.draw.circle(surface, (0, 0, 255), (self.rect.centerx, self.rect.centery), 10)
-
-        # Display room name
-        font = pygame.font.SysFont(None, 24)
-        text = font.render(self.name, True, BLACK)
-        text_rect = text.get_rect(center=self.rect.center)
-        surface.blit(text, text_rect)
\ No newline at end of file
+            except_names (Iterable[str]): Names of rooms that may be dirty.
+
+        Returns:
+            bool: True if every other room is clean.
+        """
+        allowed = sum(1 for name in set(except_names) if name in self._dirty)
+        return len(self._dirty) == allowed
+
+    def random_clean(self, exclude: Iterable[str] = ()) -> Optional[Room]:
+        """
+        Picks a random clean room.
+
+        A few random picks are tried first, which is O(1) when the excluded rooms
+        are a small part of the clean rooms. Only if they all hit excluded rooms
+        are the clean rooms scanned.
+
+        Args:
+            exclude (Iterable[str]): Names of rooms not to pick.
+
+        Returns:
+            Optional[Room]: A clean room, or None if every clean room is excluded.
+        """
+        if not self._clean:
+            return None
+        exclude = set(exclude)
+        for _ in range(8):
+            room = random.choice(self._clean)
+            if room.name not in exclude:
+                return room
+        candidates = [room for room in self._clean if room.name not in exclude]
+        return random.choice(candidates) if candidates else None
@@ -0,0 +1,105 @@
+# route.py
+
+"""
+Click-to-move: walks the player along a route to a chosen room, one room per step.
+
+Pure Python; does not need pygame. Each step goes through Player.move, so moves
+along a route are journaled, saved and announced like keyboard moves.
+"""
+
+import time
+from typing import Dict, List, Optional
+from constants import ROUTE_STEP_INTERVAL
+from pathfinding import find_path
+from room import Room
+from session import GOAL_ROOM
+
+
+class RouteWalker:
+    """
+    Steps the player along a planned route at a fixed pace.
+
+    Attributes:
+        player (Player): The player being moved.
+        path (List[str]): Names of the rooms still to visit, next room first.
+        step_interval (float): Seconds between steps.
+        next_step (float): Monotonic time at which the next step is due.
+    """
+
+    def __init__(self, player, step_interval: float = ROUTE_STEP_INTERVAL) -> None:
+        """
+        Initializes a walker with no route.
+
+        Args:
+            player (Player): The player to move.
+            step_interval (float): Seconds between steps.
+        """
+        self.player = player
+        self.path: List[str] = []
+        self.step_interval: float = step_interval
+        self.next_step: float = 0.0
+
+    def plan(self, target: Room, rooms: Dict[str, Room], graph: Dict[str, List[str]]) -> bool:
+        """
+        Plans a route from the player's room to the target room.
+
+        The first step is taken straight away by the next maybe_step() call.
+
+        Args:
+            target (Room): The room to walk to.
+            rooms (Dict[str, Room]): Dictionary of all rooms.
+            graph (Dict[str, List[str]]): Graph representation of the house.
+
+        Returns:
+            bool: True if a route was found, False if the target is unreachable.
+        """
+        path = find_path(graph, self.player.current_room.name, target.name, rooms, avoid={GOAL_ROOM})
+        if not path:
+            self.path = []
+            return False
+        self.path = path[1:]
+        self.next_step = time.monotonic()
+        return True
+
+    def cancel(self) -> None:
+        """
+        Abandons the current route.
+        """
+        self.path = []
+
+    def seconds_until_due(self) -> Optional[float]:
+        """
+        Returns how long until the next step is due.
+
+        Returns:
+            Optional[float]: Seconds until maybe_step() would move (0 if overdue),
+                or None if there is no route.
+        """
+        if not self.path:
+            return None
+        return max(0.0, self.next_step - time.monotonic())
+
+    def maybe_step(self, rooms: Dict[str, Room], messages: List[str]) -> bool:
+        """
+        Moves the player one room along the route if a step is due.
+
+        Args:
+            rooms (Dict[str, Room]): Dictionary of all rooms.
+            messages (List[str]): List of messages to display to the player.
+
+        Returns:
+            bool: True if the player moved.
+        """
+        if not self.path or time.monotonic() < self.next_step:
+            return False
+
+        next_room_name = self.path.pop(0)
+        for direction, room_name in self.player.current_room.connections.items():
+            if room_name == next_room_name:
+                self.player.move(direction, rooms, messages)
+                self.next_step = time.monotonic() + self.step_interval
+                return True
+
+        # The route no longer matches the house (e.g. the player moved by keyboard)
+        self.path = []
+        return False
@@ -0,0 +1,34 @@
+# rules.py
+
+"""
+Game rules: deciding when a game is won or lost. Pure Python; does not need pygame.
+"""
+
+from typing import Optional
+from room import RoomRegistry
+from session import GOAL_ROOM
+
+
+def check_win_condition(player, rooms: RoomRegistry) -> Optional[str]:
+    """
+    Check if the player has met the win or lose conditions.
+
+    Args:
+        player (Player): The player object.
+        rooms (RoomRegistry): All room objects, with their cleanliness index.
+
+    Returns:
+        str: 'win' if the player wins, 'lose' if the player loses, or None if the game should continue.
+    """
+    # Exclude the Master Bedroom from rooms to clean; the registry's counts make this O(1)
+    all_clean = rooms.all_clean(except_names=(GOAL_ROOM,))
+
+    if all_clean and player.current_room.name == GOAL_ROOM:
+        # Player wins if all rooms are clean, and they are in the Master Bedroom
+        return 'win'
+    elif player.current_room.name == GOAL_ROOM and not all_clean:
+        # Player loses if they go to the Master Bedroom before cleaning all rooms
+        return 'lose'
+    else:
+        # Game continues
+        return None
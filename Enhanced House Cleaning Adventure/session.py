@@ -0,0 +1,84 @@
+# session.py
+
+"""
+Game sessions: each player's saved game, kept apart from everybody else's.
+
+The Rooms and RoomLinks tables describe the shared house layout. Everything
+that changes during a game (player position, clean rooms, agents, journal) is
+stored per session, so any number of saved games can live in one database.
+"""
+
+from typing import Optional
+
+START_ROOM = 'The Foyer'        # Where the player starts a new game
+GOAL_ROOM = 'Master Bedroom'    # Entering it ends the game: a win once every other room is clean
+AGENT_START_ROOM = 'Kitchen'    # Where the first agent starts after a reset
+AGENT_WAIT_THRESHOLD = 2        # Rooms the player cleans before the first agent acts
+
+# Every session's agents, by agent_index: (name, start room, wait threshold)
+AGENT_ROSTER: tuple = (
+    ('child', AGENT_START_ROOM, AGENT_WAIT_THRESHOLD),
+    ('dog', 'Backyard', 3),
+)
+
+
+def get_session_id(conn, username: str) -> Optional[int]:
+    """
+    Look up the session belonging to a player.
+
+    Args:
+        conn (sqlite3.Connection): The database connection.
+        username (str): The player's username.
+
+    Returns:
+        Optional[int]: The session id, or None if the player has no session yet.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT s.session_id FROM Sessions s
+        JOIN Players p ON p.player_id = s.player_id
+        WHERE p.username = ?
+    ''', (username,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def create_session(conn, username: str) -> int:
+    """
+    Create the session for a player, starting in START_ROOM.
+
+    Args:
+        conn (sqlite3.Connection): The database connection.
+        username (str): The player's username.
+
+    Returns:
+        int: The new session id.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO Sessions (player_id, current_room_id)
+        SELECT p.player_id, r.room_id FROM Players p, Rooms r
+        WHERE p.username = ? AND r.name = ?
+    ''', (username, START_ROOM))
+    if cursor.rowcount == 0:
+        raise ValueError("Player does not exist.")
+    session_id = cursor.lastrowid
+    conn.commit()
+    return session_id
+
+
+def get_or_create_session(conn, username: str) -> int:
+    """
+    Return a player's session, creating a new one if needed.
+
+    Args:
+        conn (sqlite3.Connection): The database connection.
+        username (str): The player's username.
+
+    Returns:
+        int: The session id.
+    """
+    session_id = get_session_id(conn, username)
+    if session_id is None:
+        session_id = create_session(conn, username)
+    return session_id
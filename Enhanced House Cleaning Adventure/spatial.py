@@ -0,0 +1,121 @@
+# spatial.py
+
+"""
+Uniform-grid spatial index over room rectangles. Pure Python; does not need pygame.
+
+The map is divided into square cells and every room is listed in each cell its
+rectangle overlaps. Finding the rooms in a region, or the room under a point,
+only looks at the cells that region touches, so the cost depends on how many
+rooms are nearby rather than on the size of the house.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from constants import SPATIAL_CELL_SIZE
+from room import Room
+
+Bounds = Tuple[float, float, float, float]  # (x, y, width, height)
+
+
+class SpatialGrid:
+    """
+    Uniform grid of map cells, each listing the rooms that overlap it.
+
+    Attributes:
+        cell_size (int): Width and height of a cell in map units.
+        rooms (Dict[str, Room]): The indexed rooms, by name.
+    """
+
+    def __init__(self, cell_size: int = SPATIAL_CELL_SIZE) -> None:
+        """
+        Initializes an empty grid.
+
+        Args:
+            cell_size (int): Width and height of a cell in map units.
+        """
+        self.cell_size: int = cell_size
+        self.rooms: Dict[str, Room] = {}
+        self._cells: Dict[Tuple[int, int], List[str]] = {}
+
+    @classmethod
+    def from_rooms(cls, rooms: Dict[str, Room], cell_size: int = SPATIAL_CELL_SIZE) -> 'SpatialGrid':
+        """
+        Builds a grid holding every room.
+
+        Args:
+            rooms (Dict[str, Room]): Dictionary of all rooms.
+            cell_size (int): Width and height of a cell in map units.
+
+        Returns:
+            SpatialGrid: The populated grid.
+        """
+        grid = cls(cell_size)
+        for room in rooms.values():
+            grid.insert(room)
+        return grid
+
+    def _cell_range(self, bounds: Bounds) -> Iterable[Tuple[int, int]]:
+        """
+        Yields the cells a rectangle overlaps.
+
+        Args:
+            bounds (Bounds): The rectangle as (x, y, width, height).
+        """
+        x, y, w, h = bounds
+        size = self.cell_size
+        # Right and bottom edges are exclusive, matching Room.contains
+        x0, y0 = int(x // size), int(y // size)
+        x1, y1 = int((x + max(w, 1) - 1) // size), int((y + max(h, 1) - 1) // size)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                yield cx, cy
+
+    def insert(self, room: Room) -> None:
+        """
+        Adds a room to every cell its rectangle overlaps.
+
+        Args:
+            room (Room): The room to index.
+        """
+        self.rooms[room.name] = room
+        for cell in self._cell_range(room.bounds):
+            self._cells.setdefault(cell, []).append(room.name)
+
+    def query(self, bounds: Bounds) -> List[Room]:
+        """
+        Returns the rooms whose rectangles intersect a region.
+
+        Args:
+            bounds (Bounds): The region as (x, y, width, height).
+
+        Returns:
+            List[Room]: The intersecting rooms, each listed once.
+        """
+        x, y, w, h = bounds
+        found: Dict[str, Room] = {}
+        for cell in self._cell_range(bounds):
+            for name in self._cells.get(cell, ()):
+                if name in found:
+                    continue
+                room = self.rooms[name]
+                rx, ry, rw, rh = room.bounds
+                if rx < x + w and x < rx + rw and ry < y + h and y < ry + rh:
+                    found[name] = room
+        return list(found.values())
+
+    def room_at(self, px: float, py: float) -> Optional[Room]:
+        """
+        Returns the room under a map point.
+
+        Args:
+            px (float): The x-coordinate of the point.
+            py (float): The y-coordinate of the point.
+
+        Returns:
+            Optional[Room]: The room containing the point, or None.
+        """
+        cell = (int(px // self.cell_size), int(py // self.cell_size))
+        for name in self._cells.get(cell, ()):
+            room = self.rooms[name]
+            if room.contains(px, py):
+                return room
+        return None
@@ -0,0 +1,64 @@
+# conftest.py
+
+"""
+Shared fixtures for the game's tests.
+
+The game's modules live flat in the game directory and import each other by
+name, so that directory is put on the import path. Every test that touches the
+database gets its own database file in a temporary directory.
+
+Run from the game directory with:
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import database
+from constants import LAYOUT_FILE
+from layout import load_layout, sync_layout
+from session import create_session
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """
+    Points the database module at a fresh database file and creates the schema.
+
+    Returns:
+        sqlite3.Connection: The test thread's connection.
+    """
+    manager = database.ConnectionManager(db_name=str(tmp_path / 'game.db'))
+    monkeypatch.setattr(database, '_manager', manager)
+    database.initialize_database()
+    yield database.get_connection()
+    manager.close()
+
+
+@pytest.fixture
+def layout(db):
+    """
+    Loads the game's layout and writes it to the test database.
+
+    Returns:
+        Layout: The layout, with its room ids filled in.
+    """
+    house = load_layout(LAYOUT_FILE)
+    sync_layout(db, house)
+    return house
+
+
+@pytest.fixture
+def session_id(db, layout):
+    """
+    Creates a player and their game session.
+
+    Returns:
+        int: The session id.
+    """
+    db.execute("INSERT INTO Players (username, password) VALUES ('tester', 'x')")
+    db.commit()
+    return create_session(db, 'tester')
@@ -0,0 +1,79 @@
+# test_agent.py
+
+"""
+Tests for how the AgentGroup picks targets and steers each agent to its own.
+"""
+
+import random
+import pytest
+from agent import Agent, AgentGroup
+from constants import LAYOUT_FILE
+from layout import load_layout
+from pathfinding import dijkstra, path_cost
+
+
+@pytest.fixture(params=['next_hops', 'flow_fields'])
+def house(request):
+    """
+    Returns the game's layout and rooms, and whether the agents steer by the next-hop table.
+    """
+    layout = load_layout(LAYOUT_FILE)
+    return layout, layout.build_rooms(), request.param == 'next_hops'
+
+
+def make_group(layout, rooms, use_table: bool, starts) -> AgentGroup:
+    """
+    Creates agents in the given rooms that act on every move.
+    """
+    agents = []
+    for agent_index, room_name in enumerate(starts):
+        agent = Agent(rooms[room_name], agent_index, f'agent {agent_index}')
+        agent.wait_threshold = 0
+        agents.append(agent)
+    return AgentGroup(agents, layout.compiled, layout.next_hops if use_table else None)
+
+
+def cost_to(layout, start: str, goal: str) -> float:
+    """
+    Returns the cost of the cheapest path between two rooms.
+    """
+    graph = layout.build_graph()
+    return 0.0 if start == goal else path_cost(graph, dijkstra(graph, start, goal))
+
+
+def test_agent_on_another_agents_target_moves_on(house):
+    layout, rooms, use_table = house
+    for room in rooms.values():
+        room.clean()
+    group = make_group(layout, rooms, use_table, ['Kitchen', 'Garage'])
+    # The first agent stands on the second agent's target, and is headed elsewhere
+    group[0].target_room_name = 'Bedroom'
+    group[1].target_room_name = 'Kitchen'
+
+    group.move(rooms)
+    assert group[0].current_room.name != 'Kitchen'
+    assert group[0].target_room_name == 'Bedroom'
+    assert group[1].target_room_name == 'Kitchen'
+
+
+def test_every_acting_agent_closes_in_on_its_own_target(house):
+    layout, rooms, use_table = house
+    random.seed(3)
+    names = list(rooms)
+    group = make_group(layout, rooms, use_table, ['Kitchen', 'Backyard', 'Garage'])
+    for _ in range(200):
+        for name in random.sample(names, 2):
+            rooms[name].clean()
+        before = {agent.agent_index: agent.current_room.name for agent in group}
+        group.move(rooms)
+
+        targets = [agent.target_room_name for agent in group if agent.target_room_name is not None]
+        assert len(targets) == len(set(targets))
+        for agent in group:
+            if agent.target_room_name is None:
+                continue  # No clean room was left to pick
+            start = before[agent.agent_index]
+            assert agent.current_room.name != start
+            assert cost_to(layout, agent.current_room.name, agent.target_room_name) < \
+                cost_to(layout, start, agent.target_room_name)
+        group.dirty_rooms([])
@@ -0,0 +1,59 @@
+# test_backup.py
+
+"""
+Tests for the in-memory database mode and its online backups to the database file.
+"""
+
+import shutil
+import sqlite3
+import database
+
+
+def make_wal_database(path: str) -> None:
+    """
+    Leaves a WAL-mode database behind whose last commit is still only in its -wal file, as after a crash.
+    """
+    live = path + '.live'
+    conn = sqlite3.connect(live)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA wal_autocheckpoint = 0')
+    conn.execute('CREATE TABLE Notes (text TEXT)')
+    conn.execute("INSERT INTO Notes VALUES ('from the old file')")
+    conn.commit()
+    # Copy the files while the connection still holds the commit in the log
+    for suffix in ('', '-wal', '-shm'):
+        shutil.copy(live + suffix, path + suffix)
+    conn.close()
+
+
+def notes(path: str) -> list:
+    """
+    Reads the notes from a database file with a fresh connection.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        return [text for text, in conn.execute('SELECT text FROM Notes ORDER BY rowid')]
+    finally:
+        conn.close()
+
+
+def test_backup_replaces_database_with_wal_files(tmp_path):
+    path = str(tmp_path / f'{tmp_path.name}.db')
+    make_wal_database(path)
+    manager = database.ConnectionManager(db_name=path, in_memory=True)
+    try:
+        conn = manager.get_connection()
+        # The memory database starts from the file, log included
+        assert [text for text, in conn.execute('SELECT text FROM Notes')] == ['from the old file']
+        conn.execute("INSERT INTO Notes VALUES ('from memory')")
+        conn.commit()
+
+        assert manager.backup()
+        assert notes(path) == ['from the old file', 'from memory']
+
+        conn.execute("INSERT INTO Notes VALUES ('after the first backup')")
+        conn.commit()
+        assert manager.backup()
+        assert notes(path) == ['from the old file', 'from memory', 'after the first backup']
+    finally:
+        manager.close()
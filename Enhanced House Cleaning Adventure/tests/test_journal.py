@@ -0,0 +1,76 @@
+# test_journal.py
+
+"""
+Tests for the event journal: rebuilding an interrupted game and keeping the journal short.
+"""
+
+import random
+from agent import Agent
+from journal import GameJournal, capture_state
+from player import Player
+from room import Room
+
+
+def load_game(conn, session_id, layout, journal):
+    """
+    Loads the session's saved objects and attaches them to a journal.
+
+    Returns:
+        Tuple[Player, List[Agent], RoomRegistry]: The game objects.
+    """
+    rooms = Room.load_rooms_from_db(conn, session_id, layout)
+    player = Player.load_from_db(conn, rooms, session_id)
+    agents = Agent.load_all_from_db(conn, rooms, session_id)
+    journal.attach(player, agents, rooms)
+    return player, agents, rooms
+
+
+def game_state(player, agents, rooms) -> dict:
+    """
+    Captures the game state, with the clean rooms in a fixed order.
+    """
+    state = capture_state(player, agents, rooms)
+    state['clean_rooms'] = sorted(state['clean_rooms'])
+    return state
+
+
+def play(player, agents, rooms, turns: int, rng: random.Random) -> None:
+    """
+    Makes random moves, cleans and agent actions, recording each in the journal.
+    """
+    for _ in range(turns):
+        roll = rng.random()
+        if roll < 0.4:
+            player.move(rng.choice(list(player.current_room.connections)), rooms, [])
+        elif roll < 0.7:
+            player.clean_room([])
+        else:
+            agent = rng.choice(agents)
+            agent.increment_wait_counter()
+            agent._enter_room(rooms[rng.choice(list(agent.current_room.connections.values()))])
+            agent.dirty_room([])
+
+
+def test_restore_rebuilds_unsaved_game(db, layout, session_id):
+    journal = GameJournal(db, session_id, snapshot_interval=7)
+    player, agents, rooms = load_game(db, session_id, layout, journal)
+    play(player, agents, rooms, 60, random.Random(1))
+    expected = game_state(player, agents, rooms)
+
+    # Nothing was saved to the row tables, as after a crash between saves
+    restored_journal = GameJournal(db, session_id, snapshot_interval=7)
+    restored = load_game(db, session_id, layout, restored_journal)
+    assert game_state(*restored) != expected
+    restored_journal.restore()
+    assert game_state(*restored) == expected
+
+
+def test_snapshots_trim_the_journal(db, layout, session_id):
+    journal = GameJournal(db, session_id, snapshot_interval=5)
+    player, agents, rooms = load_game(db, session_id, layout, journal)
+    play(player, agents, rooms, 100, random.Random(2))
+
+    snapshots, = db.execute('SELECT COUNT(*) FROM GameSnapshots WHERE session_id = ?', (session_id,)).fetchone()
+    events, = db.execute('SELECT COUNT(*) FROM GameEvents WHERE session_id = ?', (session_id,)).fetchone()
+    assert snapshots == 1
+    assert events < journal.snapshot_interval
@@ -0,0 +1,90 @@
+# test_layout.py
+
+"""
+Tests for layout files, their compiled cache and writing them to the database.
+"""
+
+import json
+import pytest
+from constants import LAYOUT_FILE
+from layout import cache_path_for, load_layout, parse_layout_file, resolve_path, sync_layout
+from session import GOAL_ROOM
+
+
+@pytest.fixture
+def layout_data() -> dict:
+    """
+    Returns the game's layout file, parsed.
+    """
+    with open(resolve_path(LAYOUT_FILE)) as f:
+        return json.load(f)
+
+
+def write_layout(tmp_path, data: dict) -> str:
+    """
+    Writes a layout file to the temporary directory and returns its path.
+    """
+    path = tmp_path / 'house.json'
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+def test_cached_layout_matches_parsed_layout(tmp_path, layout_data):
+    path = write_layout(tmp_path, layout_data)
+    parsed = parse_layout_file(path)
+    load_layout(path)  # Builds the cache
+    cached = load_layout(path)
+
+    assert (cached.name, cached.checksum) == (parsed.name, parsed.checksum)
+    assert cached.rooms == parsed.rooms
+    assert cached.connections == parsed.connections
+    assert cached.next_hops.rows == parsed.next_hops.rows
+
+
+def test_damaged_cache_is_rebuilt(tmp_path, layout_data):
+    path = write_layout(tmp_path, layout_data)
+    load_layout(path)
+    cache_path = cache_path_for(path)
+    with open(cache_path, 'rb') as f:
+        cache = f.read()
+
+    for damaged in (cache[:-3], cache + b'\0', b'\x80\x04not a layout cache'):
+        with open(cache_path, 'wb') as f:
+            f.write(damaged)
+        assert load_layout(path).rooms == parse_layout_file(path).rooms
+        with open(cache_path, 'rb') as f:
+            assert f.read() == cache
+
+
+def test_layout_without_a_game_room_is_rejected(tmp_path, layout_data):
+    layout_data['rooms'] = [room for room in layout_data['rooms'] if room['name'] != GOAL_ROOM]
+    layout_data['connections'] = [
+        connection for connection in layout_data['connections'] if GOAL_ROOM not in connection
+    ]
+    with pytest.raises(ValueError, match=GOAL_ROOM):
+        parse_layout_file(write_layout(tmp_path, layout_data))
+
+
+def test_sync_removes_rooms_the_layout_dropped(db, layout, session_id, tmp_path, layout_data):
+    dropped = 'Garage'
+    db.execute('''
+        UPDATE Sessions SET current_room_id = (SELECT room_id FROM Rooms WHERE name = ?)
+        WHERE session_id = ?
+    ''', (dropped, session_id))
+    db.commit()
+
+    layout_data['rooms'] = [room for room in layout_data['rooms'] if room['name'] != dropped]
+    layout_data['connections'] = [
+        connection for connection in layout_data['connections'] if dropped not in connection
+    ]
+    smaller = load_layout(write_layout(tmp_path, layout_data))
+    assert sync_layout(db, smaller)
+
+    names = {name for name, in db.execute('SELECT name FROM Rooms')}
+    assert names == set(smaller.room_ids)
+    current, = db.execute('''
+        SELECT r.name FROM Sessions s JOIN Rooms r ON r.room_id = s.current_room_id
+        WHERE s.session_id = ?
+    ''', (session_id,)).fetchone()
+    assert current == smaller.rooms[0][0]
+    assert db.execute('PRAGMA foreign_key_check').fetchall() == []
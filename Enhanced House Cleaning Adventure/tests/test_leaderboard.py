@@ -0,0 +1,55 @@
+# test_leaderboard.py
+
+"""
+Tests for the trigger-maintained Leaderboard table behind get_top_scores.
+"""
+
+import random
+import database
+from main import get_top_scores, record_game_result
+
+
+def fastest_wins(conn, limit: int) -> list:
+    """
+    Returns the fastest wins straight from GameResults, as the leaderboard should hold them.
+    """
+    return conn.execute('''
+        SELECT username, time_taken, rooms_cleaned, result, timestamp FROM GameResults
+        WHERE result = 'win'
+        ORDER BY time_taken ASC, result_id ASC
+        LIMIT ?
+    ''', (limit,)).fetchall()
+
+
+def record_random_games(conn, count: int, rng: random.Random) -> None:
+    """
+    Records random wins and losses with random times.
+    """
+    for _ in range(count):
+        result = rng.choice(('win', 'lose'))
+        record_game_result(conn, rng.choice(('ann', 'bob')), rng.randint(10, 500), 7, result)
+
+
+def test_leaderboard_keeps_the_fastest_wins(db, monkeypatch):
+    monkeypatch.setattr(database, 'LEADERBOARD_SIZE', 10)
+    database.initialize_database()
+    record_random_games(db, 200, random.Random(1))
+
+    count, = db.execute('SELECT COUNT(*) FROM Leaderboard').fetchone()
+    assert count == 10
+    assert get_top_scores(db) == fastest_wins(db, 5)
+
+
+def test_leaderboard_is_refilled_when_short(db, monkeypatch):
+    record_random_games(db, 50, random.Random(2))
+    db.execute('DELETE FROM Leaderboard WHERE rowid IN (SELECT rowid FROM Leaderboard LIMIT 3)')
+    db.commit()
+    database.initialize_database()
+    assert get_top_scores(db) == fastest_wins(db, 5)
+
+    # A larger leaderboard is filled from the results recorded so far
+    monkeypatch.setattr(database, 'LEADERBOARD_SIZE', 40)
+    database.initialize_database()
+    wins, = db.execute("SELECT COUNT(*) FROM GameResults WHERE result = 'win'").fetchone()
+    count, = db.execute('SELECT COUNT(*) FROM Leaderboard').fetchone()
+    assert count == min(40, wins)
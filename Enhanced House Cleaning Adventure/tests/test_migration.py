@@ -0,0 +1,145 @@
+# test_migration.py
+
+"""
+Tests for converting databases written by older versions of the game.
+"""
+
+import json
+import sqlite3
+import pytest
+import database
+from agent import Agent
+from constants import LAYOUT_FILE
+from journal import GameJournal
+from layout import load_layout, sync_layout
+from player import Player
+from room import Room
+from session import get_session_id
+
+# The schema of the original game, plus the username-keyed journal that came before sessions
+LEGACY_SCHEMA = '''
+    CREATE TABLE Players (
+        player_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        current_room TEXT NOT NULL
+    );
+    CREATE TABLE Rooms (
+        room_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        x_coordinate INTEGER NOT NULL,
+        y_coordinate INTEGER NOT NULL,
+        is_clean INTEGER NOT NULL
+    );
+    CREATE TABLE Agent (
+        agent_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        current_room TEXT NOT NULL,
+        wait_counter INTEGER NOT NULL,
+        wait_threshold INTEGER NOT NULL
+    );
+    CREATE TABLE RoomConnections (
+        from_room TEXT NOT NULL,
+        direction TEXT NOT NULL,
+        to_room TEXT NOT NULL,
+        PRIMARY KEY (from_room, direction)
+    );
+    CREATE TABLE GameResults (
+        result_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL,
+        time_taken INTEGER,
+        rooms_cleaned INTEGER,
+        result TEXT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE GameEvents (
+        event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL,
+        event_type TEXT NOT NULL,
+        room TEXT,
+        value INTEGER,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE GameSnapshots (
+        snapshot_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL,
+        last_event_id INTEGER NOT NULL,
+        state TEXT NOT NULL
+    );
+'''
+
+
+@pytest.fixture
+def legacy_db(tmp_path, monkeypatch):
+    """
+    Writes a database in the old, room-name-keyed format and points the database module at it.
+
+    The player alice was last saved in the Kitchen with the Bedroom clean, then
+    moved to The Foyer and cleaned it; those two events are only in the journal.
+    """
+    path = str(tmp_path / 'game.db')
+    house = load_layout(LAYOUT_FILE)
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executemany(
+        'INSERT INTO Rooms (name, x_coordinate, y_coordinate, is_clean) VALUES (?, ?, ?, ?)',
+        [(name, x, y, int(name == 'Bedroom')) for name, x, y in house.rooms]
+    )
+    conn.executemany(
+        'INSERT INTO RoomConnections (from_room, direction, to_room) VALUES (?, ?, ?)',
+        [(from_room, direction, to_room) for from_room, direction, to_room, _ in house.connections]
+    )
+    conn.execute("INSERT INTO Players (username, password, current_room) VALUES ('alice', 'x', 'Kitchen')")
+    conn.execute("INSERT INTO Agent (current_room, wait_counter, wait_threshold) VALUES ('Garage', 1, 2)")
+    conn.execute("INSERT INTO GameResults (username, time_taken, rooms_cleaned, result) VALUES ('alice', 90, 7, 'win')")
+    conn.execute('INSERT INTO GameSnapshots (username, last_event_id, state) VALUES (?, 0, ?)', ('alice', json.dumps({
+        'player_room': 'Kitchen', 'agent_room': 'Garage', 'wait_counter': 1, 'wait_threshold': 2,
+        'clean_rooms': ['Bedroom'],
+    })))
+    conn.executemany(
+        "INSERT INTO GameEvents (username, event_type, room) VALUES ('alice', ?, ?)",
+        [('move', 'The Foyer'), ('clean', 'The Foyer')]
+    )
+    conn.commit()
+    conn.close()
+
+    manager = database.ConnectionManager(db_name=path)
+    monkeypatch.setattr(database, '_manager', manager)
+    yield path
+    manager.close()
+
+
+def test_legacy_database_is_converted(legacy_db):
+    database.initialize_database()
+    conn = database.get_connection()
+    house = load_layout(LAYOUT_FILE)
+    sync_layout(conn, house)
+
+    tables = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'RoomConnections' not in tables
+    links, = conn.execute('SELECT COUNT(*) FROM RoomLinks').fetchone()
+    assert links == len(house.connections)
+    assert conn.execute('PRAGMA foreign_key_check').fetchall() == []
+
+    # The saved rows carry over into alice's new session
+    session_id = get_session_id(conn, 'alice')
+    rooms = Room.load_rooms_from_db(conn, session_id, house)
+    player = Player.load_from_db(conn, rooms, session_id)
+    agents = Agent.load_all_from_db(conn, rooms, session_id)
+    assert player.current_room.name == 'Kitchen'
+    assert {name for name, room in rooms.items() if room.is_clean} == {'Bedroom'}
+    assert (agents[0].current_room.name, agents[0].wait_counter, agents[0].wait_threshold) == ('Garage', 1, 2)
+
+    # So does alice's journal, which brings back what happened after the last save
+    journal = GameJournal(conn, session_id)
+    journal.attach(player, agents, rooms)
+    assert journal.restore() == 2
+    assert player.current_room.name == 'The Foyer'
+    assert {name for name, room in rooms.items() if room.is_clean} == {'Bedroom', 'The Foyer'}
+
+
+def test_converted_database_is_left_alone(legacy_db):
+    database.initialize_database()
+    conn = database.get_connection()
+    before = conn.execute('SELECT sql FROM sqlite_master ORDER BY name').fetchall()
+    database.initialize_database()
+    assert conn.execute('SELECT sql FROM sqlite_master ORDER BY name').fetchall() == before
@@ -0,0 +1,62 @@
+# test_pathfinding.py
+
+"""
+Tests that every search finds a cheapest path, checked against Dijkstra's
+algorithm on random houses as verify_pathfinding does, and that the next-hop
+table and flow fields step along cheapest paths too.
+"""
+
+import random
+from collections import defaultdict
+import pytest
+from compiled_graph import CompiledGraph
+from flow_field import FlowField
+from pathfinding import NextHopTable, dijkstra, path_cost
+from verify_pathfinding import random_house, verify_house
+
+
+@pytest.mark.parametrize('max_cost', [1, 5])
+@pytest.mark.parametrize('shortcuts', [0, 20])
+def test_searches_agree_with_dijkstra(max_cost, shortcuts):
+    rng = random.Random(max_cost * 100 + shortcuts)
+    totals = defaultdict(float)
+    for _ in range(5):
+        rooms, graph = random_house(150, rng, link_chance=0.7, shortcuts=shortcuts, max_cost=max_cost)
+        assert verify_house(rooms, graph, 40, rng, totals) == []
+
+
+def cheapest_cost(graph, start: str, goal: str) -> float:
+    """
+    Returns the cost of the cheapest path, or None if the goal cannot be reached.
+    """
+    if start == goal:
+        return 0.0
+    path = dijkstra(graph, start, goal)
+    return path_cost(graph, path) if path is not None else None
+
+
+def assert_steps_are_cheapest(graph, start: str, goal: str, hop) -> None:
+    """
+    Checks that a step from start is the first room of a cheapest path to goal.
+    """
+    best = cheapest_cost(graph, start, goal)
+    if best is None or start == goal:
+        assert hop is None
+        return
+    assert hop in graph[start]
+    assert path_cost(graph, [start, hop]) + cheapest_cost(graph, hop, goal) == pytest.approx(best)
+
+
+@pytest.mark.parametrize('max_cost', [1, 5])
+def test_next_hops_and_flow_fields_step_along_cheapest_paths(max_cost):
+    rng = random.Random(max_cost)
+    rooms, graph = random_house(60, rng, link_chance=0.7, shortcuts=5, max_cost=max_cost)
+    compiled = CompiledGraph.from_graph(graph, rooms)
+    table = NextHopTable(compiled)
+    names = list(rooms)
+    for goal in rng.sample(names, 10):
+        field = FlowField(compiled)
+        field.update((goal,))
+        for start in rng.sample(names, 15):
+            assert_steps_are_cheapest(graph, start, goal, table.next_hop(start, goal))
+            assert_steps_are_cheapest(graph, start, goal, field.next_hop(start))
@@ -0,0 +1,128 @@
+# test_persistence.py
+
+"""
+Tests for the write-behind GameSaver and the background DatabaseWriter.
+"""
+
+import sqlite3
+import pytest
+from agent import Agent
+from main import save_before_quit
+from persistence import DatabaseWriter, GameSaver
+from player import Player
+from room import Room
+from session import START_ROOM
+
+# Makes every write to SessionRooms fail, like a full disk or a locked database
+FAIL_ROOM_WRITES_SQL = [
+    "CREATE TRIGGER fail_insert BEFORE INSERT ON SessionRooms BEGIN SELECT RAISE(ABORT, 'disk full'); END",
+    "CREATE TRIGGER fail_update BEFORE UPDATE ON SessionRooms BEGIN SELECT RAISE(ABORT, 'disk full'); END",
+]
+
+
+def fail_room_writes(conn, fail: bool = True) -> None:
+    """
+    Makes writes to SessionRooms fail, or succeed again.
+    """
+    with conn:
+        if fail:
+            for sql in FAIL_ROOM_WRITES_SQL:
+                conn.execute(sql)
+        else:
+            conn.execute('DROP TRIGGER fail_insert')
+            conn.execute('DROP TRIGGER fail_update')
+
+
+def saved_clean_rooms(conn, session_id: int) -> set:
+    """
+    Returns the names of the rooms saved as clean for a session.
+    """
+    cursor = conn.execute('''
+        SELECT r.name FROM SessionRooms s JOIN Rooms r ON r.room_id = s.room_id
+        WHERE s.session_id = ? AND s.is_clean = 1
+    ''', (session_id,))
+    return {name for name, in cursor}
+
+
+@pytest.fixture
+def game(db, layout, session_id):
+    """
+    Loads the session's player, agents and rooms.
+
+    Returns:
+        Tuple[Player, List[Agent], RoomRegistry]: The game objects.
+    """
+    rooms = Room.load_rooms_from_db(db, session_id, layout)
+    player = Player.load_from_db(db, rooms, session_id)
+    agents = Agent.load_all_from_db(db, rooms, session_id)
+    return player, agents, rooms
+
+
+def test_save_writes_only_changed_objects(db, session_id, game):
+    player, agents, rooms = game
+    saver = GameSaver(db, session_id, player, agents, rooms)
+    assert saver.save() == 0
+
+    rooms[START_ROOM].clean()
+    assert saver.save() == 1
+    assert saver.save() == 0
+    assert saved_clean_rooms(db, session_id) == {START_ROOM}
+
+    player.move(next(iter(player.current_room.connections)), rooms, [])
+    agents[0].needs_save = True
+    assert saver.save() == 2
+    assert not saver.has_changes()
+
+
+def test_failed_save_keeps_changes_flagged(db, session_id, game):
+    player, agents, rooms = game
+    saver = GameSaver(db, session_id, player, agents, rooms)
+    rooms[START_ROOM].clean()
+    fail_room_writes(db)
+    with pytest.raises(sqlite3.Error):
+        saver.save()
+    assert saver.has_changes()
+    assert saved_clean_rooms(db, session_id) == set()
+
+    fail_room_writes(db, fail=False)
+    assert saver.save() == 1
+    assert saved_clean_rooms(db, session_id) == {START_ROOM}
+
+
+@pytest.fixture
+def writer(db):
+    """
+    Starts a background writer, and stops it after the test.
+    """
+    writer = DatabaseWriter()
+    writer.start()
+    yield writer
+    if not writer._closed:
+        writer.close()
+
+
+def test_writer_failure_hands_back_objects_and_retry_saves_them(db, session_id, game, writer):
+    player, agents, rooms = game
+    saver = GameSaver(db, session_id, player, agents, rooms, writer=writer)
+    rooms[START_ROOM].clean()
+    fail_room_writes(db)
+    with pytest.raises(sqlite3.Error):
+        saver.flush()
+    # The lost room is flagged again before the next save decides what to write
+    assert saver.has_changes()
+    assert rooms[START_ROOM].needs_save
+
+    fail_room_writes(db, fail=False)
+    saver.flush()
+    assert not saver.has_changes()
+    assert saved_clean_rooms(db, session_id) == {START_ROOM}
+
+
+def test_save_before_quit_reports_lost_changes(db, session_id, game, writer, capsys):
+    player, agents, rooms = game
+    saver = GameSaver(db, session_id, player, agents, rooms, writer=writer)
+    rooms[START_ROOM].clean()
+    fail_room_writes(db)
+    save_before_quit(saver, writer)
+    assert f"Progress not saved for: {START_ROOM}." in capsys.readouterr().err
+    assert writer._closed
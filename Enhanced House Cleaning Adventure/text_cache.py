@@ -0,0 +1,140 @@
+# text_cache.py
+
+"""
+Shared fonts and a cache of rendered text surfaces.
+
+Looking up a system font and rasterizing text are the most expensive calls in a
+frame. Fonts are opened once per (name, size) and kept in a registry; rendered
+text is kept in an LRU cache keyed by (text, font, color), so room labels and
+messages that did not change are blitted from the cache instead of re-rendered
+every frame.
+"""
+
+import pygame
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from constants import TEXT_CACHE_SIZE
+
+FontKey = Tuple[Optional[str], int]
+
+_fonts: Dict[FontKey, pygame.font.Font] = {}
+
+
+def get_font(name: Optional[str], size: int) -> pygame.font.Font:
+    """
+    Returns the shared system font for a name and size, opening it on first use.
+
+    Args:
+        name (Optional[str]): The system font name, or None for pygame's default font.
+        size (int): The font size.
+
+    Returns:
+        pygame.font.Font: The font.
+    """
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = pygame.font.SysFont(name, size)
+        _fonts[key] = font
+    return font
+
+
+class TextCache:
+    """
+    LRU cache of rendered text surfaces.
+
+    Attributes:
+        capacity (int): Maximum number of surfaces kept.
+        hits (int): Renders served from the cache.
+        misses (int): Renders that had to rasterize the text.
+    """
+
+    def __init__(self, capacity: int = TEXT_CACHE_SIZE) -> None:
+        """
+        Initializes an empty cache.
+
+        Args:
+            capacity (int): Maximum number of surfaces kept.
+        """
+        self.capacity: int = capacity
+        self.hits: int = 0
+        self.misses: int = 0
+        self._surfaces: OrderedDict = OrderedDict()
+
+    def render(self, text: str, font_name: Optional[str], font_size: int, color: tuple) -> pygame.Surface:
+        """
+        Returns the rendered text, from the cache when it was rendered before.
+
+        The returned surface is shared; callers must blit it and not draw on it.
+
+        Args:
+            text (str): The text to render.
+            font_name (Optional[str]): The system font name, or None for the default font.
+            font_size (int): The font size.
+            color (tuple): The text color.
+
+        Returns:
+            pygame.Surface: The antialiased text surface.
+        """
+        key = (text, font_name, font_size, tuple(color))
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = get_font(font_name, font_size).render(text, True, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.capacity:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self) -> None:
+        """
+        Drops every cached surface and resets the counters.
+        """
+        self._surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the cache's size and hit counters.
+
+        Returns:
+            Dict[str, float]: size, capacity, hits, misses and hit_rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._surfaces),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+
+# Shared by every piece of code that draws text
+text_cache = TextCache()
+
+
+def render_text(text: str, font_name: Optional[str], font_size: int, color: tuple) -> pygame.Surface:
+    """
+    Renders text through the shared text cache.
+
+    Args:
+        text (str): The text to render.
+        font_name (Optional[str]): The system font name, or None for the default font.
+        font_size (int): The font size.
+        color (tuple): The text color.
+
+    Returns:
+        pygame.Surface: The antialiased text surface.
+    """
+    return text_cache.render(text, font_name, font_size, color)
@@ -0,0 +1,264 @@
+# verify_pathfinding.py
+
+"""
+Checks every search in pathfinding against reference searches on randomly
+generated houses.
+
+Dijkstra's algorithm on the dictionary graph is the reference for the cheapest
+cost, and breadth-first search, which is Dijkstra's algorithm for unit costs,
+also checks houses where every connection costs 1. For every query this script
+checks that each search finds a path exactly when the reference does, that the
+path is as cheap, that every step follows a connection and that avoided rooms
+are never entered. astar and astar_ids must also agree room for room. It
+reports how many rooms each search expanded and how long it took.
+
+Rooms are placed on a grid like the game's layout. Neighbouring rooms are
+connected with a given chance, some connections only go one way, optional
+shortcuts link distant rooms, and with --max-cost above 1 every connection
+costs a random whole number up to it.
+
+Usage:
+    python verify_pathfinding.py [--houses N] [--rooms N] [--queries N]
+                                 [--link-chance P] [--shortcuts N] [--max-cost N] [--seed N]
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+from constants import ROOM_WIDTH, ROOM_HEIGHT
+from compiled_graph import CompiledGraph
+from pathfinding import (
+    HouseGraph, Landmarks, SEARCH_METHODS, astar, astar_ids, bfs_path, dijkstra, max_step_length,
+    path_cost, search_ids
+)
+from room import Room
+
+# Space between neighbouring rooms, as in the default layout
+GRID_X = ROOM_WIDTH + 25
+GRID_Y = ROOM_HEIGHT + 25
+
+# Chance that a connection between neighbouring rooms only goes one way
+ONE_WAY_CHANCE = 0.1
+
+# The searches on the compiled graph that are checked, by name
+COMPILED_METHODS = [method for method in SEARCH_METHODS if method != 'auto']
+
+# Costs are sums of whole numbers, but the estimates are not; allow for rounding
+COST_TOLERANCE = 1e-9
+
+
+def random_house(
+    num_rooms: int,
+    rng: random.Random,
+    link_chance: float,
+    shortcuts: int = 0,
+    max_cost: int = 1
+) -> Tuple[Dict[str, Room], HouseGraph]:
+    """
+    Generates a random house.
+
+    Args:
+        num_rooms (int): Number of rooms.
+        rng (random.Random): Random number generator.
+        link_chance (float): Chance that two neighbouring rooms are connected.
+        shortcuts (int): Number of extra connections between random rooms.
+        max_cost (int): Highest traversal cost of a connection; 1 makes every move cost 1.
+
+    Returns:
+        Tuple[Dict[str, Room], HouseGraph]: The rooms and the graph.
+    """
+    side = math.ceil(math.sqrt(num_rooms * 1.1))
+    cells = rng.sample([(col, row) for col in range(side) for row in range(side)], num_rooms)
+    names = {cell: f"Room {i}" for i, cell in enumerate(cells)}
+    rooms = {name: Room(name, col * GRID_X, row * GRID_Y) for (col, row), name in names.items()}
+    graph: Dict[str, List[str]] = {name: [] for name in rooms}
+    costs: Dict[Tuple[str, str], float] = {}
+
+    for (col, row), name in names.items():
+        # Look right and down only, so each pair of neighbours is considered once
+        for other_cell in ((col + 1, row), (col, row + 1)):
+            other = names.get(other_cell)
+            if other is None or rng.random() >= link_chance:
+                continue
+            cost = rng.randint(1, max_cost)
+            if rng.random() < ONE_WAY_CHANCE:
+                a, b = (name, other) if rng.random() < 0.5 else (other, name)
+                graph[a].append(b)
+                costs[(a, b)] = cost
+            else:
+                graph[name].append(other)
+                graph[other].append(name)
+                costs[(name, other)] = costs[(other, name)] = cost
+
+    all_names = list(rooms)
+    for _ in range(shortcuts):
+        a, b = rng.sample(all_names, 2)
+        if b not in graph[a]:
+            graph[a].append(b)
+            costs[(a, b)] = rng.randint(1, max_cost)
+    return rooms, HouseGraph(graph, {pair: cost for pair, cost in costs.items() if cost != 1})
+
+
+def check_path(
+    graph: Dict[str, List[str]],
+    path: List[str],
+    start: str,
+    goal: str,
+    avoid: Set[str]
+) -> Optional[str]:
+    """
+    Checks that a path is a valid route from start to goal.
+
+    Args:
+        graph (Dict[str, List[str]]): The graph representation of the house.
+        path (List[str]): The path to check.
+        start (str): The starting room name.
+        goal (str): The goal room name.
+        avoid (Set[str]): Rooms the path may not pass through (the goal itself is allowed).
+
+    Returns:
+        Optional[str]: A description of the problem, or None if the path is valid.
+    """
+    if path[0] != start or path[-1] != goal:
+        return "does not run from start to goal"
+    for a, b in zip(path, path[1:]):
+        if b not in graph[a]:
+            return f"uses a missing connection {a} -> {b}"
+    if any(room_name in avoid for room_name in path[1:-1]):
+        return "passes through an avoided room"
+    return None
+
+
+def verify_house(
+    rooms: Dict[str, Room],
+    graph: HouseGraph,
+    queries: int,
+    rng: random.Random,
+    totals: Dict[str, float]
+) -> List[str]:
+    """
+    Runs random queries on one house, comparing every search with the references.
+
+    Args:
+        rooms (Dict[str, Room]): Dictionary of Room objects.
+        graph (HouseGraph): The graph representation of the house.
+        queries (int): Number of start/goal pairs to check.
+        rng (random.Random): Random number generator.
+        totals (Dict[str, float]): Running totals, updated in place.
+
+    Returns:
+        List[str]: Descriptions of every failed query.
+    """
+    failures: List[str] = []
+    names = list(rooms)
+    step_length = max_step_length(graph, rooms)
+    compiled = CompiledGraph.from_graph(graph, rooms)
+    begin = time.perf_counter()
+    landmarks = Landmarks(compiled)
+    totals['landmark_time'] += time.perf_counter() - begin
+
+    for _ in range(queries):
+        start, goal = rng.sample(names, 2)
+        # Every other query avoids a few rooms, like the player's route around the Master Bedroom
+        avoid = set(rng.sample(names, min(3, len(names)))) - {start} if rng.random() < 0.5 else set()
+        avoid_ids = set(compiled.ids(avoid))
+        query = f"{start} -> {goal} avoiding {sorted(avoid)}"
+
+        stats: Dict[str, int] = {}
+        begin = time.perf_counter()
+        expected = dijkstra(graph, start, goal, avoid, stats)
+        totals['reference_time'] += time.perf_counter() - begin
+        totals['reference_expanded'] += stats['expanded']
+        totals['queries'] += 1
+        if expected is None:
+            expected_cost = None
+        else:
+            totals['found'] += 1
+            expected_cost = path_cost(graph, expected)
+            problem = check_path(graph, expected, start, goal, avoid)
+            if problem:
+                failures.append(f"{query}: Dijkstra path {problem}")
+
+        if not graph.costs:
+            shortest = bfs_path(graph, start, goal, avoid)
+            if (shortest is None) != (expected is None):
+                failures.append(f"{query}: BFS found {shortest}, Dijkstra found {expected}")
+            elif shortest is not None and len(shortest) - 1 != expected_cost:
+                failures.append(f"{query}: BFS took {len(shortest) - 1} moves, Dijkstra cost {expected_cost}")
+
+        results: Dict[str, Optional[List[str]]] = {}
+        begin = time.perf_counter()
+        results['reference A*'] = astar(graph, start, goal, rooms, avoid, step_length, stats)
+        totals['reference A*_time'] += time.perf_counter() - begin
+        totals['reference A*_expanded'] += stats['expanded']
+        for method in COMPILED_METHODS:
+            begin = time.perf_counter()
+            found_ids = search_ids(
+                compiled, compiled.index[start], compiled.index[goal], avoid_ids, stats, method, landmarks
+            )
+            totals[f'{method}_time'] += time.perf_counter() - begin
+            totals[f'{method}_expanded'] += stats['expanded']
+            results[method] = compiled.names_of(found_ids) if found_ids is not None else None
+
+        if results['astar'] != results['reference A*']:
+            failures.append(f"{query}: compiled A* found {results['astar']}, A* found {results['reference A*']}")
+        for method, found in results.items():
+            if (found is None) != (expected is None):
+                failures.append(f"{query}: {method} found {found}, Dijkstra found {expected}")
+            elif found is not None:
+                problem = check_path(graph, found, start, goal, avoid)
+                if problem:
+                    failures.append(f"{query}: {method} path {problem}")
+                elif abs(path_cost(graph, found) - expected_cost) > COST_TOLERANCE:
+                    failures.append(
+                        f"{query}: {method} path costs {path_cost(graph, found)}, Dijkstra {expected_cost}"
+                    )
+    return failures
+
+
+def main() -> None:
+    """
+    Runs the verification and prints a summary. Exits with status 1 if any query failed.
+    """
+    parser = argparse.ArgumentParser(description="Verify the pathfinding searches on random houses.")
+    parser.add_argument('--houses', type=int, default=50, help="Number of random houses.")
+    parser.add_argument('--rooms', type=int, default=200, help="Rooms per house.")
+    parser.add_argument('--queries', type=int, default=50, help="Queries per house.")
+    parser.add_argument('--link-chance', type=float, default=0.8, help="Chance neighbouring rooms connect.")
+    parser.add_argument('--shortcuts', type=int, default=0, help="Extra connections between random rooms.")
+    parser.add_argument('--max-cost', type=int, default=1, help="Highest connection cost (1: every move costs 1).")
+    parser.add_argument('--seed', type=int, help="Random seed, for repeatable runs.")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    searches = ['reference A*', *COMPILED_METHODS]
+    totals: Dict[str, float] = defaultdict(float)
+    failures: List[str] = []
+    for _ in range(args.houses):
+        rooms, graph = random_house(args.rooms, rng, args.link_chance, args.shortcuts, args.max_cost)
+        failures.extend(verify_house(rooms, graph, args.queries, rng, totals))
+
+    queries = totals['queries']
+    print(f"Houses:    {args.houses} x {args.rooms} rooms, costs 1 to {args.max_cost}")
+    print(f"Queries:   {queries:.0f} ({totals['found']:.0f} reachable)")
+    print(f"Landmarks: {totals['landmark_time'] / args.houses * 1000:.1f} ms/house")
+    print(f"{'Search':<14}{'Expanded/query':>16}{'ms/query':>12}")
+    for search in ['reference', *searches]:
+        label = 'Dijkstra (ref)' if search == 'reference' else search
+        print(
+            f"{label:<14}{totals[f'{search}_expanded'] / queries:>16.1f}"
+            f"{totals[f'{search}_time'] / queries * 1000:>12.3f}"
+        )
+    print(f"Failures:  {len(failures)}")
+    for failure in failures[:10]:
+        print(f"  {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
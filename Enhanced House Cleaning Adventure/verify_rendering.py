@@ -0,0 +1,178 @@
+# verify_rendering.py
+
+"""
+Checks that the dirty-rectangle renderer draws the same pixels as drawing every
+room from scratch.
+
+The reference draws each room the way the game did before the map was
+pre-rendered into layers: the room in its clean or dirty color, the player
+highlight, the agent marker, the room name and finally the route marker, all
+clipped to the room's rect so markers on tiny zoomed-out rooms stay inside. The
+script plays random frames on the game's layout, changing which rooms are
+clean, where the player and agents are, the previewed route and the camera,
+lets the Renderer draw each frame incrementally and compares the map viewport
+with a reference frame drawn in full.
+
+Runs without a window, using SDL's dummy video driver.
+
+Usage:
+    python verify_rendering.py [--frames N] [--agents N] [--seed N]
+"""
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import argparse
+import random
+import sys
+from typing import Dict, List, Sequence
+import pygame
+from constants import *
+from camera import Camera
+from layout import load_layout
+from message_log import MessageLog
+from renderer import Renderer
+from room import Room
+from text_cache import render_text
+
+
+class Marker:
+    """
+    Stands in for the player or an agent; the renderer only reads current_room.
+
+    Attributes:
+        current_room (Room): The room the marker is in.
+    """
+
+    def __init__(self, room: Room) -> None:
+        """
+        Initializes the marker.
+
+        Args:
+            room (Room): The room the marker starts in.
+        """
+        self.current_room: Room = room
+
+
+def draw_reference(
+    surface: pygame.Surface,
+    rooms: Dict[str, Room],
+    camera: Camera,
+    player: Marker,
+    agents: Sequence[Marker],
+    route: Sequence[str]
+) -> None:
+    """
+    Draws the whole map the way the game drew it room by room before the layers existed.
+
+    Args:
+        surface (pygame.Surface): The surface to draw on; only the viewport is drawn.
+        rooms (Dict[str, Room]): Dictionary of all rooms.
+        camera (Camera): The view onto the map.
+        player (Marker): The player.
+        agents (Sequence[Marker]): The agents.
+        route (Sequence[str]): Names of the rooms on the previewed route.
+    """
+    zoom = camera.zoom
+    label_size = round(ROOM_FONT_SIZE * zoom)
+    agent_rooms = {agent.current_room.name for agent in agents}
+    viewport = pygame.Rect(0, 0, camera.width, min(camera.height, TEXT_BOX_Y))
+    surface.set_clip(viewport)
+    surface.fill(BLACK)
+    for room in rooms.values():
+        rect = pygame.Rect(camera.bounds_to_screen(room.bounds))
+        surface.set_clip(rect.clip(viewport))
+        pygame.draw.rect(surface, CLEAN_COLOR if room.is_clean else DIRTY_COLOR, rect)
+        if room is player.current_room:
+            pygame.draw.rect(surface, WHITE, rect, max(1, round(3 * zoom)))
+        if room.name in agent_rooms:
+            pygame.draw.circle(surface, AGENT_COLOR, rect.center, max(2, round(10 * zoom)))
+        if label_size >= MIN_LABEL_FONT_SIZE:
+            label = render_text(room.name, ROOM_FONT_NAME, label_size, BLACK)
+            surface.blit(label, label.get_rect(center=rect.center))
+        if room.name in route:
+            marker = (rect.centerx, rect.centery + rect.height // 3)
+            pygame.draw.circle(surface, ROUTE_COLOR, marker, max(2, round(6 * zoom)))
+    surface.set_clip(None)
+
+
+def random_frame(
+    rooms: Dict[str, Room],
+    camera: Camera,
+    player: Marker,
+    agents: List[Marker],
+    rng: random.Random
+) -> List[str]:
+    """
+    Makes a random change to the game state, as one frame of play might.
+
+    Args:
+        rooms (Dict[str, Room]): Dictionary of all rooms.
+        camera (Camera): The view onto the map.
+        player (Marker): The player.
+        agents (List[Marker]): The agents.
+        rng (random.Random): The random number generator.
+
+    Returns:
+        List[str]: The route to preview this frame.
+    """
+    names = list(rooms)
+    for room in rng.sample(list(rooms.values()), rng.randint(0, 2)):
+        room.is_clean = not room.is_clean
+    if rng.random() < 0.5:
+        player.current_room = rooms[rng.choice(names)]
+    for agent in agents:
+        if rng.random() < 0.5:
+            agent.current_room = rooms[rng.choice(names)]
+    if rng.random() < 0.05:
+        camera.zoom_at(rng.choice((0.5, 0.8, 1.25, 2.0)), rng.uniform(0, camera.width), rng.uniform(0, camera.height))
+    elif rng.random() < 0.05:
+        camera.pan(rng.uniform(-100, 100), rng.uniform(-100, 100))
+    return rng.sample(names, rng.randint(0, 3))
+
+
+def main() -> None:
+    """
+    Runs the verification and prints a summary. Exits with status 1 if any frame differed.
+    """
+    parser = argparse.ArgumentParser(description="Verify the renderer against drawing every room from scratch.")
+    parser.add_argument('--frames', type=int, default=2000, help="Number of random frames.")
+    parser.add_argument('--agents', type=int, default=2, help="Number of agents.")
+    parser.add_argument('--seed', type=int, help="Random seed, for repeatable runs.")
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    reference = pygame.Surface(screen.get_size(), 0, screen)
+    rng = random.Random(args.seed)
+
+    rooms = load_layout(LAYOUT_FILE).build_rooms()
+    names = list(rooms)
+    camera = Camera(SCREEN_WIDTH, TEXT_BOX_Y)
+    renderer = Renderer(screen, camera)
+    player = Marker(rooms[names[0]])
+    agents = [Marker(rooms[rng.choice(names)]) for _ in range(args.agents)]
+    messages = MessageLog(["Checking the renderer."])
+
+    failures: List[int] = []
+    redrawn = 0
+    for frame in range(args.frames):
+        route = random_frame(rooms, camera, player, agents, rng)
+        updated = renderer.draw(rooms, player, agents, messages, route)
+        redrawn += len(updated)
+        draw_reference(reference, rooms, camera, player, agents, route)
+        viewport = renderer.viewport_rect
+        if pygame.image.tostring(screen.subsurface(viewport), 'RGB') != \
+                pygame.image.tostring(reference.subsurface(viewport), 'RGB'):
+            failures.append(frame)
+
+    print(f"Frames:    {args.frames} on {len(rooms)} rooms with {args.agents} agents")
+    print(f"Rects:     {redrawn / args.frames:.2f} updated per frame, {renderer.static_map.builds} layer builds")
+    print(f"Failures:  {len(failures)}")
+    if failures:
+        print(f"  first differing frame: {failures[0]}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()